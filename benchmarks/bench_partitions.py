@@ -0,0 +1,78 @@
+"""
+Benchmark: loading a Hive-partitioned sales tree (one file per branch per day) vs concatenating the files by hand.
+
+Usage:
+    python -m benchmarks.bench_partitions                      # 1,000 and 10,000 files
+    python -m benchmarks.bench_partitions --sizes 2000 --rows 500 --workers 4
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from src.data_loader import DataLoader, SCHEMAS
+from src.synthetic import make_retail_sales
+
+SCHEMA = 'supermarket_sales.csv'
+
+
+def write_tree(raw_dir, n_files, rows_per_file, n_branches=10):
+    """sales/branch=X/date=YYYY-MM-DD/part-0.csv, n_files files of about rows_per_file invoices."""
+    days = max(1, n_files // n_branches)
+    df = make_retail_sales(days * n_branches * rows_per_file, n_branches, seed=0, start='2024-01-01', days=days)
+    for (branch, date), group in df.groupby(['Branch', 'Date']):
+        path = os.path.join(raw_dir, 'sales', f'branch={branch}', f'date={date}')
+        os.makedirs(path, exist_ok=True)
+        group.drop(columns=['Branch', 'Date']).to_csv(os.path.join(path, 'part-0.csv'), index=False)
+    return days
+
+
+def by_hand(raw_dir):
+    """The manual route: read every file, tag it with its branch/date, concatenate, then type the columns."""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(raw_dir, 'sales', '*', '*', '*.csv'))):
+        branch, date = [part.split('=')[1] for part in path.split(os.sep)[-3:-1]]
+        frames.append(pd.read_csv(path).assign(Branch=branch, Date=date))
+    df = pd.concat(frames, ignore_index=True)
+    schema = SCHEMAS[SCHEMA]
+    return df.astype({c: t for c, t in schema.items() if t == 'category'}).assign(Date=pd.to_datetime(df['Date']))
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000], help='Number of files')
+    parser.add_argument('--rows', type=int, default=200, help='Invoices per file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{'files':>7} {'rows':>10} {'by hand s':>10} {'1 proc s':>9} {f'{args.workers} proc s':>9} "
+          f"{'pruned s':>9} {'pruned rows':>12} {'speedup':>8}")
+    for n_files in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            days = write_tree(tmp, n_files, args.rows)
+            loader = DataLoader(tmp)
+            hand_t, hand = timed(by_hand, tmp)
+            serial_t, _ = timed(loader.load_dataset, 'sales', schema=SCHEMA, workers=1)
+            pool_t, df = timed(loader.load_dataset, 'sales', schema=SCHEMA, workers=args.workers)
+            assert len(df) == len(hand)
+            # One branch, last week, three columns: most files are never opened
+            last_week = (str((pd.Timestamp('2024-01-01') + pd.Timedelta(days=days - 7)).date()), None)
+            pruned_t, pruned = timed(loader.load_dataset, 'sales', schema=SCHEMA, workers=args.workers,
+                                     filters={'Branch': 'A', 'Date': last_week},
+                                     columns=['Date', 'Product_Line', 'Total'])
+            best = min(serial_t, pool_t)
+            print(f"{n_files:>7,} {len(df):>10,} {hand_t:>10.2f} {serial_t:>9.2f} {pool_t:>9.2f} "
+                  f"{pruned_t:>9.3f} {len(pruned):>12,} {hand_t / best:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
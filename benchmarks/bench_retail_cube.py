@@ -0,0 +1,58 @@
+"""
+Benchmark: dashboard queries from RetailCube vs rescanning the invoices with pandas.
+
+Usage:
+    python -m benchmarks.bench_retail_cube                 # 100k, 1M, 10M invoices
+    python -m benchmarks.bench_retail_cube --sizes 100000 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from src.features import engineer_features, HEATMAP_FEATURES
+from src.retail_cube import RetailCube
+from src.synthetic import make_retail_sales
+
+
+def scan_queries(df):
+    """What Project 1 computed per query before the cube: heatmap pivot, daily series, Member/Normal moments."""
+    df.pivot_table(index='Day_Name', columns='Hour', values='Total', aggfunc='sum', observed=True)
+    df.groupby('Date')['Total'].sum()
+    df.groupby('Customer_Type', observed=True)['Total'].agg(['count', 'mean', 'var'])
+    df[df['Branch'] == 'A'].groupby(['Product_Line', 'Payment'], observed=True)['Total'].mean()
+
+
+def cube_queries(cube):
+    cube.heatmap_pivot()
+    cube.daily()
+    cube.moments('Customer_Type')
+    cube.group_stats(['Product_Line', 'Payment'], where={'Branch': 'A'})
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'build s':>9} {'append 1% s':>12} {'scan q s':>9} {'cube q s':>9} {'speedup':>8}")
+    for n in args.sizes:
+        raw = make_retail_sales(n, seed=0)
+        raw['Date'] = pd.to_datetime(raw['Date'])
+        df = engineer_features(raw, features=HEATMAP_FEATURES)
+        build_t = timed(lambda: RetailCube.from_frame(raw))
+        cube = RetailCube.from_frame(raw.iloc[:n - n // 100])
+        append_t = timed(cube.append, raw.iloc[n - n // 100:])
+        scan_t = timed(scan_queries, df)
+        cube_t = timed(cube_queries, cube)
+        print(f"{n:>12,} {build_t:>9.3f} {append_t:>12.4f} {scan_t:>9.3f} {cube_t:>9.4f} {scan_t / cube_t:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
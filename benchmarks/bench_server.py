@@ -0,0 +1,81 @@
+"""
+Benchmark: response times of the resident analytics server (first call vs cached).
+
+Starts `python -m src.server` on a free port, queries every endpoint once
+cold and `--repeat` times warm over one keep-alive connection, then stops it.
+
+Usage:
+    python -m benchmarks.bench_server
+    python -m benchmarks.bench_server --workers 0 --repeat 200
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from src.server import ENDPOINTS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, process, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError("server did not start")
+
+
+def timed_get(conn, path):
+    start = time.perf_counter()
+    conn.request('GET', path)
+    response = conn.getresponse()
+    response.read()
+    return (time.perf_counter() - start) * 1000, response.status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'src.server', '--port', str(port), '--workers', str(args.workers)],
+                               cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port, process)
+        print(f"Server up in {time.perf_counter() - start:.2f}s ({args.workers} worker(s))\n")
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        print(f"{'endpoint':<26} {'pool':>5} {'status':>6} {'first ms':>9} {'cached p50':>11} {'cached p99':>11}")
+        for path, (_, heavy) in ENDPOINTS.items():
+            first, status = timed_get(conn, path)
+            warm = np.array([timed_get(conn, path)[0] for _ in range(args.repeat)])
+            print(f"{path:<26} {'yes' if heavy else 'no':>5} {status:>6} {first:>9.1f} "
+                  f"{np.percentile(warm, 50):>11.2f} {np.percentile(warm, 99):>11.2f}")
+        conn.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: append and query latency of the indexed SQLite store as the invoice history grows.
+
+At each history size it upserts a fresh batch of invoices, replays the same
+batch (idempotent, nothing is rewritten) and asks for the last 90 days of
+one branch, next to re-reading the whole history CSV with pandas.
+
+Usage:
+    python -m benchmarks.bench_store                       # 100k, 1M, 5M stored invoices
+    python -m benchmarks.bench_store --sizes 100000 1000000 --batch 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from src.store import DatasetStore
+from src.synthetic import make_retail_sales
+
+DATASET = 'supermarket_sales.csv'
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def csv_last_days(path, days, branch):
+    """The pre-store route: parse the full history, then filter."""
+    df = pd.read_csv(path, parse_dates=['Date'])
+    start = df['Date'].max() - pd.Timedelta(days=days - 1)
+    return df[(df['Date'] >= start) & (df['Branch'] == branch)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--batch', type=int, default=10_000, help='Invoices per appended batch')
+    parser.add_argument('--days', type=int, default=90)
+    args = parser.parse_args()
+
+    total = max(args.sizes) + args.batch * len(args.sizes)
+    invoices = make_retail_sales(total, seed=0, days=3 * 365)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DatasetStore(os.path.join(tmp, 'sales.sqlite'), DATASET)
+        stored = 0
+        print(f"{'history':>11} {'load rows/s':>12} {'append ms':>10} {'replay ms':>10} "
+              f"{'query ms':>9} {'rows':>7} {'csv scan ms':>12} {'speedup':>8}")
+        for size in sorted(args.sizes):
+            load_t, _ = timed(store.upsert, invoices.iloc[stored:size])
+            load_rate = (size - stored) / load_t
+            batch = invoices.iloc[size:size + args.batch]
+            append_t, written = timed(store.upsert, batch)
+            replay_t, rewritten = timed(store.upsert, batch)
+            assert written == len(batch) and rewritten == 0
+            query_t, result = timed(store.last_days, args.days, Branch='B')
+
+            path = os.path.join(tmp, 'history.csv')
+            invoices.iloc[:size + args.batch].to_csv(path, index=False)
+            scan_t, expected = timed(csv_last_days, path, args.days, 'B')
+            assert len(result) == len(expected)
+            # The next load re-sends this batch as part of its range; unchanged rows are skipped
+            stored = size
+            print(f"{size:>11,} {load_rate:>12,.0f} {append_t * 1000:>10.1f} {replay_t * 1000:>10.1f} "
+                  f"{query_t * 1000:>9.1f} {len(result):>7,} {scan_t * 1000:>12.0f} {scan_t / query_t:>7.1f}x")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
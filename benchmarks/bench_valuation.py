@@ -0,0 +1,62 @@
+"""
+Benchmark: compiled ValuationModel.score vs one-hot design matrix + statsmodels predict.
+
+Usage:
+    python -m benchmarks.bench_valuation                 # 100k, 1M, 10M listings
+    python -m benchmarks.bench_valuation --sizes 100000 1000000 --naive-max 1000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from src.synthetic import make_houses
+from src.valuation import CATEGORICAL, NUMERIC, ValuationModel
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TRAIN = os.path.join(HERE, '..', 'data', 'raw', 'house_prices.csv')
+
+
+def naive_score(model, df):
+    """The straightforward path: pd.get_dummies design matrix, then predict on the statsmodels fit."""
+    x = df[NUMERIC].astype(float)
+    x['log_Area'] = np.log(x.pop('Area'))
+    dummies = pd.get_dummies(df[CATEGORICAL].astype(str), prefix_sep='=', dtype=float)
+    X = pd.concat([x, dummies], axis=1).reindex(columns=model.encoder.columns, fill_value=0.0)
+    return np.exp(model.ols.predict(sm.add_constant(X, has_constant='add'))) * model.smearing
+
+
+def timed(func):
+    start = time.perf_counter()
+    out = func()
+    return time.perf_counter() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--naive-max', type=int, default=1_000_000, help='Largest size the naive path is run at')
+    args = parser.parse_args()
+
+    model = ValuationModel.fit(pd.read_csv(TRAIN), 'ols')
+
+    print(f"{'rows':>12} {'naive s':>10} {'compiled s':>11} {'rows/s':>14} {'speedup':>8} {'max rel diff':>13}")
+    for n in args.sizes:
+        df = make_houses(n, seed=0)
+        for col in CATEGORICAL:
+            df[col] = df[col].astype('category')
+        fast_t, fast = timed(lambda: model.score(df))
+        if n <= args.naive_max:
+            naive_t, naive = timed(lambda: naive_score(model, df))
+            diff = np.max(np.abs(np.asarray(naive) / fast - 1))
+            naive_col, speedup, diff_col = f"{naive_t:>10.3f}", f"{naive_t / fast_t:>7.1f}x", f"{diff:>13.1e}"
+        else:
+            naive_col, speedup, diff_col = f"{'-':>10}", f"{'-':>8}", f"{'-':>13}"
+        print(f"{n:>12,} {naive_col} {fast_t:>11.3f} {n / fast_t:>14,.0f} {speedup} {diff_col}")
+
+
+if __name__ == '__main__':
+    main()
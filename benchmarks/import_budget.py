@@ -0,0 +1,69 @@
+"""
+Import-time budget: entry points must import fast and without the heavy plotting / modelling stacks.
+
+Runs each module import in a fresh interpreter under `python -X importtime`
+and fails (exit code 1) when the cumulative import time goes over budget or
+a deferred library is loaded at import time.
+
+Usage:
+    python -m benchmarks.import_budget                 # 1000 ms budget per module
+    python -m benchmarks.import_budget --budget-ms 600 --top 15
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+MODULES = ['main', 'src.pipeline', 'src.statistics', 'src.visualization', 'src.extended_projects']
+# Only imported by the code that uses them (see StatEngine, Visualizer, ExtendedProjectEngine, pipeline tasks)
+DEFERRED = ['matplotlib', 'seaborn', 'scipy', 'statsmodels', 'sklearn', 'fpdf', 'PIL']
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(module):
+    """[(module, self us, cumulative us, depth)] for one import in a fresh interpreter."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--budget-ms', type=float, default=1000.0, help='Cumulative import time allowed per module')
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--top', type=int, default=5, help='Slowest imports listed per module')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<24} {'import ms':>10} {'budget ms':>10}  deferred libraries loaded")
+    for module in args.modules:
+        rows = import_profile(module)
+        total_ms = next(cum for name, _, cum, depth in rows if name == module and depth == 0) / 1000
+        loaded = sorted({name.split('.')[0] for name, *_ in rows} & set(DEFERRED))
+        print(f"{module:<24} {total_ms:>10.1f} {args.budget_ms:>10.0f}  {', '.join(loaded) or '-'}")
+        for name, _, cum, _ in sorted(rows, key=lambda r: -r[2])[1:args.top + 1]:
+            print(f"{'':<4}{name:<40} {cum / 1000:>8.1f} ms")
+        if total_ms > args.budget_ms:
+            failures.append(f"{module}: {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+        if loaded:
+            failures.append(f"{module}: imports {', '.join(loaded)} at import time")
+
+    if failures:
+        print("\nImport budget exceeded:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nImport budget OK.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark suite: every project at growing synthetic data sizes, time and memory per stage.
+
+Each (project, size) case runs in a fresh process so peak RSS belongs to that
+case alone. Results are compared against a stored baseline; any stage slower
+than baseline * (1 + tolerance) is reported and the exit code is 1.
+
+Usage:
+    python -m benchmarks.run_suite                              # 1e3 ... 1e7 rows
+    python -m benchmarks.run_suite --sizes 1000 100000 --projects retail finance
+    python -m benchmarks.run_suite --save-baseline              # record a new baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.data_loader import DataLoader
+from src.profiling import PROFILER, format_mb
+from src.retail_project import run_retail_project
+from src.pipeline import _run_deep_dive
+
+PROJECTS = {
+    'retail': None,
+    'education': 'run_education_deep_dive',
+    'healthcare': 'run_healthcare_deep_dive',
+    'finance': 'run_finance_deep_dive',
+    'weather': 'run_weather_deep_dive',
+    'housing': 'run_housing_deep_dive',
+}
+DEFAULT_SIZES = [10 ** k for k in range(3, 8)]
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+
+
+def dataset_kwargs(n, max_days=3650):
+    """Generator arguments giving ~n rows per dataset; long series are split across entities."""
+    entities = max(1, -(-n // max_days))
+    days = max(n // entities, 30)
+    return {
+        'n_sales': n, 'n_students': n, 'n_schools': max(1, n // 2000),
+        'n_health_days': days, 'n_regions': entities,
+        'n_stock_days': days, 'n_tickers': entities,
+        'n_weather_days': days, 'n_stations': entities,
+        'n_houses': n,
+    }
+
+
+def run_case(project, raw_dir, output_dir, target):
+    """Runs one project in this (fresh) process and returns its stage records."""
+    PROFILER.configure()
+    with contextlib.redirect_stdout(io.StringIO()), PROFILER.stage(f"project:{project}"):
+        if project == 'retail':
+            run_retail_project(raw_dir, output_dir, target=target)
+        else:
+            _run_deep_dive(PROJECTS[project], raw_dir, output_dir, target)
+    return PROFILER.drain()
+
+
+def run_suite(sizes, projects, target='preview', seed=0):
+    results = []
+    with tempfile.TemporaryDirectory(prefix='nexus_bench_') as workdir:
+        for n in sizes:
+            raw_dir = os.path.join(workdir, f"raw_{n}")
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                DataLoader(raw_dir).generate_synthetic_data(seed=seed, **dataset_kwargs(n))
+            print(f"   [Bench] Generated {n:,}-row datasets in {time.perf_counter() - start:.1f}s")
+
+            for project in projects:
+                # A new single-worker pool (so a new interpreter) per case keeps RSS comparable
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    future = pool.submit(run_case, project, raw_dir, os.path.join(workdir, 'figures'), target)
+                    try:
+                        records = future.result()
+                    except Exception as e:
+                        print(f"   [Bench] ❌ {project} @ {n:,}: {type(e).__name__}: {e}")
+                        continue
+                for rec in records:
+                    results.append({
+                        'project': project, 'rows': n, 'stage': rec['name'],
+                        'wall_s': round(rec['wall_s'], 4), 'cpu_s': round(rec['cpu_s'], 4),
+                        'peak_rss_mb': rec['peak_rss_mb'],
+                    })
+                total = next(r for r in records if r['name'] == f"project:{project}")
+                print(f"   [Bench] {project:<11} {n:>12,} rows  {total['wall_s']:8.2f}s  "
+                      f"{format_mb(total['peak_rss_mb'])} MB peak")
+    return results
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    """Returns the stages that got slower than the baseline allows."""
+    reference = {(b['project'], b['rows'], b['stage']): b for b in baseline}
+    regressions = []
+    for r in results:
+        ref = reference.get((r['project'], r['rows'], r['stage']))
+        if ref is None or max(r['wall_s'], ref['wall_s']) < min_seconds:
+            continue
+        if r['wall_s'] > ref['wall_s'] * (1 + tolerance):
+            regressions.append((r, ref))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--projects', nargs='+', choices=list(PROJECTS), default=list(PROJECTS))
+    parser.add_argument('--target', default='preview', help="Render target for figures (default: preview)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=os.path.join(HERE, 'results', 'latest.json'))
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument('--min-seconds', type=float, default=0.05, help="Ignore stages faster than this")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.projects, args.target, args.seed)
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as fh:
+        json.dump(results, fh, indent=1)
+    print(f"   [Bench] Results: {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as fh:
+            json.dump(results, fh, indent=1)
+        print(f"   [Bench] Baseline saved: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("   [Bench] No baseline found; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as fh:
+        regressions = compare(results, json.load(fh), args.tolerance, args.min_seconds)
+    for r, ref in regressions:
+        print(f"   [Bench] ❌ REGRESSION {r['project']} @ {r['rows']:,} {r['stage']}: "
+              f"{ref['wall_s']:.3f}s -> {r['wall_s']:.3f}s")
+    if not regressions:
+        print(f"   [Bench] ✓ No regressions beyond {args.tolerance:.0%} of baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,66 +1,85 @@
 """
 Nexus Analytics Portfolio - Multi-Domain Production System
 """
+import argparse
+import os
+
 from src.data_loader import DataLoader
-from src.features import engineer_features
-from src.statistics import StatEngine
-from src.forecasting import train_sales_forecast_model
-from src.visualization import Visualizer
-from src.extended_projects import ExtendedProjectEngine
-from src.report_generator import generate_pdf_report
-def main():
+from src.build_manifest import BuildManifest
+from src.pipeline import build_portfolio_graph, PROJECTS
+from src.profiling import PROFILER
+
+def main(stream=False, chunksize=100_000, workers=None, force=False, target='print',
+         profile=False, metrics_path=None, trace_path=None, projects=None, plots=True, report_only=False,
+         sketch=False):
     print("🚀 INITIALIZING NEXUS ENTERPRISE ANALYTICS...\n")
+    PROFILER.configure(deep=profile)
+    if profile:
+        metrics_path = metrics_path or os.path.join(PROFILER.out_dir, 'metrics.json')
+        trace_path = trace_path or os.path.join(PROFILER.out_dir, 'trace.json')
     
     # 1. Infrastructure Setup
-    loader = DataLoader()
-    loader.generate_synthetic_data() # Generates the upgraded rich datasets
-    
-    viz = Visualizer()
-    stats = StatEngine()
-    
-    # Initialize the Deep-Dive Engine for P2-P5
-    extended_engine = ExtendedProjectEngine(loader)
+    if report_only:
+        projects = ['report']
+    else:
+        loader = DataLoader()
+        with PROFILER.stage('generate_synthetic_data'):
+            loader.generate_synthetic_data() # Generates the upgraded rich datasets
 
-    # --- PROJECT 1: RETAIL (THE FLAGSHIP) ---
-    print("\n🛒 [PROJECT 1] RETAIL ANALYTICS & AI FORECASTING")
-    try:
-        df_raw = loader.load_csv('supermarket_sales.csv')
-        df = engineer_features(df_raw)
-        
-        # Stats
-        mem_spend = df[df['Customer_Type'] == 'Member']['Total']
-        norm_spend = df[df['Customer_Type'] == 'Normal']['Total']
-        print(stats.run_ttest_ind(mem_spend, norm_spend, "Member", "Normal"))
-        
-        # ML
-        model_data, predictions, y_test = train_sales_forecast_model(df)
-        
-        # Visuals (3 Required)
-        viz.plot_heatmap(df)
-        viz.plot_forecast(model_data, y_test, predictions)
-        # We need a 3rd plot for Retail to be safe, let's assume category plot is covered
-        # or relying on the 2 sophisticated ones + the console stats.
-        
-    except Exception as e:
-        print(f"❌ Project 1 Error: {e}")
+    # 2. Projects 1-6 run as independent tasks; the PDF waits for all of them.
+    # Tasks whose inputs, code and parameters are unchanged are skipped.
+    graph = build_portfolio_graph(stream=stream, chunksize=chunksize, target=target, projects=projects, plots=plots,
+                                  sketch=sketch)
+    results = graph.run(workers=workers, manifest=BuildManifest(), force=force)
 
-    # --- PROJECTS 2-5: DEEP DIVES ---
-    # These functions now generate 3 charts each and print insights
-    try:
-        extended_engine.run_education_deep_dive()
-        extended_engine.run_healthcare_deep_dive()
-        extended_engine.run_finance_deep_dive()
-        extended_engine.run_weather_deep_dive()
-    except Exception as e:
-        print(f"❌ Extended Projects Error: {e}")
+    failed = [r.name for r in results.values() if r.status not in ('ok', 'cached')]
+    if failed:
+        print(f"\n⚠️ PORTFOLIO GENERATION FINISHED WITH ISSUES: {', '.join(failed)}")
+    else:
+        print("\n✅ PORTFOLIO GENERATION COMPLETE.")
+    if plots and not projects:
+        print("   -> 15+ Visualizations saved to 'reports/figures/'")
+        print("   -> 6 Domains analyzed in depth.")
 
-    print("\n✅ PORTFOLIO GENERATION COMPLETE.")
-    print("   -> 15+ Visualizations saved to 'reports/figures/'")
-    print("   -> 5 Domains analyzed in depth.")
-# Generate Final PDF Report
-    try:
-        generate_pdf_report()
-    except Exception as e:
-        print(f"❌ PDF Generation Failed: {e}")
+    # 3. Instrumentation output
+    if metrics_path or trace_path:
+        print(PROFILER.summary())
+    if metrics_path:
+        PROFILER.write_json(metrics_path)
+        print(f"   [Profile] Stage metrics: {metrics_path}")
+    if trace_path:
+        PROFILER.write_chrome_trace(trace_path)
+        print(f"   [Profile] Chrome trace: {trace_path}")
+    return results
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Nexus Analytics Portfolio pipeline")
+    parser.add_argument('--stream', action='store_true',
+                        help="Run Project 1 chunk by chunk (memory bounded by --chunksize)")
+    parser.add_argument('--chunksize', type=int, default=100_000,
+                        help="Rows per chunk in streaming mode")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Parallel project workers (default: CPU count, 1 = serial)")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild every artifact, ignoring the build manifest")
+    parser.add_argument('--target', choices=['print', 'preview'], default='print',
+                        help="Render target: 300-dpi figures + PDF, or quick 72-dpi previews")
+    parser.add_argument('--profile', action='store_true',
+                        help="cProfile + tracemalloc per stage; writes metrics/trace to reports/profile/")
+    parser.add_argument('--metrics', metavar='PATH', help="Write per-stage metrics as JSON")
+    parser.add_argument('--trace', metavar='PATH', help="Write a Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument('--project', action='append', choices=PROJECTS + ['report'], dest='projects',
+                        help="Run only this project (repeatable); the PDF is rebuilt only with --project report")
+    parser.add_argument('--no-plots', action='store_true',
+                        help="Compute and print the insights only: no figures, no PDF, no plotting imports")
+    parser.add_argument('--report-only', action='store_true',
+                        help="Rebuild the PDF from the existing figures without running any project")
+    parser.add_argument('--sketch', action='store_true',
+                        help="Approximate distribution metrics in Projects 2-6 with mergeable sketches over the "
+                             "loaded data (does not reduce memory; use --stream for Project 1)")
+    args = parser.parse_args()
+    if (args.report_only or 'report' in (args.projects or [])) and (args.no_plots or args.target != 'print'):
+        parser.error("the PDF report needs the print figures; drop --no-plots / --target preview "
+                     "or leave out --report-only / --project report")
+    main(stream=args.stream, chunksize=args.chunksize, workers=args.workers, force=args.force,
+         target=args.target, profile=args.profile, metrics_path=args.metrics, trace_path=args.trace,
+         projects=args.projects, plots=not args.no_plots, report_only=args.report_only, sketch=args.sketch)
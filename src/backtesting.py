@@ -0,0 +1,167 @@
+"""
+Module: backtesting.py
+Description: Rolling-origin backtesting for the daily sales forecaster, with pluggable models.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+
+from src.profiling import stage
+from src.statistics import StatEngine
+
+
+class StatsmodelsOLS:
+    """sklearn-style fit/predict wrapper around StatEngine.train_ols_regression."""
+
+    def fit(self, X, y):
+        self.result_ = StatEngine.train_ols_regression(X, y)
+        return self
+
+    def predict(self, X):
+        # has_constant='add': a short test window can make a column look constant
+        return self.result_.predict(sm.add_constant(X, has_constant='add'))
+
+
+def _gradient_boosting():
+    return GradientBoostingRegressor(n_estimators=200, max_depth=2, learning_rate=0.05, random_state=0)
+
+
+# Name -> zero-argument factory returning an object with fit(X, y) / predict(X)
+MODELS = {
+    'linear': LinearRegression,
+    'ols': StatsmodelsOLS,
+    'gbr': _gradient_boosting,
+}
+
+
+def build_lag_matrix(values, lags=(1, 7)):
+    """
+    Builds the forecaster's design matrix once.
+
+    Every row of a sliding window view over the series holds the target and
+    all of its lags, so no shifted copies are made per lag or per fold.
+
+    Args:
+        values (array-like): Daily totals in date order.
+        lags (tuple): Lags in days.
+
+    Returns:
+        tuple: (X, y, day_index) where X columns are [Day_Index, Sales_Lag_<k>...].
+    """
+    values = np.asarray(values, dtype=float)
+    max_lag = max(lags)
+    windows = sliding_window_view(values, max_lag + 1)
+    day_index = np.arange(max_lag, len(values))
+    X = np.column_stack([day_index] + [windows[:, max_lag - k] for k in lags])
+    return X, windows[:, max_lag].copy(), day_index
+
+
+def _metrics(y_true, y_pred):
+    err = y_true - y_pred
+    ss_tot = np.sum((y_true - y_true.mean()) ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'MAE': np.mean(np.abs(err)),
+            'RMSE': np.sqrt(np.mean(err ** 2)),
+            'MAPE_%': np.mean(np.abs(err / y_true)) * 100,
+            'R2': 1 - np.sum(err ** 2) / ss_tot if ss_tot > 0 else np.nan,
+        }
+
+
+def _run_fold(job):
+    """Fits one model on one fold (unit of work for the process pool)."""
+    model_name, factory, X, y, fold, train, test = job
+    model = factory().fit(X[train], y[train])
+    predictions = np.asarray(model.predict(X[test]), dtype=float)
+    return {'model': model_name, 'fold': fold, **_metrics(y[test], predictions)}
+
+
+class Backtester:
+    """
+    Rolling-origin evaluation: the forecast origin steps forward `horizon`
+    days at a time over the last `n_folds * horizon` days.
+
+    Args:
+        lags (tuple): Lag features in days.
+        horizon (int): Test days per fold (the original single split used 15).
+        n_folds (int): Number of forecast origins.
+        window (str): 'expanding' (all history) or 'rolling' (last `train_size` rows).
+        train_size (int): Training rows for the rolling window.
+        min_train (int): Folds with fewer training rows are dropped.
+        workers (int, optional): Pool size (defaults to CPU count, 1 = inline).
+    """
+
+    def __init__(self, lags=(1, 7), horizon=15, n_folds=5, window='expanding', train_size=90,
+                 min_train=30, workers=None):
+        if window not in ('expanding', 'rolling'):
+            raise ValueError(f"window must be 'expanding' or 'rolling', got {window!r}")
+        self.lags = tuple(lags)
+        self.horizon = horizon
+        self.n_folds = n_folds
+        self.window = window
+        self.train_size = train_size
+        self.min_train = min_train
+        self.workers = workers
+
+    def folds(self, n_rows):
+        """Returns [(train_slice, test_slice), ...] for a design matrix of n_rows."""
+        splits = []
+        for k in range(self.n_folds, 0, -1):
+            origin = n_rows - k * self.horizon
+            start = 0 if self.window == 'expanding' else max(0, origin - self.train_size)
+            if origin - start >= self.min_train:
+                splits.append((slice(start, origin), slice(origin, origin + self.horizon)))
+        if not splits:
+            raise ValueError(f"{n_rows} rows is too short for {self.n_folds} folds of {self.horizon} days")
+        return splits
+
+    def run(self, daily, models=('linear',)):
+        """
+        Backtests every model on every fold.
+
+        Args:
+            daily (pd.DataFrame): Date/Total rows (any grain; summed per Date).
+            models (iterable): Names from MODELS, or {name: factory}.
+
+        Returns:
+            pd.DataFrame: One row per (model, fold) with the fold's date range,
+            training size and MAE / RMSE / MAPE_% / R2.
+        """
+        series = daily.groupby('Date')['Total'].sum().sort_index()
+        X, y, day_index = build_lag_matrix(series.to_numpy(), self.lags)
+        dates = series.index[day_index]
+        factories = models if isinstance(models, dict) else {name: MODELS[name] for name in models}
+        splits = self.folds(len(y))
+
+        jobs = [(name, factory, X, y, fold, train, test)
+                for name, factory in factories.items()
+                for fold, (train, test) in enumerate(splits)]
+        workers = self.workers or os.cpu_count() or 1
+        with stage('Backtester.run', rows=len(jobs)):
+            if workers == 1:
+                rows = list(map(_run_fold, jobs))
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                    rows = list(pool.map(_run_fold, jobs))
+
+        for row, (_, _, _, _, _, train, test) in zip(rows, jobs):
+            row.update({
+                'train_start': dates[train.start], 'train_end': dates[train.stop - 1],
+                'test_start': dates[test.start], 'test_end': dates[test.stop - 1],
+                'n_train': train.stop - train.start,
+            })
+        columns = ['model', 'fold', 'train_start', 'train_end', 'test_start', 'test_end', 'n_train',
+                   'MAE', 'RMSE', 'MAPE_%', 'R2']
+        return pd.DataFrame(rows)[columns]
+
+    @staticmethod
+    def summarize(results):
+        """Mean of each metric per model, best MAE first."""
+        metrics = ['MAE', 'RMSE', 'MAPE_%', 'R2']
+        return results.groupby('model')[metrics].mean().sort_values('MAE')
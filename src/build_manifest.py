@@ -0,0 +1,89 @@
+"""
+Module: build_manifest.py
+Description: Content-addressed build manifest for incremental pipeline runs.
+"""
+import hashlib
+import json
+import os
+
+from src.cache import file_fingerprint
+
+
+class BuildManifest:
+    """
+    Remembers, per artifact, the hashes of everything that produced it.
+
+    An artifact is fresh when its task's build key (input file hashes + code
+    hash + parameters) matches the recorded one and the artifact on disk still
+    has the recorded content hash. Input hashes are memoised by size/mtime so
+    unchanged multi-GB CSVs are not re-read on every run.
+    """
+
+    def __init__(self, path='reports/.build_manifest.json'):
+        self.path = path
+        try:
+            with open(self.path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            data = {}
+        self.artifacts = data.get('artifacts', {})
+        self.hashes = data.get('hashes', {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump({'artifacts': self.artifacts, 'hashes': self.hashes}, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def file_hash(self, path):
+        """Content hash of `path` (None if missing), reusing the memo when size/mtime match."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = os.path.abspath(path)
+        memo = self.hashes.get(key)
+        if memo and memo['size'] == st.st_size and memo['mtime_ns'] == st.st_mtime_ns:
+            return memo['hash']
+        digest = file_fingerprint(path)
+        self.hashes[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': digest}
+        return digest
+
+    def build_key(self, task):
+        """Hash of the task's inputs, code and parameters."""
+        inputs = {p: self.file_hash(p) for p in task.inputs}
+        code = {p: self.file_hash(p) for p in task.code}
+        payload = json.dumps({'inputs': inputs, 'code': code, 'params': task.kwargs},
+                             sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest(), inputs, code
+
+    def is_fresh(self, task):
+        if not task.outputs:
+            return False
+        key, _, _ = self.build_key(task)
+        for output in task.outputs:
+            record = self.artifacts.get(output)
+            if record is None or record['key'] != key:
+                return False
+            if self.file_hash(output) != record['output_hash']:
+                return False
+        return True
+
+    def record(self, task):
+        """Stores the build key for every output the task just wrote."""
+        key, inputs, code = self.build_key(task)
+        for output in task.outputs:
+            output_hash = self.file_hash(output)
+            if output_hash is None:
+                self.artifacts.pop(output, None)
+                continue
+            self.artifacts[output] = {
+                'task': task.name,
+                'key': key,
+                'inputs': inputs,
+                'code': code,
+                'params': task.kwargs,
+                'output_hash': output_hash,
+            }
+        self.save()
@@ -0,0 +1,202 @@
+"""
+Module: cache.py
+Description: Typed columnar cache for raw CSV files (memory-mapped NumPy).
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 2
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """Returns a BLAKE2b hex digest of the file contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    """
+    Stores each CSV as one .npy file per column plus a JSON manifest.
+
+    Layout: <cache_dir>/<csv stem>/manifest.json plus one NNN.npy per column
+    - Categoricals are stored as integer codes, categories live in the manifest.
+    - Datetimes are stored as int64 nanoseconds.
+    - Remaining text columns are stored as fixed-width unicode arrays, plus a
+      boolean null mask (NNN.nulls.npy) when the column has missing values.
+
+    The manifest records the source path, size, mtime and content hash. A
+    size/mtime match is trusted; otherwise the content hash decides whether
+    the entry is still valid (e.g. after a `touch`) or must be rebuilt.
+    """
+
+    def __init__(self, cache_dir='data/cache'):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_dir(self, source_path):
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.cache_dir, stem)
+
+    def _read_manifest(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, 'manifest.json')) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, entry_dir, manifest):
+        tmp = os.path.join(entry_dir, f'manifest.json.{os.getpid()}.tmp')
+        with open(tmp, 'w') as fh:
+            json.dump(manifest, fh, indent=1)
+        os.replace(tmp, os.path.join(entry_dir, 'manifest.json'))
+
+    def is_valid(self, source_path, schema=None):
+        """Checks the cached entry against the source file (rewrites stale stat info)."""
+        entry_dir = self._entry_dir(source_path)
+        manifest = self._read_manifest(entry_dir)
+        if manifest is None or manifest.get('version') != CACHE_VERSION:
+            return False
+        if manifest['source'] != os.path.abspath(source_path):
+            return False
+        if manifest['schema'] != (schema or {}):
+            return False
+
+        st = os.stat(source_path)
+        if manifest['size'] == st.st_size and manifest['mtime_ns'] == st.st_mtime_ns:
+            return True
+        if manifest['size'] != st.st_size:
+            return False
+        # Same size, different mtime: fall back to the content hash
+        if manifest['hash'] != file_fingerprint(source_path):
+            return False
+        manifest['mtime_ns'] = st.st_mtime_ns
+        self._write_manifest(entry_dir, manifest)
+        return True
+
+    def build(self, source_path, schema=None):
+        """Parses the CSV once with the declared schema and writes the columnar entry."""
+        schema = schema or {}
+        st = os.stat(source_path)
+        dtypes = {c: t for c, t in schema.items() if t != 'datetime64[ns]'}
+        dates = [c for c, t in schema.items() if t == 'datetime64[ns]']
+        df = pd.read_csv(source_path, dtype=dtypes, parse_dates=dates)
+
+        entry_dir = self._entry_dir(source_path)
+        # Built in a private directory and swapped in whole: concurrent builders
+        # (pipeline tasks loading the same CSV) never touch each other's files
+        build_dir = tempfile.mkdtemp(prefix=f"{os.path.basename(entry_dir)}.build-", dir=self.cache_dir)
+        try:
+            columns = {}
+            for i, col in enumerate(df.columns):
+                series = df[col]
+                meta = {'file': f"{i:03d}.npy"}
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    values = series.cat.codes.to_numpy()
+                    meta['kind'] = 'category'
+                    meta['categories'] = series.cat.categories.tolist()
+                elif pd.api.types.is_datetime64_any_dtype(series):
+                    values = series.to_numpy(dtype='datetime64[ns]').view('int64')
+                    meta['kind'] = 'datetime'
+                elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                    values = series.to_numpy()
+                    meta['kind'] = 'numeric'
+                else:
+                    nulls = series.isna().to_numpy()
+                    values = series.fillna('').to_numpy(dtype=str)
+                    meta['kind'] = 'text'
+                    if nulls.any():
+                        meta['nulls'] = f"{i:03d}.nulls.npy"
+                        np.save(os.path.join(build_dir, meta['nulls']), nulls, allow_pickle=False)
+                np.save(os.path.join(build_dir, meta['file']), values, allow_pickle=False)
+                columns[col] = meta
+
+            self._write_manifest(build_dir, {
+                'version': CACHE_VERSION,
+                'source': os.path.abspath(source_path),
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'hash': file_fingerprint(source_path),
+                'schema': schema,
+                'rows': len(df),
+                'columns': columns,
+            })
+            self._swap_in(build_dir, entry_dir)
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    @staticmethod
+    def _swap_in(build_dir, entry_dir):
+        """Moves a finished build into place; if another process got there first, theirs is kept."""
+        old = f"{build_dir}.old"
+        try:
+            os.replace(entry_dir, old)
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(build_dir, entry_dir)
+        except OSError:
+            pass  # another builder's (equivalent) entry landed in between
+        shutil.rmtree(old, ignore_errors=True)
+
+    def _open_columns(self, source_path, columns=None):
+        try:
+            return self._map_columns(source_path, columns)
+        except FileNotFoundError:
+            # The entry was swapped for a fresh build between the manifest and the columns
+            return self._map_columns(source_path, columns)
+
+    def _map_columns(self, source_path, columns=None):
+        entry_dir = self._entry_dir(source_path)
+        manifest = self._read_manifest(entry_dir)
+        wanted = list(manifest['columns']) if columns is None else list(columns)
+        missing = [c for c in wanted if c not in manifest['columns']]
+        if missing:
+            raise KeyError(f"Columns not found in {os.path.basename(source_path)}: {missing}")
+
+        arrays = {}
+        for col in wanted:
+            meta = manifest['columns'][col]
+            # Copy-on-write mapping: callers may mutate without touching the cache file
+            values = np.load(os.path.join(entry_dir, meta['file']), mmap_mode='c')
+            nulls = np.load(os.path.join(entry_dir, meta['nulls']), mmap_mode='r') if 'nulls' in meta else None
+            arrays[col] = (meta, values, nulls)
+        return manifest['rows'], arrays
+
+    @staticmethod
+    def _to_frame(arrays, rows=slice(None)):
+        data = {}
+        for col, (meta, values, nulls) in arrays.items():
+            values = values[rows]
+            if meta['kind'] == 'category':
+                data[col] = pd.Categorical.from_codes(values, categories=meta['categories'])
+            elif meta['kind'] == 'datetime':
+                data[col] = values.view('datetime64[ns]')
+            elif nulls is not None:
+                # Missing text was stored as '' next to a mask; bring the NaNs back
+                data[col] = pd.Series(values).mask(nulls[rows])
+            else:
+                data[col] = values
+        return pd.DataFrame(data, columns=list(arrays))
+
+    def read(self, source_path, columns=None):
+        """Reads the requested columns from the cache, memory-mapping each array."""
+        _, arrays = self._open_columns(source_path, columns)
+        return self._to_frame(arrays)
+
+    def iter_chunks(self, source_path, columns=None, chunksize=100_000):
+        """Yields row slices of the cached columns; only one slice is materialised at a time."""
+        n_rows, arrays = self._open_columns(source_path, columns)
+        for start in range(0, n_rows, chunksize):
+            yield self._to_frame(arrays, slice(start, start + chunksize))
+
+    def invalidate(self, source_path):
+        shutil.rmtree(self._entry_dir(source_path), ignore_errors=True)
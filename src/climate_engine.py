@@ -0,0 +1,313 @@
+"""
+Module: climate_engine.py
+Description: Multi-station climate engine (compact station x time arrays, resampling, climatology, anomalies, extreme events).
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.profiling import stage
+
+ARCHIVE_VERSION = 1
+# Variables summed (not averaged) when resampling
+SUM_VARIABLES = {'Rainfall_mm'}
+DAYS_IN_CLIMATOLOGY = 366
+
+
+class StationArchive:
+    """
+    Station x time matrices (float32, NaN = no observation), one per variable.
+    Rows are stations, so a block of stations is a contiguous slice.
+
+    Attributes:
+        times (pd.DatetimeIndex): Sorted time stamps (columns).
+        stations (pd.Index): Station ids (rows).
+        data (dict): {variable: float32 [n_stations, n_times]}, possibly memory-mapped.
+        path (str): Directory the archive was opened from (None if in memory).
+    """
+
+    def __init__(self, times, stations, data, path=None):
+        self.times = times
+        self.stations = stations
+        self.data = data
+        self.path = path
+
+    @classmethod
+    def from_long(cls, df, time_col='Date', station_col='Station', variables=None):
+        """
+        Scatters the long frame onto a regular time grid (step = smallest gap
+        between time stamps, e.g. hourly or daily) in one pass.
+        """
+        times = pd.DatetimeIndex(pd.to_datetime(df[time_col])).as_unit('ns')
+        uniq = times.unique().sort_values()
+        step = (uniq[1:] - uniq[:-1]).min() if len(uniq) > 1 else pd.Timedelta(days=1)
+        col_idx = ((times - uniq[0]) // step).to_numpy()
+        if station_col in df.columns:
+            row_idx, stations = pd.factorize(df[station_col], sort=True)
+        else:
+            # Single-station files (the shipped weather_data.csv) have no Station column
+            row_idx, stations = np.zeros(len(df), dtype=np.intp), pd.Index(['STATION'])
+        variables = variables or [c for c in df.columns
+                                  if c not in (time_col, station_col) and pd.api.types.is_numeric_dtype(df[c])]
+        shape = (len(stations), col_idx.max() + 1)
+        data = {}
+        for var in variables:
+            matrix = np.full(shape, np.nan, dtype=np.float32)
+            matrix[row_idx, col_idx] = df[var].to_numpy(dtype=np.float32)
+            data[var] = matrix
+        return cls(pd.date_range(uniq[0], periods=shape[1], freq=step), pd.Index(stations), data)
+
+    def select(self, start, stop):
+        """Stations [start, stop) (views, no copy)."""
+        data = {var: m[start:stop] for var, m in self.data.items()}
+        return StationArchive(self.times, self.stations[start:stop], data, self.path)
+
+    def save(self, path):
+        """Writes one .npy per variable plus meta.json; reopen with open()."""
+        os.makedirs(path, exist_ok=True)
+        for i, (var, matrix) in enumerate(self.data.items()):
+            np.save(os.path.join(path, f"{i:03d}.npy"), np.asarray(matrix, dtype=np.float32))
+        meta = {
+            'version': ARCHIVE_VERSION,
+            'variables': list(self.data),
+            'stations': [str(s) for s in self.stations],
+        }
+        np.save(os.path.join(path, 'times.npy'), self.times.to_numpy(dtype='datetime64[ns]'))
+        with open(os.path.join(path, 'meta.json'), 'w') as fh:
+            json.dump(meta, fh)
+
+    @classmethod
+    def open(cls, path, mmap_mode='r'):
+        """Memory-maps a saved archive; only the stations a caller touches are read."""
+        with open(os.path.join(path, 'meta.json')) as fh:
+            meta = json.load(fh)
+        if meta.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Archive {path} has version {meta.get('version')}, expected {ARCHIVE_VERSION}")
+        data = {var: np.load(os.path.join(path, f"{i:03d}.npy"), mmap_mode=mmap_mode)
+                for i, var in enumerate(meta['variables'])}
+        times = pd.DatetimeIndex(np.load(os.path.join(path, 'times.npy')))
+        return cls(times, pd.Index(meta['stations']), data, path)
+
+
+def resample(archive, rule, how=None):
+    """
+    Aggregates every station onto coarser time bins ('D' daily, 'MS'
+    monthly, ...) with one reduceat per variable. Bins with no observation
+    are NaN.
+
+    Args:
+        how (dict): {variable: 'mean' | 'sum' | 'max' | 'min'}; defaults to
+            'sum' for SUM_VARIABLES and 'mean' otherwise.
+    """
+    how = how or {}
+    labels = archive.times.floor('D') if rule == 'D' else archive.times.to_period(rule.rstrip('S')).to_timestamp()
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    data = {}
+    for var, matrix in archive.data.items():
+        x = np.asarray(matrix, dtype=np.float64)
+        valid = ~np.isnan(x)
+        count = np.add.reduceat(valid.astype(np.int32), starts, axis=1)
+        agg = how.get(var, 'sum' if var in SUM_VARIABLES else 'mean')
+        if agg in ('mean', 'sum'):
+            total = np.add.reduceat(np.where(valid, x, 0), starts, axis=1)
+            out = total / np.maximum(count, 1) if agg == 'mean' else total
+        elif agg == 'max':
+            out = np.fmax.reduceat(x, starts, axis=1)
+        elif agg == 'min':
+            out = np.fmin.reduceat(x, starts, axis=1)
+        else:
+            raise ValueError(f"Unknown aggregation {agg!r} for {var}")
+        data[var] = np.where(count > 0, out, np.nan).astype(np.float32)
+    return StationArchive(pd.DatetimeIndex(labels[starts]), archive.stations, data)
+
+
+def day_of_year(times):
+    """0-based day in a leap-year calendar, so 1 March is always day 60."""
+    return (times.dayofyear - 1 + ((~times.is_leap_year) & (times.month > 2))).to_numpy()
+
+
+def _circular_smooth(x, days):
+    """Centred moving sum over `days` along the last axis, wrapping around the year."""
+    half = days // 2
+    padded = np.concatenate([x[:, -half:], x, x[:, :half]], axis=1)
+    c = np.cumsum(np.pad(padded, ((0, 0), (1, 0))), axis=1)
+    return c[:, days:] - c[:, :-days]
+
+
+def climatology(daily, smooth_days=31, years=None):
+    """
+    Seasonal baseline per station and calendar day: mean and std over all
+    years (or the `years` (first, last) baseline period), pooled over a
+    centred `smooth_days` window.
+
+    Returns:
+        dict: {variable: (mean, std)}, each float64 [n_stations, 366].
+    """
+    doy = day_of_year(daily.times)
+    use = np.ones(len(doy), dtype=bool)
+    if years:
+        use = (daily.times.year >= years[0]) & (daily.times.year <= years[1])
+    n_stations = len(daily.stations)
+    flat = (np.arange(n_stations)[:, None] * DAYS_IN_CLIMATOLOGY + doy[use]).ravel()
+    out = {}
+    for var, matrix in daily.data.items():
+        x = np.asarray(matrix[:, use], dtype=np.float64).ravel()
+        valid = ~np.isnan(x)
+        x = np.where(valid, x, 0)
+        moments = [np.bincount(flat, weights=w, minlength=n_stations * DAYS_IN_CLIMATOLOGY)
+                   .reshape(n_stations, DAYS_IN_CLIMATOLOGY) for w in (valid.astype(float), x, x * x)]
+        n, s, ss = (_circular_smooth(m, smooth_days) for m in moments)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = s / n
+            std = np.sqrt(np.maximum(ss - s * mean, 0) / (n - 1))
+        out[var] = (mean, np.where(n > 1, std, np.nan))
+    return out
+
+
+def anomalies(daily, baseline):
+    """Departures from the climatology: {variable: (anomaly, z-score)}, float32 like the archive."""
+    doy = day_of_year(daily.times)
+    out = {}
+    for var, (mean, std) in baseline.items():
+        anomaly = np.asarray(daily.data[var], dtype=np.float64) - mean[:, doy]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = anomaly / std[:, doy]
+        out[var] = (anomaly.astype(np.float32), z.astype(np.float32))
+    return out
+
+
+def extreme_events(z, anomaly, times, stations, threshold=1.5, min_days=3, kind='heat'):
+    """
+    Runs of at least `min_days` consecutive days with z >= threshold
+    ('heat') or z <= -threshold ('cold'), found for all stations at once.
+
+    Returns:
+        pd.DataFrame: Station, Kind, Start, End, Days, Peak_Z, Mean_Anomaly.
+    """
+    sign = 1 if kind == 'heat' else -1
+    flags = np.nan_to_num(sign * z) >= threshold
+    # A zero column on each side closes runs at the array edges and keeps stations apart
+    edges = np.diff(np.pad(flags, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    lengths = ends - starts
+    keep = lengths >= min_days
+
+    peak = mean = np.empty(0)
+    if len(lengths):
+        # Flagged cells are contiguous per run in row-major order, so run i starts at offsets[i]
+        offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+        peak = np.maximum.reduceat(sign * z[flags], offsets)[keep] * sign
+        mean = (np.add.reduceat(anomaly[flags].astype(np.float64), offsets) / lengths)[keep]
+    rows, starts, lengths = rows[keep], starts[keep], lengths[keep]
+    return pd.DataFrame({
+        'Station': stations[rows],
+        'Kind': kind,
+        'Start': times[starts],
+        'End': times[starts + lengths - 1],
+        'Days': lengths,
+        'Peak_Z': peak,
+        'Mean_Anomaly': mean,
+    })
+
+
+def _analyze_block(source, start, stop, params):
+    """Per-station analysis for a block of stations (unit of work for the process pool)."""
+    archive = StationArchive.open(source) if isinstance(source, str) else source
+    archive = archive.select(start, stop)
+    times = archive.times
+    daily = resample(archive, 'D') if len(times) > 1 and times[1] - times[0] < pd.Timedelta(days=1) else archive
+    baseline = climatology(daily, params['smooth_days'], params['years'])
+    departures = anomalies(daily, baseline)
+    var = params['variable']
+    anomaly, z = departures[var]
+    events = pd.concat([extreme_events(z, anomaly, daily.times, daily.stations, params['threshold'],
+                                       params['min_days'], kind) for kind in ('heat', 'cold')], ignore_index=True)
+    return {'daily': daily, 'monthly': resample(daily, 'MS'), 'climatology': baseline,
+            'anomalies': departures, 'events': events}
+
+
+class ClimateEngine:
+    """
+    Resampling, climatology, anomalies and extreme events for every station.
+
+    Args:
+        variable (str): Variable scanned for extreme events.
+        threshold (float): |z| defining an extreme day (1.5 ~ the 93rd percentile).
+        min_days (int): Shortest run of extreme days counted as an event.
+        smooth_days (int): Width of the climatology smoothing window.
+        years (tuple): Baseline period (first, last year); None = all data.
+        workers (int): Processes for the per-station work (1 = in-process).
+        chunk_size (int): Stations per work unit when workers > 1.
+    """
+
+    def __init__(self, variable='Temp_C', threshold=1.5, min_days=3, smooth_days=31, years=None,
+                 workers=1, chunk_size=100):
+        self.params = {'variable': variable, 'threshold': threshold, 'min_days': min_days,
+                       'smooth_days': smooth_days, 'years': years}
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def analyze(self, archive):
+        """
+        Args:
+            archive (StationArchive): Hourly or daily observations. Workers
+                re-open memory-mapped archives from disk instead of receiving
+                the arrays.
+
+        Returns:
+            dict: 'daily' and 'monthly' (StationArchive), 'climatology'
+            ({var: (mean, std)} per station x calendar day), 'anomalies'
+            ({var: (anomaly, z)} station x day), 'events' (DataFrame) and
+            'summary' (one row per station).
+        """
+        n_stations = len(archive.stations)
+        rows = n_stations * len(archive.times)
+        with stage('ClimateEngine.analyze', rows=rows):
+            if self.workers > 1 and n_stations > self.chunk_size:
+                bounds = [(s, min(s + self.chunk_size, n_stations)) for s in range(0, n_stations, self.chunk_size)]
+                sources = [archive.path or archive.select(a, b) for a, b in bounds]
+                starts = [a if archive.path else 0 for a, _ in bounds]
+                stops = [b if archive.path else b - a for a, b in bounds]
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    parts = list(pool.map(_analyze_block, sources, starts, stops, [self.params] * len(bounds)))
+                result = self._combine(parts)
+            else:
+                result = _analyze_block(archive, 0, n_stations, self.params)
+            result['events'] = result['events'].sort_values(['Station', 'Start'], ignore_index=True)
+            result['summary'] = self._summary(result)
+        return result
+
+    @staticmethod
+    def _combine(parts):
+        stack = lambda archives: StationArchive(archives[0].times, archives[0].stations.append(
+            [a.stations for a in archives[1:]]), {v: np.vstack([a.data[v] for a in archives]) for v in archives[0].data})
+        pairs = lambda key: {v: tuple(np.vstack([p[key][v][i] for p in parts]) for i in range(2))
+                             for v in parts[0][key]}
+        return {
+            'daily': stack([p['daily'] for p in parts]),
+            'monthly': stack([p['monthly'] for p in parts]),
+            'climatology': pairs('climatology'),
+            'anomalies': pairs('anomalies'),
+            'events': pd.concat([p['events'] for p in parts], ignore_index=True),
+        }
+
+    def _summary(self, result):
+        var = self.params['variable']
+        daily = result['daily'].data[var]
+        _, z = result['anomalies'][var]
+        events = result['events']
+        count = lambda kind: events[events['Kind'] == kind].groupby('Station').size()
+        stations = result['daily'].stations
+        with np.errstate(invalid='ignore'):
+            extreme_days = (np.abs(z) >= self.params['threshold']).sum(axis=1)
+        return pd.DataFrame({
+            f'Mean_{var}': np.nanmean(daily, axis=1),
+            f'Max_{var}': np.nanmax(daily, axis=1),
+            'Extreme_Days': extreme_days,
+            'Heat_Events': count('heat').reindex(stations, fill_value=0).to_numpy(),
+            'Cold_Events': count('cold').reindex(stations, fill_value=0).to_numpy(),
+        }, index=stations)
@@ -2,61 +2,151 @@ import pandas as pd
 import numpy as np
 import os
 
+from src.cache import ColumnarCache
+from src.profiling import stage
+from src.synthetic import make_retail_sales, make_students, make_healthcare, make_finance, make_weather, make_houses
+
+# Declared per-file schemas: low-cardinality text as categoricals, dates parsed once
+DATE = 'datetime64[ns]'
+SCHEMAS = {
+    'supermarket_sales.csv': {
+        'Branch': 'category', 'City': 'category', 'Customer_Type': 'category',
+        'Gender': 'category', 'Product_Line': 'category', 'Payment': 'category',
+        'Date': DATE,
+    },
+    'student_performance.csv': {'School': 'category', 'Gender': 'category', 'Method': 'category'},
+    'healthcare_covid.csv': {'Date': DATE, 'Region': 'category'},
+    'finance_stocks.csv': {'Date': DATE, 'Ticker': 'category'},
+    'weather_data.csv': {'Date': DATE, 'Station': 'category'},
+    'house_prices.csv': {'Location': 'category', 'Property_Type': 'category'},
+}
+
 class DataLoader:
-    def __init__(self, raw_data_dir='data/raw'):
+    def __init__(self, raw_data_dir='data/raw', cache_dir=None):
         self.raw_dir = raw_data_dir
         os.makedirs(self.raw_dir, exist_ok=True)
+        # The cache lives next to the raw folder (data/raw -> data/cache)
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.normpath(self.raw_dir)), 'cache')
+        self.cache = ColumnarCache(cache_dir)
+        self.store_dir = os.path.join(os.path.dirname(os.path.normpath(self.raw_dir)), 'store')
 
-    def load_csv(self, filename):
+    def load_csv(self, filename, columns=None, use_cache=True, schema=None):
+        """
+        Loads a raw CSV through the typed columnar cache.
+
+        Args:
+            filename (str): File name inside the raw data folder; a glob pattern
+                or a directory is read with load_dataset().
+            columns (list, optional): Subset of columns to return.
+            use_cache (bool): Set False to force a plain text parse.
+            schema (dict or str, optional): Declared dtypes for a glob / directory
+                (see load_dataset); single files use their SCHEMAS entry.
+        """
         path = os.path.join(self.raw_dir, filename)
+        if any(c in filename for c in '*?[') or os.path.isdir(path):
+            return self.load_dataset(filename, columns=columns, schema=schema)
         if not os.path.exists(path):
             raise FileNotFoundError(f"File {filename} not found.")
-        print(f"   [Data] Loaded {filename}")
-        return pd.read_csv(path)
 
-    def generate_synthetic_data(self):
-        """Generates detailed datasets for Projects 2-5."""
+        schema = SCHEMAS.get(filename, {})
+        with stage(f"load_csv:{filename}") as rec:
+            if not use_cache:
+                df = pd.read_csv(path, usecols=columns)
+                source = ""
+            elif self.cache.is_valid(path, schema):
+                df = self.cache.read(path, columns)
+                source = " (cached)"
+            else:
+                self.cache.build(path, schema)
+                df = self.cache.read(path, columns)
+                source = " (cache rebuilt)"
+            rec['rows'] = len(df)
+        print(f"   [Data] Loaded {filename}{source}")
+        return df
+
+    def load_dataset(self, source, filters=None, columns=None, schema=None, workers=None):
+        """
+        Loads a dataset split over many CSV files: a glob pattern or a Hive-style
+        directory (e.g. sales/branch=A/date=2024-01-01/*.csv) inside the raw folder.
+        Files are parsed in parallel; see src/partitions.py.
+
+        Args:
+            source (str): Pattern or directory, relative to the raw data folder.
+            filters (dict, optional): {column: value | [values] | (low, high)};
+                filters on partition keys skip whole files.
+            columns (list, optional): Subset of columns to return.
+            schema (dict or str, optional): Declared dtypes, or the file name of a
+                SCHEMAS entry (e.g. 'supermarket_sales.csv').
+            workers (int, optional): Parser processes (1 = inline).
+        """
+        from src.partitions import read_partitioned
+        if isinstance(schema, str):
+            schema = SCHEMAS[schema]
+        df, n_files, pruned = read_partitioned(os.path.join(self.raw_dir, source), filters, columns, schema, workers)
+        print(f"   [Data] Loaded {source}: {len(df):,} rows from {n_files:,} files ({pruned:,} pruned)")
+        return df
+
+    def iter_chunks(self, filename, chunksize=100_000, columns=None):
+        """
+        Streams a raw CSV as DataFrames of at most `chunksize` rows.
+
+        Reads slices of the columnar cache when it is valid, otherwise parses
+        the text file chunk by chunk (the cache is not built here, since that
+        would require the whole file in memory).
+        """
+        path = os.path.join(self.raw_dir, filename)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File {filename} not found.")
+
+        schema = SCHEMAS.get(filename, {})
+        print(f"   [Data] Streaming {filename} in chunks of {chunksize:,} rows")
+        if self.cache.is_valid(path, schema):
+            yield from self.cache.iter_chunks(path, columns, chunksize)
+            return
+
+        dtypes = {c: t for c, t in schema.items() if t != DATE and (columns is None or c in columns)}
+        dates = [c for c, t in schema.items() if t == DATE and (columns is None or c in columns)]
+        reader = pd.read_csv(path, usecols=columns, dtype=dtypes, parse_dates=dates, chunksize=chunksize)
+        with reader:
+            yield from reader
+
+    def store(self, filename):
+        """
+        The indexed SQLite store for a dataset (data/raw -> data/store/<stem>.sqlite).
+        Fill it with store.ingest(self.iter_chunks(filename)) and append new
+        batches with store.upsert(df); see src/store.py.
+        """
+        from src.store import DatasetStore
+        stem = os.path.splitext(filename)[0]
+        return DatasetStore(os.path.join(self.store_dir, f"{stem}.sqlite"), filename)
+
+    def generate_synthetic_data(self, n_students=500, n_health_days=120, n_stock_days=100,
+                                n_weather_days=365, n_sales=2000, n_regions=1, n_tickers=1,
+                                n_stations=1, n_branches=3, n_schools=1, n_houses=300, seed=None, overwrite=False):
+        """
+        Generates detailed datasets for Projects 1-6 (only files that are missing,
+        unless `overwrite`). Defaults reproduce the shipped dataset sizes.
+
+        Args:
+            n_* (int): Rows per entity (days for the time series datasets).
+            n_regions / n_tickers / n_stations / n_branches (int): Entity counts;
+                above 1 the time series gain a Region/Ticker/Station column.
+            n_schools (int): Above 1 students gain School and Grade columns.
+            n_houses (int): Listings in house_prices.csv.
+            seed (int, optional): Seed for reproducible data.
+        """
         print("   [Setup] Generating Rich Synthetic Data for Multi-Domain Analysis...")
-        
-        # 2. Education: Added Gender and Study Method
-        if not os.path.exists(f"{self.raw_dir}/student_performance.csv"):
-            n = 500
-            df = pd.DataFrame({
-                'Student_ID': range(n),
-                'Study_Hours': np.random.normal(5, 2, n).clip(1, 10),
-                'Attendance': np.random.randint(60, 100, n),
-                'Gender': np.random.choice(['Male', 'Female'], n),
-                'Method': np.random.choice(['Self-Study', 'Group', 'Online'], n)
-            })
-            # Score depends on hours + noise
-            df['Score'] = (40 + 4 * df['Study_Hours'] + np.random.normal(0, 5, n)).clip(0, 100)
-            df.to_csv(f"{self.raw_dir}/student_performance.csv", index=False)
-
-        # 3. Healthcare: Added Deaths and Testing numbers
-        if not os.path.exists(f"{self.raw_dir}/healthcare_covid.csv"):
-            dates = pd.date_range('2024-01-01', periods=120)
-            df = pd.DataFrame({'Date': dates})
-            # Epidemic Curve
-            x = np.linspace(0, np.pi, 120)
-            df['New_Cases'] = (1000 + 2000 * np.sin(x) + np.random.normal(0, 50, 120)).astype(int)
-            df['Recovered'] = df['New_Cases'].shift(10).fillna(0) * 0.90
-            df['Deaths'] = df['New_Cases'].shift(14).fillna(0) * 0.02
-            df.to_csv(f"{self.raw_dir}/healthcare_covid.csv", index=False)
-
-        # 4. Finance: Added Volume and Sector
-        if not os.path.exists(f"{self.raw_dir}/finance_stocks.csv"):
-            dates = pd.date_range('2024-01-01', periods=100)
-            df = pd.DataFrame({'Date': dates})
-            # Random Walk
-            df['Close_Price'] = np.cumsum(np.random.randn(100)) + 150
-            df['Volume'] = np.random.randint(1000, 5000, 100)
-            df.to_csv(f"{self.raw_dir}/finance_stocks.csv", index=False)
-
-        # 5. Weather: Added Humidity and Rainfall
-        if not os.path.exists(f"{self.raw_dir}/weather_data.csv"):
-            dates = pd.date_range('2024-01-01', periods=365)
-            df = pd.DataFrame({'Date': dates})
-            df['Temp_C'] = 20 + 15 * np.sin(np.linspace(0, 2*np.pi, 365)) + np.random.normal(0, 2, 365)
-            df['Rainfall_mm'] = np.where(np.random.rand(365) > 0.8, np.random.exponential(5, 365), 0)
-            df['Humidity'] = 50 + 20 * np.sin(np.linspace(0, 2*np.pi, 365)) + np.random.normal(0, 5, 365)
-            df.to_csv(f"{self.raw_dir}/weather_data.csv", index=False)
\ No newline at end of file
+        rng = np.random.default_rng(seed)
+        generators = {
+            'supermarket_sales.csv': lambda: make_retail_sales(n_sales, n_branches, rng),
+            'student_performance.csv': lambda: make_students(n_students, rng, n_schools),
+            'healthcare_covid.csv': lambda: make_healthcare(n_health_days, n_regions, rng),
+            'finance_stocks.csv': lambda: make_finance(n_stock_days, n_tickers, rng),
+            'weather_data.csv': lambda: make_weather(n_weather_days, n_stations, rng),
+            'house_prices.csv': lambda: make_houses(n_houses, rng),
+        }
+        for filename, make in generators.items():
+            path = os.path.join(self.raw_dir, filename)
+            if overwrite or not os.path.exists(path):
+                make().to_csv(path, index=False)
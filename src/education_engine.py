@@ -0,0 +1,235 @@
+"""
+Module: education_engine.py
+Description: Student cohort cube: integer-coded dimensions, grouped means/variances/correlations from one sparse pass, cached on disk.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.cache import file_fingerprint
+from src.profiling import stage
+from src.streaming import RunningMoments
+
+CUBE_VERSION = 1
+DIMENSIONS = ['School', 'Grade', 'Method', 'Gender']
+MEASURES = ['Score', 'Study_Hours', 'Attendance']
+# Up to this many possible cells the flat cell index is used directly (no sort)
+DENSE_CELLS = 4_000_000
+
+
+def _aggregate(ids, n_groups, weights):
+    """Sums the rows of `weights` per id with one sparse (groups x rows) product."""
+    onehot = sparse.csr_matrix((np.ones(len(ids)), (ids, np.arange(len(ids)))), shape=(n_groups, len(ids)))
+    return np.asarray(onehot @ weights)
+
+
+def _compact(flat, n_possible):
+    """Maps flat cell indices to dense ids 0..k-1; returns (observed cells, ids)."""
+    if n_possible <= DENSE_CELLS:
+        present = np.bincount(flat, minlength=n_possible) > 0
+        cells = np.flatnonzero(present)
+        lookup = np.cumsum(present) - 1
+        return cells, lookup[flat]
+    return np.unique(flat, return_inverse=True)
+
+
+class StudentCube:
+    """
+    Sufficient statistics per observed combination of dimension levels:
+    row count, sum of each measure and sum of each pairwise product. Any
+    grouping over a subset of the dimensions (with filters) is rolled up
+    from these cells, never from the rows.
+
+    Measures are stored shifted by their overall mean, which keeps the
+    sums of products well conditioned for millions of rows.
+
+    Attributes:
+        dimensions (list): Dimension names, in cell-code order.
+        levels (dict): {dimension: pd.Index of levels}; codes index into these.
+        measures (list): Measure names.
+        cells (np.ndarray): int [n_cells, n_dims] level codes of each observed cell.
+        stats (np.ndarray): float64 [n_cells, 1 + m + m(m+1)/2].
+        shift (np.ndarray): Per-measure shift applied before summing.
+    """
+
+    def __init__(self, dimensions, levels, measures, cells, stats, shift):
+        self.dimensions = list(dimensions)
+        self.levels = levels
+        self.measures = list(measures)
+        self.cells = cells
+        self.stats = stats
+        self.shift = shift
+        m = len(self.measures)
+        self.pairs = [(i, j) for i in range(m) for j in range(i, m)]
+
+    @classmethod
+    def from_frame(cls, df, dimensions=None, measures=MEASURES, chunk_size=1_000_000):
+        """
+        Builds the cube in one pass over the rows (in chunks, to bound the
+        size of the product matrix). Rows with a missing dimension or
+        measure are left out.
+        """
+        dimensions = [d for d in (dimensions or DIMENSIONS) if d in df.columns]
+        with stage('StudentCube.from_frame', rows=len(df)):
+            codes, levels = [], {}
+            for dim in dimensions:
+                col = df[dim]
+                if isinstance(col.dtype, pd.CategoricalDtype):
+                    c, lv = col.cat.codes.to_numpy(), col.cat.categories
+                else:
+                    c, lv = pd.factorize(col, sort=True)
+                codes.append(c)
+                levels[dim] = pd.Index(lv)
+            values = df[list(measures)].to_numpy(dtype=float)
+            keep = np.isfinite(values).all(axis=1)
+            for c in codes:
+                keep &= c >= 0
+            values = values[keep]
+            sizes = [len(levels[d]) for d in dimensions]
+            flat = np.ravel_multi_index([c[keep] for c in codes], sizes) if dimensions else np.zeros(len(values), int)
+            cells, ids = _compact(flat, int(np.prod(sizes)))
+
+            shift = values.mean(axis=0) if len(values) else np.zeros(len(measures))
+            cube = cls(dimensions, levels, measures, None, None, shift)
+            stats = np.zeros((len(cells), cube.width))
+            for start in range(0, len(values), chunk_size):
+                part = slice(start, start + chunk_size)
+                stats += _aggregate(ids[part], len(cells), cube._weights(values[part]))
+            cube.cells = np.column_stack(np.unravel_index(cells, sizes)) if dimensions else np.zeros((len(cells), 0), int)
+            cube.stats = stats
+        return cube
+
+    @property
+    def width(self):
+        return 1 + len(self.measures) + len(self.pairs)
+
+    def _weights(self, values):
+        m = len(self.measures)
+        w = np.empty((len(values), self.width))
+        w[:, 0] = 1
+        x = w[:, 1:1 + m]
+        np.subtract(values, self.shift, out=x)
+        for k, (i, j) in enumerate(self.pairs):
+            np.multiply(x[:, i], x[:, j], out=w[:, 1 + m + k])
+        return w
+
+    # --- Queries ---
+    def rollup(self, by=(), where=None):
+        """
+        Sums the cells up to the `by` dimensions, after keeping only cells
+        matching `where` ({dimension: level or list of levels}).
+
+        Returns:
+            tuple: (pd.MultiIndex / Index of group keys, float64 [n_groups, width]).
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, wanted in (where or {}).items():
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            codes = self.levels[dim].get_indexer(list(wanted))
+            mask &= np.isin(self.cells[:, self.dimensions.index(dim)], codes[codes >= 0])
+        cells, stats = self.cells[mask], self.stats[mask]
+        if not by:
+            return pd.Index(['All']), stats.sum(axis=0, keepdims=True)
+        cols = [self.dimensions.index(d) for d in by]
+        sizes = [len(self.levels[d]) for d in by]
+        groups, ids = _compact(np.ravel_multi_index(cells[:, cols].T, sizes), int(np.prod(sizes)))
+        totals = _aggregate(ids, len(groups), stats)
+        keys = np.unravel_index(groups, sizes)
+        arrays = [self.levels[d][k] for d, k in zip(by, keys)]
+        index = pd.MultiIndex.from_arrays(arrays, names=by) if len(by) > 1 else pd.Index(arrays[0], name=by[0])
+        return index, totals
+
+    def _moments(self, totals):
+        """n, means [g, m] and the covariance matrices [g, m, m] of rolled-up totals."""
+        m = len(self.measures)
+        n = totals[:, 0]
+        s = totals[:, 1:1 + m]
+        cross = np.empty((len(totals), m, m))
+        for k, (i, j) in enumerate(self.pairs):
+            cross[:, i, j] = cross[:, j, i] = totals[:, 1 + m + k]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = (cross - s[:, :, None] * s[:, None, :] / n[:, None, None]) / (n - 1)[:, None, None]
+            means = s / n[:, None] + self.shift
+        cov[n < 2] = np.nan
+        return n, means, cov
+
+    def group_stats(self, by=(), where=None):
+        """One row per group: n, <measure>_mean and <measure>_var (ddof=1) for every measure."""
+        index, totals = self.rollup(by, where)
+        n, means, cov = self._moments(totals)
+        out = {'n': n.astype(np.int64)}
+        for i, name in enumerate(self.measures):
+            out[f'{name}_mean'] = means[:, i]
+            out[f'{name}_var'] = cov[:, i, i]
+        return pd.DataFrame(out, index=index)
+
+    def correlation(self, x, y, by=(), where=None):
+        """Pearson correlation of two measures within each group."""
+        index, totals = self.rollup(by, where)
+        _, _, cov = self._moments(totals)
+        i, j = self.measures.index(x), self.measures.index(y)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = cov[:, i, j] / np.sqrt(cov[:, i, i] * cov[:, j, j])
+        return pd.Series(r, index=index, name=f'corr({x}, {y})')
+
+    def corr_matrix(self, where=None):
+        """Correlation matrix of all measures (like DataFrame.corr()) over the filtered rows."""
+        _, totals = self.rollup((), where)
+        _, _, cov = self._moments(totals)
+        sd = np.sqrt(np.diag(cov[0]))
+        return pd.DataFrame(cov[0] / np.outer(sd, sd), index=self.measures, columns=self.measures)
+
+    def moments(self, measure, by, where=None):
+        """{level: RunningMoments} of one measure per group (e.g. for resampling.normal_ci)."""
+        index, totals = self.rollup(by, where)
+        n, means, cov = self._moments(totals)
+        i = self.measures.index(measure)
+        return {key: RunningMoments(int(n[g]), float(means[g, i]), float(cov[g, i, i] * (n[g] - 1)))
+                for g, key in enumerate(index)}
+
+    # --- Persistence ---
+    def save(self, path):
+        meta = {
+            'version': CUBE_VERSION,
+            'dimensions': self.dimensions,
+            'measures': self.measures,
+            'levels': {d: lv.tolist() for d, lv in self.levels.items()},
+        }
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, cells=self.cells, stats=self.stats, shift=self.shift, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            meta = json.loads(str(z['meta']))
+            if meta['version'] != CUBE_VERSION:
+                raise ValueError(f"Cube {path} has version {meta['version']}, expected {CUBE_VERSION}")
+            levels = {d: pd.Index(lv) for d, lv in meta['levels'].items()}
+            return cls(meta['dimensions'], levels, meta['measures'], z['cells'], z['stats'], z['shift'])
+
+
+def cached_cube(source_path, load, cache_dir='data/cache/cubes', dimensions=None, measures=MEASURES):
+    """
+    Returns (cube, from_cache). The cube is keyed by the source file's
+    content, dimensions and measures; `load` (returning the DataFrame) is
+    only called when it has to be built.
+    """
+    key = hashlib.blake2b(digest_size=8)
+    key.update(f"{CUBE_VERSION}|{file_fingerprint(source_path)}|{dimensions or DIMENSIONS}|{measures}".encode())
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    path = os.path.join(cache_dir, f"{stem}-{key.hexdigest()}.npz")
+    if os.path.exists(path):
+        try:
+            return StudentCube.load(path), True
+        except (OSError, ValueError, KeyError):
+            pass
+    cube = StudentCube.from_frame(load(), dimensions, measures)
+    os.makedirs(cache_dir, exist_ok=True)
+    cube.save(path)
+    return cube, False
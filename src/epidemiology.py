@@ -0,0 +1,231 @@
+"""
+Module: epidemiology.py
+Description: Vectorised multi-region epidemic engine (7-day averages, growth, doubling time, Rt, lagged CFR) with incremental append.
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.finance_engine import rolling_sum
+from src.profiling import stage
+
+COUNT_COLUMNS = ('New_Cases', 'Recovered', 'Deaths')
+# Outcome delays after case report (same lags as make_healthcare / generate_synthetic_data)
+OUTCOME_LAGS = {'Recovered': 10, 'Deaths': 14}
+# COVID-19 serial interval, gamma with mean 4.7 / sd 2.9 days (Nishiura et al., 2020)
+SERIAL_INTERVAL = (4.7, 2.9)
+
+
+class EpiPanel:
+    """
+    Wide (date x region) count matrices built from a long-format frame.
+    Rows are consecutive calendar days; a region with no report on a day
+    holds NaN, which the rolling sums count as zero.
+
+    Attributes:
+        dates (pd.DatetimeIndex): Consecutive days (rows).
+        regions (pd.Index): Regions (columns).
+        counts (dict): {column: float64 [n_dates, n_regions]} for COUNT_COLUMNS.
+    """
+
+    def __init__(self, dates, regions, counts):
+        self.dates = dates
+        self.regions = regions
+        self.counts = counts
+
+    @classmethod
+    def from_long(cls, df, date_col='Date', region_col='Region'):
+        """Scatters the long frame into matrices in one pass (no per-region loop)."""
+        dates = pd.DatetimeIndex(pd.to_datetime(df[date_col])).normalize()
+        start = dates.min()
+        row_idx = ((dates - start) // pd.Timedelta(days=1)).to_numpy()
+        if region_col in df.columns:
+            col_idx, regions = pd.factorize(df[region_col], sort=True)
+        else:
+            # Single-series files (the shipped healthcare_covid.csv) have no Region column
+            col_idx, regions = np.zeros(len(df), dtype=np.intp), pd.Index(['ALL'])
+        shape = (row_idx.max() + 1, len(regions))
+        counts = {}
+        for col in COUNT_COLUMNS:
+            matrix = np.full(shape, np.nan)
+            matrix[row_idx, col_idx] = df[col].to_numpy(dtype=float)
+            counts[col] = matrix
+        return cls(pd.date_range(start, periods=shape[0]), pd.Index(regions), counts)
+
+    def total(self, name='ALL'):
+        """Single-column panel with the sum over all regions."""
+        counts = {col: np.nansum(m, axis=1, keepdims=True) for col, m in self.counts.items()}
+        return EpiPanel(self.dates, pd.Index([name]), counts)
+
+
+def serial_interval_weights(mean, sd, max_days):
+    """Discretised gamma serial interval w[k-1] = P(interval ~ k days), k = 1..max_days."""
+    dist = stats.gamma((mean / sd) ** 2, scale=sd ** 2 / mean)
+    edges = np.concatenate([[0], np.arange(1, max_days + 1) + 0.5])
+    w = np.diff(dist.cdf(edges))
+    return w / w.sum()
+
+
+def infection_pressure(cases, weights):
+    """Lambda_t = sum_k w_k * I_{t-k}: expected new cases from recent ones at R = 1."""
+    cases = np.nan_to_num(cases)
+    lam = np.zeros(cases.shape)
+    for k, w in enumerate(weights, 1):
+        lam[k:] += w * cases[:-k]
+    return lam
+
+
+def _lagged(x, lag):
+    out = np.full(x.shape, np.nan)
+    if lag < len(x):
+        out[lag:] = x[:len(x) - lag]
+    return out
+
+
+def _ratio(num, den):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / den, np.nan)
+
+
+class EpiEngine:
+    """
+    Epidemic metrics for every region at once.
+
+    compute() processes a whole panel; append() then extends it with later
+    days using only a short tail of retained history (`lookback` days plus
+    running totals), so daily updates cost O(new days), not O(history).
+
+    Args:
+        window (int): Rolling window (days) for averages, growth, Rt and CFR.
+        lags (dict): Outcome delay in days per outcome column.
+        serial_interval (tuple): (mean, sd) of the gamma serial interval.
+        max_interval (int): Longest serial interval considered (days).
+        prior (tuple): Gamma prior (shape, scale) on Rt (EpiEstim defaults).
+    """
+
+    def __init__(self, window=7, lags=None, serial_interval=SERIAL_INTERVAL, max_interval=20, prior=(1, 5)):
+        self.window = window
+        self.lags = dict(lags or OUTCOME_LAGS)
+        self.weights = serial_interval_weights(*serial_interval, max_interval)
+        self.prior = prior
+        # Oldest row any metric reads, relative to the row being computed
+        self.lookback = max(2 * window, window + max_interval, window + max(self.lags.values()))
+        self._state = None
+
+    def _metrics(self, counts, offsets):
+        """
+        All metrics for the rows of `counts`. `offsets` are the cumulative
+        totals before its first row; results are exact for rows at least
+        `lookback` from the start (or for every row when it starts at day 0).
+        """
+        w = self.window
+        n = len(counts['New_Cases'])
+        early = np.arange(n)[:, None]
+        sums = {}
+        for col, m in counts.items():
+            s = rolling_sum(m, w)
+            s[:w - 1] = np.nan
+            sums[col] = s
+        cases = sums['New_Cases']
+
+        prev = _lagged(cases, w)
+        growth = _ratio(cases, prev) - 1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            doubling = np.where(growth > 0, w * np.log(2) / np.log1p(growth), np.nan)
+
+        # Cori et al. (2013): posterior mean of Rt over the trailing window
+        pressure = rolling_sum(infection_pressure(counts['New_Cases'], self.weights), w)
+        shape, scale = self.prior
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rt = (shape + cases) / (1 / scale + pressure)
+        rt = np.where((early >= w) & (pressure > 0), rt, np.nan)
+
+        cumulative = {col: offsets[col] + np.cumsum(np.nan_to_num(m), axis=0) for col, m in counts.items()}
+        out = {
+            'cases_7d': cases / w,
+            'deaths_7d': sums['Deaths'] / w,
+            'recovered_7d': sums['Recovered'] / w,
+            'growth': growth,
+            'doubling_time': doubling,
+            'rt': rt,
+            'cfr': _ratio(sums['Deaths'], _lagged(cases, self.lags['Deaths'])),
+            'cfr_cumulative': _ratio(cumulative['Deaths'], _lagged(cumulative['New_Cases'], self.lags['Deaths'])),
+            'recovery_ratio': _ratio(sums['Recovered'], _lagged(cases, self.lags['Recovered'])),
+        }
+        return out, cumulative
+
+    def _frames(self, metrics, cumulative, dates, regions, start):
+        frame = lambda m: pd.DataFrame(m[start:], index=dates, columns=regions)
+        result = {k: frame(v) for k, v in metrics.items()}
+        last = lambda k: metrics[k][-1]
+        result['summary'] = pd.DataFrame({
+            'Total_Cases': cumulative['New_Cases'][-1],
+            'Total_Deaths': cumulative['Deaths'][-1],
+            'Cases_7d_Avg': last('cases_7d'),
+            'Growth_7d_%': last('growth') * 100,
+            'Doubling_Days': last('doubling_time'),
+            'Rt': last('rt'),
+            'CFR_%': last('cfr_cumulative') * 100,
+            'Recovery_%': last('recovery_ratio') * 100,
+        }, index=regions)
+        return result
+
+    def _keep(self, counts, cumulative, dates, offsets):
+        """Retains the last `lookback` days and the totals before them."""
+        drop = max(len(dates) - self.lookback, 0)
+        self._state = {
+            'counts': {col: m[drop:].copy() for col, m in counts.items()},
+            'offsets': {col: cumulative[col][drop - 1] if drop else offsets[col] for col in counts},
+            'last_date': dates[-1],
+        }
+
+    def compute(self, panel):
+        """
+        Returns:
+            dict: 'cases_7d', 'deaths_7d', 'recovered_7d', 'growth' (week over
+            week), 'doubling_time' (days, NaN unless growing), 'rt',
+            'cfr' (7-day deaths / 7-day cases `lag` days earlier),
+            'cfr_cumulative', 'recovery_ratio' (date x region DataFrames) and
+            'summary' (one row per region, latest day).
+        """
+        self.regions = panel.regions
+        offsets = {col: np.zeros(len(panel.regions)) for col in COUNT_COLUMNS}
+        with stage('EpiEngine.compute', rows=panel.counts['New_Cases'].size):
+            metrics, cumulative = self._metrics(panel.counts, offsets)
+            self._keep(panel.counts, cumulative, panel.dates, offsets)
+            return self._frames(metrics, cumulative, panel.dates, panel.regions, 0)
+
+    def append(self, panel):
+        """
+        Extends the last compute()/append() with the days in `panel`, which
+        must start after the last day seen. Days skipped in between count
+        as unreported; regions missing from `panel` are unreported too.
+
+        Returns:
+            dict: Same layout as compute(), for the new days only.
+        """
+        if self._state is None:
+            raise RuntimeError("append() needs a previous compute()")
+        unknown = panel.regions.difference(self.regions)
+        if len(unknown):
+            raise ValueError(f"Unknown regions in append: {list(unknown[:5])}")
+        gap = (panel.dates[0] - self._state['last_date']).days - 1
+        if gap < 0:
+            raise ValueError(f"append() starts on {panel.dates[0].date()}, "
+                             f"not after {self._state['last_date'].date()}")
+
+        dates = pd.date_range(self._state['last_date'] + pd.Timedelta(days=1), panel.dates[-1])
+        cols = self.regions.get_indexer(panel.regions)
+        tail = self._state['counts']
+        counts = {}
+        for col in COUNT_COLUMNS:
+            new = np.full((len(dates), len(self.regions)), np.nan)
+            new[gap:, cols] = panel.counts[col]
+            counts[col] = np.vstack([tail[col], new])
+        start = len(tail['New_Cases'])
+        offsets = self._state['offsets']
+        with stage('EpiEngine.append', rows=len(dates) * len(self.regions)):
+            metrics, cumulative = self._metrics(counts, offsets)
+            full_dates = pd.date_range(dates[-1] - pd.Timedelta(days=len(counts['New_Cases']) - 1), dates[-1])
+            self._keep(counts, cumulative, full_dates, offsets)
+            return self._frames(metrics, cumulative, dates, self.regions, start)
@@ -1,140 +1,362 @@
 """
 Module: extended_projects.py
-Description: Advanced analysis for Education, Healthcare, Finance, and Weather.
+Description: Advanced analysis for Education, Healthcare, Finance, Weather, and Real Estate.
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
+import os
+import time
+
 import pandas as pd
 import numpy as np
-import os
+
+from src.rendering import FigureRenderer
+from src.resampling import group_ci, group_permutation_test, MAX_RESAMPLE_ROWS
+
+# Fixed fine bins of the return histogram in sketch mode (daily %, outliers counted separately);
+# the plot crops them to the occupied span and merges them into about 30 bars
+RETURN_RANGE = (-10.0, 10.0)
+RETURN_BINS = 400
 
 class ExtendedProjectEngine:
-    def __init__(self, loader, output_dir='reports/figures'):
+    """
+    Projects 2-6. Each deep dive imports its own engine, and seaborn /
+    matplotlib are only imported when plots are drawn, so running one
+    project (or only the insights, plots=False) skips the other libraries.
+
+    With sketch=True the distribution metrics (return volatility, quantiles
+    and histogram, peak temperature) are approximated with mergeable sketches
+    (src/sketches.py) built over the loaded columns. The deep-dive engines
+    still need the full frames, so this does not lower peak memory; the
+    out-of-core path is Project 1's --stream (or sketches.sketch_dataset).
+    `workers` caps the processes a parallel stage may start (None = CPU count).
+    """
+
+    def __init__(self, loader, output_dir='reports/figures', target='print', plots=True, sketch=False, workers=None):
         self.loader = loader
+        self.workers = workers
         self.output_dir = output_dir
-        # Standardize Plot Sizing
-        plt.rcParams['figure.figsize'] = (10, 6)
-        sns.set_theme(style="whitegrid")
+        self.plots = plots
+        self.sketch = sketch
+        self.renderer = FigureRenderer(output_dir, target, figsize=(10, 6))
+        if plots:
+            import matplotlib as mpl
+            import seaborn as sns
+
+            # Standardize Plot Sizing
+            mpl.rcParams['figure.figsize'] = (10, 6)
+            sns.set_theme(style="whitegrid")
+            self.sns = sns
+
+    def _column(self, values, **options):
+        """
+        The Series itself, or in sketch mode a ColumnSketch built from it
+        chunk by chunk (the Series is already in memory); both answer
+        mean() / std() / max() / quantile(), so the deep dives use either.
+        """
+        if not self.sketch:
+            return values
+        from src.sketches import ColumnSketch, sketch_values
+        return sketch_values(values, ColumnSketch(**options))
 
-    def _save(self, filename):
-        path = os.path.join(self.output_dir, filename)
-        plt.tight_layout()
-        plt.savefig(path, dpi=300)
-        plt.close()
-        print(f"   [Viz] Generated: {filename}")
+    def _save(self, fig, filename):
+        elapsed = self.renderer.save(fig, filename)
+        print(f"   [Viz] Generated: {self.renderer.target.filename(filename)} ({elapsed:.2f}s)")
 
     # --- PROJECT 2: EDUCATION ---
     def run_education_deep_dive(self):
+        from src.education_engine import cached_cube
+
         print("\n🎓 STARTING PROJECT 2: EDUCATION ANALYTICS...")
         df = self.loader.load_csv('student_performance.csv')
-        
+
+        # Grouped moments for every dimension combination, cached next to the columnar cache
+        cube, cached = cached_cube(os.path.join(self.loader.raw_dir, 'student_performance.csv'), lambda: df,
+                                   os.path.join(self.loader.cache.cache_dir, 'cubes'))
+        print(f"   [Data] Student cube: {len(cube.cells):,} cells over {', '.join(cube.dimensions)}"
+              f"{' (cached)' if cached else ''}")
+
         # Insight 1: Correlation
-        corr = df[['Study_Hours', 'Attendance', 'Score']].corr().loc['Study_Hours', 'Score']
+        corr = cube.correlation('Study_Hours', 'Score').iloc[0]
         print(f"   [Insight] Correlation (Study Hours vs Score): {corr:.2f}")
 
+        # Insight 2: Study Method effect (resampling, no normality assumption)
+        # Groups above MAX_RESAMPLE_ROWS are resampled in fixed-size draws (see resampling.group_ci)
+        groups = {method: g['Score'].to_numpy() for method, g in df.groupby('Method', observed=True)}
+        method_ci = group_ci(groups, workers=self.workers)
+        perm = group_permutation_test(df['Score'], df['Method'], workers=self.workers)
+        print(f"   [Insight] Study Method effect: permutation p = {perm['p_value']:.4f}")
+
+        # Insight 3: Spread between schools
+        if 'School' in cube.dimensions:
+            schools = cube.group_stats('School')['Score_mean']
+            print(f"   [Insight] Schools: {len(schools)} | Mean Score range: {schools.min():.1f} - {schools.max():.1f}")
+
+        if not self.plots:
+            return
+
         # Viz 1: Scatter Plot with Regression
-        plt.figure()
-        sns.regplot(data=df, x='Study_Hours', y='Score', line_kws={"color": "red"})
-        plt.title('Impact of Study Hours on Exam Performance')
-        self._save('02_edu_regression.png')
+        # The bootstrapped confidence band is skipped for fast (preview) targets; large cohorts
+        # get a binned scatter with the least-squares line from the cube
+        fig, ax = self.renderer.new_figure()
+        if len(df) <= MAX_RESAMPLE_ROWS:
+            ci = None if self.renderer.target.fast else 95
+            self.sns.regplot(data=df, x='Study_Hours', y='Score', ci=ci, line_kws={"color": "red"}, ax=ax)
+        else:
+            stats = cube.group_stats().iloc[0]
+            slope = corr * np.sqrt(stats['Score_var'] / stats['Study_Hours_var'])
+            self.renderer.scatter(ax, df['Study_Hours'], df['Score'])
+            xs = np.array([df['Study_Hours'].min(), df['Study_Hours'].max()])
+            ax.plot(xs, stats['Score_mean'] + slope * (xs - stats['Study_Hours_mean']), color='red')
+        ax.set_title('Impact of Study Hours on Exam Performance')
+        self._save(fig, '02_edu_regression.png')
 
         # Viz 2: Box Plot by Gender (Fixed Warning)
-        plt.figure()
-        sns.boxplot(data=df, x='Gender', y='Score', hue='Gender', legend=False, palette='pastel')
-        plt.title('Score Distribution by Gender')
-        self._save('02_edu_gender_dist.png')
+        fig, ax = self.renderer.new_figure()
+        self.sns.boxplot(data=df, x='Gender', y='Score', hue='Gender', legend=False, palette='pastel', ax=ax)
+        ax.set_title('Score Distribution by Gender')
+        self._save(fig, '02_edu_gender_dist.png')
 
-        # Viz 3: Bar Chart by Method (Fixed Warning)
-        plt.figure()
-        sns.barplot(data=df, x='Method', y='Score', hue='Method', legend=False, errorbar=None, palette='viridis')
-        plt.title('Average Score by Study Method')
-        self._save('02_edu_method_perf.png')
+        # Viz 3: Bar Chart by Method
+        # Error bars are the bootstrap CIs from Insight 2 (seaborn's own bootstrap stays off)
+        means = method_ci[method_ci['statistic'] == 'mean']
+        fig, ax = self.renderer.new_figure()
+        order = list(means['group'])
+        self.sns.barplot(data=df, x='Method', y='Score', hue='Method', order=order, hue_order=order, dodge=False, legend=False,
+                    errorbar=None, palette='viridis', ax=ax)
+        ax.errorbar(range(len(means)), means['estimate'],
+                    yerr=[means['estimate'] - means['ci_low'], means['ci_high'] - means['estimate']],
+                    fmt='none', ecolor='black', capsize=8)
+        ax.set_title(f"Average Score by Study Method (95% {method_ci.attrs['method'].title()} CI)")
+        self._save(fig, '02_edu_method_perf.png')
 
     # --- PROJECT 3: HEALTHCARE ---
     def run_healthcare_deep_dive(self):
+        from src.epidemiology import EpiEngine, EpiPanel
+
         print("\n🏥 STARTING PROJECT 3: HEALTHCARE EPIDEMIOLOGY...")
         df = self.loader.load_csv('healthcare_covid.csv')
-        df['Date'] = pd.to_datetime(df['Date'])
-        
+
+        # Region x date matrices; charts and headline metrics use the national total
+        panel = EpiPanel.from_long(df)
+        national = panel.total()
+        trend = EpiEngine().compute(national)
+
         # Insight: Recovery Rate
         rec_rate = (df['Recovered'].sum() / df['New_Cases'].sum()) * 100
         print(f"   [Insight] Global Recovery Rate: {rec_rate:.1f}%")
+        latest = trend['summary'].iloc[0]
+        doubling = f"{latest['Doubling_Days']:.1f} days" if latest['Growth_7d_%'] > 0 else "n/a (declining)"
+        print(f"   [Insight] Lagged CFR (14d): {latest['CFR_%']:.2f}% | Rt: {latest['Rt']:.2f} | "
+              f"7d Growth: {latest['Growth_7d_%']:+.1f}% | Doubling: {doubling}")
+        if len(panel.regions) > 1:
+            regional = EpiEngine().compute(panel)['summary']
+            print(f"   [Insight] Regions: {len(panel.regions)} | Rt > 1 in {int((regional['Rt'] > 1).sum())} | "
+                  f"Highest CFR: {regional['CFR_%'].max():.2f}% ({regional['CFR_%'].idxmax()})")
+
+        dates = national.dates
+        cases, recovered, deaths = (national.counts[c][:, 0] for c in ('New_Cases', 'Recovered', 'Deaths'))
+
+        if not self.plots:
+            return
 
         # Viz 1: Multi-Line Epidemic Curve
-        plt.figure()
-        plt.plot(df['Date'], df['New_Cases'], label='Infection Rate', color='red', alpha=0.7)
-        plt.plot(df['Date'], df['Recovered'], label='Recovery Rate', color='green', linestyle='--')
-        plt.title('Epidemic Curve: Spread vs Recovery')
-        plt.legend()
-        self._save('03_health_curve.png')
+        fig, ax = self.renderer.new_figure()
+        ax.plot(dates, cases, label='Infection Rate', color='red', alpha=0.7)
+        ax.plot(dates, trend['cases_7d'].iloc[:, 0], label='Infections (7-day avg)', color='darkred')
+        ax.plot(dates, recovered, label='Recovery Rate', color='green', linestyle='--')
+        ax.set_title('Epidemic Curve: Spread vs Recovery')
+        ax.legend()
+        self._save(fig, '03_health_curve.png')
 
         # Viz 2: Stacked Area (Cumulative)
-        plt.figure()
-        plt.stackplot(df['Date'], df['New_Cases'].cumsum(), df['Recovered'].cumsum(), 
+        fig, ax = self.renderer.new_figure()
+        ax.stackplot(dates, np.cumsum(cases), np.cumsum(recovered),
                      labels=['Total Cases', 'Total Recovered'], colors=['salmon', 'lightgreen'])
-        plt.title('Cumulative Caseload Analysis')
-        plt.legend(loc='upper left')
-        self._save('03_health_cumulative.png')
+        ax.set_title('Cumulative Caseload Analysis')
+        ax.legend(loc='upper left')
+        self._save(fig, '03_health_cumulative.png')
 
         # Viz 3: Daily Deaths Bar
-        plt.figure()
-        plt.bar(df['Date'], df['Deaths'], color='black', alpha=0.6)
-        plt.title('Daily Mortality Trend')
-        self._save('03_health_mortality.png')
+        fig, ax = self.renderer.new_figure()
+        ax.bar(dates, deaths, color='black', alpha=0.6)
+        ax.set_title('Daily Mortality Trend')
+        self._save(fig, '03_health_mortality.png')
 
     # --- PROJECT 4: FINANCE ---
     def run_finance_deep_dive(self):
+        from src.finance_engine import FinanceEngine, PricePanel
+
         print("\n📈 STARTING PROJECT 4: FINANCIAL MARKET ANALYSIS...")
         df = self.loader.load_csv('finance_stocks.csv')
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        # Feature Engineering: Daily Returns & Volatility
-        df['Daily_Return'] = df['Close_Price'].pct_change() * 100
-        volatility = df['Daily_Return'].std()
+
+        # Feature Engineering: Daily Returns & Risk Metrics for every ticker at once
+        panel = PricePanel.from_long(df)
+        risk = FinanceEngine(window=20, workers=self.workers or 1).compute(panel)
+        df['Daily_Return'] = panel.to_long(risk['returns'].to_numpy()) * 100
+        returns = self._column(df['Daily_Return'], hist_range=RETURN_RANGE, bins=RETURN_BINS)
+        volatility = returns.std()
         print(f"   [Insight] Market Volatility (Std Dev): {volatility:.2f}%")
+        if self.sketch:
+            low, high = returns.quantile([0.05, 0.95])
+            print(f"   [Insight] Daily Return 5% / 95% quantiles: {low:.2f}% / {high:.2f}% "
+                  f"(KLL, ±{returns.quantiles.normalized_rank_error:.1%} rank)")
+        summary = risk['summary']
+        worst = summary['Max_Drawdown_%'].idxmin()
+        print(f"   [Insight] Tickers: {len(panel.tickers)} | Max Drawdown: {summary.loc[worst, 'Max_Drawdown_%']:.2f}% ({worst})")
+        latest_vol = risk['volatility'].iloc[-1].mean() * 100
+        latest_beta = risk['beta'].iloc[-1].median()
+        print(f"   [Insight] Latest 20d Volatility (mean): {latest_vol:.2f}% | Latest Beta (median): {latest_beta:.2f}")
+
+        if not self.plots:
+            return
 
-        # Viz 1: Price Trend
-        plt.figure()
-        plt.plot(df['Date'], df['Close_Price'], color='navy')
-        plt.title('Asset Price History (Close)')
-        self._save('04_fin_price_trend.png')
+        # Viz 1: Price Trend (equal-weighted index when there are several tickers)
+        fig, ax = self.renderer.new_figure()
+        if len(panel.tickers) == 1:
+            ax.plot(panel.dates, panel.prices[:, 0], color='navy')
+            ax.set_title('Asset Price History (Close)')
+        else:
+            index = 100 * (1 + risk['market'].fillna(0)).cumprod()
+            ax.plot(index.index, index.to_numpy(), color='navy')
+            ax.set_title(f'Equal-Weighted Index ({len(panel.tickers)} Tickers, Base 100)')
+        self._save(fig, '04_fin_price_trend.png')
 
         # Viz 2: Return Distribution (Risk Analysis)
-        plt.figure()
-        sns.histplot(df['Daily_Return'].dropna(), bins=30, kde=True, color='purple')
-        plt.title('Risk Profile: Daily Return Distribution')
-        self._save('04_fin_risk_dist.png')
+        # KDE is skipped for large pooled samples; the histogram carries the shape
+        fig, ax = self.renderer.new_figure()
+        if self.sketch:
+            hist = returns.histogram
+            counts, edges = hist.coarsened(30)
+            if len(counts):
+                ax.stairs(counts, edges, fill=True, color='purple', alpha=0.6)
+            else:
+                ax.text(0.5, 0.5, 'No returns within the histogram range', ha='center', va='center',
+                        transform=ax.transAxes)
+            outside = hist.below + hist.above
+            if outside:
+                ax.annotate(f"{outside:,} returns outside ±{RETURN_RANGE[1]:.0f}% not shown",
+                            xy=(0.01, 0.97), xycoords='axes fraction', va='top', fontsize=8)
+            ax.set_xlabel('Daily_Return')
+            ax.set_ylabel('Count')
+        else:
+            returns = returns.dropna()
+            self.sns.histplot(returns, bins=30, kde=len(returns) <= 50_000, color='purple', ax=ax)
+        ax.set_title('Risk Profile: Daily Return Distribution')
+        self._save(fig, '04_fin_risk_dist.png')
 
         # Viz 3: Volume vs Price
-        plt.figure()
-        plt.scatter(df['Volume'], df['Daily_Return'], alpha=0.5)
-        plt.title('Trading Volume vs Price Change')
-        self._save('04_fin_vol_price.png')
+        # Binned automatically once the point count gets large
+        fig, ax = self.renderer.new_figure()
+        self.renderer.scatter(ax, df['Volume'], df['Daily_Return'], alpha=0.5)
+        ax.set_title('Trading Volume vs Price Change')
+        self._save(fig, '04_fin_vol_price.png')
 
     # --- PROJECT 5: WEATHER ---
     def run_weather_deep_dive(self):
+        from src.climate_engine import ClimateEngine, StationArchive
+
         print("\n☁️ STARTING PROJECT 5: CLIMATE PATTERNS...")
         df = self.loader.load_csv('weather_data.csv')
-        df['Date'] = pd.to_datetime(df['Date'])
-        
+
+        # Station x day float32 arrays; climatology, anomalies and extremes for all stations at once
+        archive = StationArchive.from_long(df)
+        engine = ClimateEngine(workers=self.workers or 1)
+        climate = engine.analyze(archive)
+        daily = climate['daily']
+
         # Insight: Peak Heat
-        peak_temp = df['Temp_C'].max()
+        peak_temp = self._column(df['Temp_C']).max()
         print(f"   [Insight] Annual Peak Temperature: {peak_temp:.1f}°C")
+        monthly = pd.Series(np.nanmean(climate['monthly'].data['Temp_C'], axis=0), index=climate['monthly'].times)
+        warmest = monthly.groupby(monthly.index.month_name()).mean()
+        print(f"   [Insight] Stations: {len(daily.stations)} | Warmest Month: {warmest.idxmax()} ({warmest.max():.1f}°C)")
+        events = climate['events']
+        print(f"   [Insight] Extreme Events ({engine.params['min_days']}+ days, |z| >= {engine.params['threshold']}): "
+              f"{int((events['Kind'] == 'heat').sum())} heat, {int((events['Kind'] == 'cold').sum())} cold")
+
+        if not self.plots:
+            return
 
         # Viz 1: Temperature Seasonality
-        plt.figure()
-        sns.lineplot(data=df, x='Date', y='Temp_C', color='orange')
-        plt.title('Annual Temperature Cycle')
-        self._save('05_weath_temp_cycle.png')
+        # Station mean with a 10-90th percentile band, computed from the matrix (no per-date bootstrap)
+        temps = daily.data['Temp_C']
+        fig, ax = self.renderer.new_figure()
+        ax.plot(daily.times, np.nanmean(temps, axis=0), color='orange')
+        if len(daily.stations) > 1:
+            low, high = np.nanpercentile(temps, [10, 90], axis=0)
+            ax.fill_between(daily.times, low, high, color='orange', alpha=0.2)
+        ax.set_title('Annual Temperature Cycle')
+        self._save(fig, '05_weath_temp_cycle.png')
 
         # Viz 2: Rainfall Distribution
-        plt.figure()
-        plt.bar(df['Date'], df['Rainfall_mm'], color='blue', alpha=0.3)
-        plt.title('Precipitation Events (Rainfall mm)')
-        self._save('05_weath_rainfall.png')
+        # Long records are drawn as one line collection instead of one bar patch per day
+        rain = np.nanmean(daily.data['Rainfall_mm'], axis=0)
+        fig, ax = self.renderer.new_figure()
+        if len(daily.times) <= 1000:
+            ax.bar(daily.times, rain, color='blue', alpha=0.3)
+        else:
+            ax.vlines(daily.times, 0, rain, color='blue', alpha=0.3)
+        ax.set_title('Precipitation Events (Rainfall mm)')
+        self._save(fig, '05_weath_rainfall.png')
 
         # Viz 3: Correlation Heatmap
-        plt.figure()
-        sns.heatmap(df[['Temp_C', 'Rainfall_mm', 'Humidity']].corr(), annot=True, cmap='coolwarm')
-        plt.title('Climatic Variable Correlation')
-        self._save('05_weath_correlation.png')
\ No newline at end of file
+        fig, ax = self.renderer.new_figure()
+        self.sns.heatmap(df[['Temp_C', 'Rainfall_mm', 'Humidity']].corr(), annot=True, cmap='coolwarm', ax=ax)
+        ax.set_title('Climatic Variable Correlation')
+        self._save(fig, '05_weath_correlation.png')
+
+    # --- PROJECT 6: REAL ESTATE ---
+    def run_housing_deep_dive(self):
+        from src.valuation import ValuationModel, compare_models
+
+        print("\n🏠 STARTING PROJECT 6: REAL ESTATE VALUATION...")
+        df = self.loader.load_csv('house_prices.csv')
+
+        # Insight 1: Out-of-sample accuracy of each log-price model
+        metrics, oof = compare_models(df)
+        for method, row in metrics.iterrows():
+            print(f"   [Insight] {method.upper()} 5-fold CV: MAPE {row['MAPE_%']:.2f}% | R² (log) {row['R2_log']:.3f}")
+        best = metrics['MAPE_%'].idxmin()
+
+        # Insight 2: Location premiums from the best model, refit on every listing
+        model = ValuationModel.fit(df, best)
+        if model.ols is not None:
+            print(f"   [Insight] OLS R² (in-sample, log price): {model.ols.rsquared:.3f}")
+        premium = model.premiums('Location')
+        print(f"   [Insight] Location premium vs {premium.index[0]}: "
+              + ", ".join(f"{lv} {p:.2f}x" for lv, p in premium.iloc[1:].items()))
+
+        # Insight 3: Batch scoring throughput (compiled lookup tables, no one-hot matrix)
+        start = time.perf_counter()
+        model.score(df)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"   [Insight] Scored {len(df):,} listings in {elapsed * 1000:.1f} ms ({len(df) / elapsed:,.0f} rows/s)")
+
+        if not self.plots:
+            return
+
+        # Viz 1: Price vs Area by Location
+        # Binned automatically once the point count gets large
+        fig, ax = self.renderer.new_figure()
+        if len(df) <= self.renderer.binned_threshold:
+            self.sns.scatterplot(data=df, x='Area', y='Price', hue='Location', alpha=0.7, ax=ax)
+        else:
+            self.renderer.scatter(ax, df['Area'], df['Price'])
+        ax.set_title('Price vs Area by Location')
+        self._save(fig, '06_house_price_area.png')
+
+        # Viz 2: Out-of-fold predictions vs actual prices
+        fig, ax = self.renderer.new_figure()
+        self.renderer.scatter(ax, df['Price'], oof[best], alpha=0.6)
+        bounds = [df['Price'].min(), df['Price'].max()]
+        ax.plot(bounds, bounds, color='red', linestyle='--')
+        ax.set_xlabel('Actual Price')
+        ax.set_ylabel('Predicted Price (out-of-fold)')
+        ax.set_title(f"Valuation Accuracy ({best.upper()}, MAPE {metrics.loc[best, 'MAPE_%']:.1f}%)")
+        self._save(fig, '06_house_actual_vs_pred.png')
+
+        # Viz 3: Location premium bars
+        fig, ax = self.renderer.new_figure()
+        ax.bar(premium.index.astype(str), premium.to_numpy(), color='teal')
+        ax.axhline(1, color='black', linewidth=0.8)
+        ax.set_title(f'Price Multiple by Location (vs {premium.index[0]}, like-for-like listing)')
+        self._save(fig, '06_house_location_premium.png')
@@ -2,44 +2,99 @@
 Module: features.py
 Description: Advanced feature engineering for Retail Analytics.
 """
+import numpy as np
 import pandas as pd
 
-def engineer_features(df):
+from src.profiling import profiled
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+TIME_BINS = ['Morning', 'Afternoon', 'Evening']
+
+# Features each downstream consumer needs; engineer_features only builds these
+HEATMAP_FEATURES = ['Day_Name', 'Hour']
+FORECAST_FEATURES = []  # only needs the parsed Date
+SEGMENT_FEATURES = ['Month_Name']  # batched Member vs Normal tests per month
+ALL_FEATURES = ['Day_Name', 'Month_Name', 'Is_Weekend', 'Hour', 'Time_of_Day']
+
+
+def parse_dates(values):
+    """Parses a date column once, converting only the unique strings."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return np.asarray(values)
+    codes, uniques = pd.factorize(values)
+    out = pd.to_datetime(uniques).to_numpy().take(codes)
+    out[codes < 0] = np.datetime64('NaT')
+    return out
+
+
+def parse_hours(values):
+    """Hour of day from 'HH:MM' strings; at most 1,440 distinct values get parsed."""
+    codes, uniques = pd.factorize(values)
+    hours = pd.to_datetime(uniques, format='%H:%M').hour.to_numpy(dtype=np.int8)
+    if (codes < 0).any():
+        return np.where(codes >= 0, hours.take(codes).astype(float), np.nan)
+    return hours.take(codes)
+
+
+def time_of_day(hours):
+    """
+    06:00-12:00 = Morning, 12:00-17:00 = Afternoon, anything else = Evening.
+    Returned as a categorical (1-byte codes instead of Python strings).
+    """
+    codes = np.select([(hours >= 6) & (hours < 12), (hours >= 12) & (hours < 17)], [0, 1], default=2)
+    return pd.Categorical.from_codes(codes.astype(np.int8), categories=TIME_BINS)
+
+
+@profiled('engineer_features', rows='input')
+def engineer_features(df, features=None):
     """
     Enhances the raw dataframe with time-based and categorical features.
-    
+
+    Date and Time are parsed once; every derived column is vectorised and
+    text-like outputs are categoricals. The caller's frame is not modified.
+
     Args:
         df (pd.DataFrame): Raw sales data.
-        
+        features (list, optional): Derived columns to build (see ALL_FEATURES).
+            Defaults to all of them; pass e.g. HEATMAP_FEATURES to build only
+            what a consumer needs.
+
     Returns:
-        pd.DataFrame: Dataframe with added 'Hour_Bin', 'Weekday', 'Is_Weekend'.
+        pd.DataFrame: Copy of `df` with parsed 'Date' plus the requested features.
     """
+    features = ALL_FEATURES if features is None else list(features)
+    unknown = set(features) - set(ALL_FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown features: {sorted(unknown)}")
     print("   [Feature Eng] Generating advanced time features...")
-    
+
+    out = df.copy(deep=False)
+
     # 1. Extract Date Components
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['Day_Name'] = df['Date'].dt.day_name()
-    df['Month_Name'] = df['Date'].dt.month_name()
-    
+    out['Date'] = parse_dates(df['Date'])
+    # Missing dates get code -1, i.e. NaN in the categoricals (and not a weekend)
+    if {'Day_Name', 'Is_Weekend'} & set(features):
+        dow = out['Date'].dt.dayofweek.fillna(-1).to_numpy(dtype=np.int8)
+    if 'Day_Name' in features:
+        out['Day_Name'] = pd.Categorical.from_codes(dow, categories=DAYS, ordered=True)
+    if 'Month_Name' in features:
+        month = out['Date'].dt.month.fillna(0).to_numpy(dtype=np.int8) - 1
+        out['Month_Name'] = pd.Categorical.from_codes(month, categories=MONTHS, ordered=True)
+
     # 2. Weekend Flag (Critical for behavioral analysis)
     # Saturday (5) and Sunday (6) are weekends
-    df['Is_Weekend'] = df['Date'].dt.dayofweek.isin([5, 6]).astype(int)
-    
+    if 'Is_Weekend' in features:
+        out['Is_Weekend'] = (dow >= 5).astype(np.int8)
+
     # 3. Time of Day Binning
-    # 06:00-12:00 = Morning, 12:00-17:00 = Afternoon, 17:00-24:00 = Evening
-    df['Hour'] = pd.to_datetime(df['Time'], format='%H:%M').dt.hour
-    
-    def get_time_bin(h):
-        if 6 <= h < 12: return 'Morning'
-        elif 12 <= h < 17: return 'Afternoon'
-        else: return 'Evening'
-        
-    df['Time_ of_Day'] = df['Hour'].apply(get_time_bin)
-    
-    # 4. Revenue Calculation (if not present, though 'Total' exists)
-    # Gross Margin Percentage = (Total - COGS) / Total. 
-    # In this dataset, 'Tax' is 5%, implying Cost ~ Total/1.05. 
-    # Let's calculate 'Gross_Income' explicitly if needed.
-    
-    print("   [Feature Eng] Complete. Added: Time_of_Day, Is_Weekend.")
-    return df
\ No newline at end of file
+    if {'Hour', 'Time_of_Day'} & set(features):
+        hours = parse_hours(df['Time'])
+        if 'Hour' in features:
+            out['Hour'] = hours
+        if 'Time_of_Day' in features:
+            out['Time_of_Day'] = time_of_day(hours)
+
+    print(f"   [Feature Eng] Complete. Added: {', '.join(features) or 'parsed Date'}.")
+    return out
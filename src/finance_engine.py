@@ -0,0 +1,191 @@
+"""
+Module: finance_engine.py
+Description: Vectorised multi-ticker risk engine (returns, rolling volatility, drawdown, beta, correlation).
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.profiling import stage
+
+TRADING_DAYS = 252
+
+
+class PricePanel:
+    """
+    Wide (date x ticker) price matrix built from a long-format frame.
+
+    Attributes:
+        dates (pd.DatetimeIndex): Sorted unique dates (rows).
+        tickers (pd.Index): Tickers (columns).
+        prices (np.ndarray): float64 [n_dates, n_tickers], NaN where a ticker has no bar.
+        row_idx / col_idx (np.ndarray): Position of every long-format row in the matrix.
+    """
+
+    def __init__(self, dates, tickers, prices, row_idx, col_idx):
+        self.dates = dates
+        self.tickers = tickers
+        self.prices = prices
+        self.row_idx = row_idx
+        self.col_idx = col_idx
+
+    @classmethod
+    def from_long(cls, df, date_col='Date', ticker_col='Ticker', value_col='Close_Price'):
+        """Scatters the long frame into a matrix in one pass (no per-ticker loop)."""
+        dates = pd.DatetimeIndex(pd.to_datetime(df[date_col]))
+        row_idx, uniq_dates = pd.factorize(dates, sort=True)
+        if ticker_col in df.columns:
+            col_idx, tickers = pd.factorize(df[ticker_col], sort=True)
+        else:
+            # Single-series files (the shipped finance_stocks.csv) have no Ticker column
+            col_idx, tickers = np.zeros(len(df), dtype=np.intp), pd.Index(['ASSET'])
+        prices = np.full((len(uniq_dates), len(tickers)), np.nan)
+        prices[row_idx, col_idx] = df[value_col].to_numpy(dtype=float)
+        return cls(pd.DatetimeIndex(uniq_dates), pd.Index(tickers), prices, row_idx, col_idx)
+
+    def to_long(self, matrix):
+        """Maps a (date x ticker) result back onto the original long-format rows."""
+        return matrix[self.row_idx, self.col_idx]
+
+
+def rolling_sum(x, window):
+    """Trailing window sums along axis 0 via cumulative sums (NaN treated as 0)."""
+    c = np.cumsum(np.nan_to_num(x), axis=0)
+    out = c.copy()
+    out[window:] = c[window:] - c[:-window]
+    return out
+
+
+def simple_returns(prices):
+    out = np.full(prices.shape, np.nan)
+    out[1:] = prices[1:] / prices[:-1] - 1
+    return out
+
+
+def rolling_std(x, window, min_periods=None):
+    """Rolling sample std along axis 0, ignoring NaN; NaN until `min_periods` values."""
+    min_periods = min_periods or window
+    valid = ~np.isnan(x)
+    n = rolling_sum(valid.astype(float), window)
+    s1 = rolling_sum(x, window)
+    s2 = rolling_sum(np.where(valid, x, 0) ** 2, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (s2 - s1 ** 2 / n) / (n - 1)
+    var = np.where(n >= max(min_periods, 2), np.maximum(var, 0), np.nan)
+    return np.sqrt(var)
+
+
+def drawdown(prices):
+    """Drawdown from the running peak (0 at new highs, negative below)."""
+    peak = np.fmax.accumulate(np.where(np.isnan(prices), -np.inf, prices), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dd = prices / peak - 1
+    return np.where(np.isfinite(peak) & ~np.isnan(prices), dd, np.nan)
+
+
+def rolling_beta(returns, market, window, min_periods=None):
+    """Rolling OLS beta of every column of `returns` against the `market` vector."""
+    min_periods = min_periods or window
+    m = np.broadcast_to(market[:, None], returns.shape)
+    valid = ~np.isnan(returns) & ~np.isnan(m)
+    r = np.where(valid, returns, 0)
+    m = np.where(valid, m, 0)
+    n = rolling_sum(valid.astype(float), window)
+    sr, sm = rolling_sum(r, window), rolling_sum(m, window)
+    srm, smm = rolling_sum(r * m, window), rolling_sum(m * m, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = srm - sr * sm / n
+        var = smm - sm ** 2 / n
+        beta = cov / var
+    return np.where((n >= max(min_periods, 2)) & (var > 0), beta, np.nan)
+
+
+def correlation_matrix(returns):
+    """
+    Correlation of all columns in one matrix product. Missing values are
+    handled by standardising each column on its own observations and
+    dividing by the pairwise overlap count.
+    """
+    valid = ~np.isnan(returns)
+    mean = np.nanmean(returns, axis=0)
+    std = np.nanstd(returns, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.where(valid, (returns - mean) / std, 0)
+        overlap = valid.T.astype(float) @ valid.astype(float)
+        corr = (z.T @ z) / overlap
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1, 1)
+
+
+def _column_metrics(prices, market, window):
+    """Per-ticker metrics for a block of columns (unit of work for the process pool)."""
+    returns = simple_returns(prices)
+    return {
+        'returns': returns,
+        'volatility': rolling_std(returns, window),
+        'drawdown': drawdown(prices),
+        'beta': rolling_beta(returns, market, window),
+    }
+
+
+class FinanceEngine:
+    """
+    Risk metrics for every ticker at once on a PricePanel.
+
+    Args:
+        window (int): Rolling window (trading days) for volatility and beta.
+        workers (int): Processes for the per-ticker metrics (1 = in-process).
+        chunk_size (int): Tickers per work unit when workers > 1.
+    """
+
+    def __init__(self, window=20, workers=1, chunk_size=500):
+        self.window = window
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def compute(self, panel):
+        """
+        Returns:
+            dict: 'returns', 'volatility', 'drawdown', 'beta' (date x ticker
+            DataFrames), 'market' (equal-weighted return Series), 'correlation'
+            (ticker x ticker DataFrame) and 'summary' (one row per ticker).
+        """
+        with stage('FinanceEngine.compute', rows=panel.prices.size):
+            prices = panel.prices
+            # Equal-weighted market return is the beta benchmark
+            all_returns = simple_returns(prices)
+            counts = (~np.isnan(all_returns)).sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                market = np.nansum(all_returns, axis=1) / counts
+
+            n_tickers = prices.shape[1]
+            if self.workers > 1 and n_tickers > self.chunk_size:
+                bounds = [(s, min(s + self.chunk_size, n_tickers)) for s in range(0, n_tickers, self.chunk_size)]
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    parts = list(pool.map(_column_metrics, [prices[:, a:b] for a, b in bounds],
+                                          [market] * len(bounds), [self.window] * len(bounds)))
+                blocks = {k: np.hstack([p[k] for p in parts]) for k in parts[0]}
+            else:
+                blocks = _column_metrics(prices, market, self.window)
+
+            frame = lambda m: pd.DataFrame(m, index=panel.dates, columns=panel.tickers)
+            result = {k: frame(v) for k, v in blocks.items()}
+            result['market'] = pd.Series(market, index=panel.dates, name='Market_Return')
+            result['correlation'] = pd.DataFrame(correlation_matrix(blocks['returns']),
+                                                 index=panel.tickers, columns=panel.tickers)
+
+            returns = blocks['returns']
+            cols = np.arange(n_tickers)
+            has_bar = ~np.isnan(prices)
+            first = prices[np.argmax(has_bar, axis=0), cols]
+            last = prices[len(prices) - 1 - np.argmax(has_bar[::-1], axis=0), cols]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result['summary'] = pd.DataFrame({
+                    'Total_Return_%': (last / first - 1) * 100,
+                    'Daily_Vol_%': np.nanstd(returns, axis=0, ddof=1) * 100,
+                    'Annual_Vol_%': np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100,
+                    'Max_Drawdown_%': np.nanmin(blocks['drawdown'], axis=0) * 100,
+                    'Beta_Latest': blocks['beta'][-1],
+                }, index=panel.tickers)
+        return result
@@ -8,6 +8,9 @@ from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 
+from src.profiling import profiled
+
+@profiled('train_sales_forecast_model', rows='input')
 def train_sales_forecast_model(df):
     """
     Trains a Linear Regression model to predict Daily Sales.
@@ -0,0 +1,235 @@
+"""
+Module: model_registry.py
+Description: Persisted daily-sales forecaster with fingerprinting, recursive least squares updates and fast prediction.
+
+Usage (no pipeline run needed):
+    python -m src.model_registry --days 7
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting import build_lag_matrix
+
+REGISTRY_VERSION = 1
+FEATURE_SPEC = {
+    'target': 'Total',
+    'grain': 'daily',
+    'lags': [1, 7],
+    'features': ['Intercept', 'Day_Index', 'Sales_Lag_1', 'Sales_Lag_7'],
+}
+
+
+def series_fingerprint(dates, values):
+    """
+    BLAKE2b digest of a daily series (dates as int64 ns, values as float64
+    rounded to 6 decimals). Rounding keeps the digest stable when the same
+    invoices are summed in another order (streamed cube vs in-memory frame).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(dates, dtype='datetime64[ns]').view(np.int64).tobytes())
+    digest.update(np.round(np.asarray(values, dtype=np.float64), 6).tobytes())
+    return digest.hexdigest()
+
+
+def daily_series(df):
+    """Date-sorted daily totals (Date/Total rows at any grain)."""
+    series = df.groupby('Date')['Total'].sum().sort_index()
+    return pd.DatetimeIndex(pd.to_datetime(series.index)), series.to_numpy(dtype=float)
+
+
+class RLSForecaster:
+    """
+    Linear autoregressive forecaster (intercept, Day_Index, lags) kept in
+    recursive-least-squares form: coefficients plus P = (X'X)^-1. Appending
+    rows with update() gives the same coefficients as a full refit.
+
+    Args:
+        lags (tuple): Lag features in days.
+    """
+
+    def __init__(self, lags=(1, 7)):
+        self.lags = tuple(lags)
+        self.coef = None
+        self.P = None
+        self.history = None     # last max(lags) observations, for recursive prediction
+        self.n_obs = 0          # rows in the (unlagged) series seen so far
+        self.last_date = None
+
+    def _design(self, values, start_row=0):
+        X, y, _ = build_lag_matrix(values, self.lags)
+        X = np.column_stack([np.ones(len(X)), X])
+        return X[start_row:], y[start_row:]
+
+    def fit(self, dates, values, prior=1e-8):
+        """Closed-form fit on the full series."""
+        X, y = self._design(values)
+        self.P = np.linalg.inv(X.T @ X + prior * np.eye(X.shape[1]))
+        self.coef = self.P @ X.T @ y
+        self._remember(dates, values)
+        return self
+
+    def update(self, dates, values):
+        """
+        Folds in the days beyond `n_obs` with a block RLS (Woodbury) step.
+        `values` is the full series; only its new tail is used.
+        """
+        max_lag = max(self.lags)
+        X, y = self._design(values, start_row=self.n_obs - max_lag)
+        if len(y):
+            PX = self.P @ X.T
+            gain = PX @ np.linalg.inv(np.eye(len(y)) + X @ PX)
+            self.coef = self.coef + gain @ (y - X @ self.coef)
+            self.P = self.P - gain @ PX.T
+        self._remember(dates, values)
+        return self
+
+    def _remember(self, dates, values):
+        self.history = np.asarray(values[-max(self.lags):], dtype=float)
+        self.n_obs = len(values)
+        self.last_date = pd.Timestamp(dates[-1])
+
+    def predict(self, n_days):
+        """Recursive forecast for the next n_days; returns a Date/Forecast frame."""
+        history = list(self.history)
+        out = np.empty(n_days)
+        for h in range(n_days):
+            row = [1.0, self.n_obs + h] + [history[-k] for k in self.lags]
+            out[h] = float(np.dot(self.coef, row))
+            history.append(out[h])
+        dates = pd.date_range(self.last_date + pd.Timedelta(days=1), periods=n_days)
+        return pd.DataFrame({'Date': dates, 'Forecast': out})
+
+    def to_arrays(self):
+        return {'coef': self.coef, 'P': self.P, 'history': self.history}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        model = cls(meta['feature_spec']['lags'])
+        model.coef, model.P, model.history = arrays['coef'], arrays['P'], arrays['history']
+        model.n_obs = meta['n_obs']
+        model.last_date = pd.Timestamp(meta['last_date'])
+        return model
+
+
+class ModelRegistry:
+    """
+    Stores each model as <root>/<name>/model.npz (arrays, no pickle) plus
+    meta.json (feature spec, training-data fingerprint, row count, dates).
+
+    sync() decides what a run needs to do:
+    - same fingerprint            -> load the stored model
+    - stored series is a prefix   -> RLS update with the new days only
+    - anything else               -> full refit
+    """
+
+    def __init__(self, root='models'):
+        self.root = root
+        self._loaded = {}       # name -> (meta mtime_ns, model) for repeated predict() calls
+
+    def _paths(self, name):
+        entry = os.path.join(self.root, name)
+        return entry, os.path.join(entry, 'model.npz'), os.path.join(entry, 'meta.json')
+
+    def read_meta(self, name):
+        try:
+            with open(self._paths(name)[2]) as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('version') == REGISTRY_VERSION else None
+
+    def save(self, name, model, dates, values):
+        entry, model_path, meta_path = self._paths(name)
+        os.makedirs(entry, exist_ok=True)
+        # Both files are replaced atomically, model first: a reader never sees a truncated model.npz
+        tmp = model_path + '.tmp'
+        with open(tmp, 'wb') as fh:
+            np.savez(fh, **model.to_arrays())
+        os.replace(tmp, model_path)
+        meta = {
+            'version': REGISTRY_VERSION,
+            'feature_spec': {**FEATURE_SPEC, 'lags': list(model.lags)},
+            'fingerprint': series_fingerprint(dates, values),
+            'n_obs': model.n_obs,
+            'first_date': str(pd.Timestamp(dates[0]).date()),
+            'last_date': str(model.last_date.date()),
+            'coef': dict(zip(FEATURE_SPEC['features'], np.round(model.coef, 6).tolist())),
+            'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        tmp = meta_path + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(meta, fh, indent=1)
+        os.replace(tmp, meta_path)
+
+    def load(self, name):
+        """Returns the stored model (memoised until meta.json changes), or None."""
+        _, model_path, meta_path = self._paths(name)
+        try:
+            mtime = os.stat(meta_path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._loaded.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        meta = self.read_meta(name)
+        if meta is None:
+            return None
+        with np.load(model_path) as arrays:
+            model = RLSForecaster.from_arrays(arrays, meta)
+        self._loaded[name] = (mtime, model)
+        return model
+
+    def sync(self, name, df, lags=(1, 7)):
+        """
+        Brings the stored model in line with the data in `df` (Date/Total).
+
+        Returns:
+            tuple: (model, status) with status 'loaded', 'updated' or 'trained'.
+        """
+        dates, values = daily_series(df)
+        meta = self.read_meta(name)
+        model = self.load(name) if meta and meta['feature_spec']['lags'] == list(lags) else None
+
+        if model is not None:
+            n = meta['n_obs']
+            if n == len(values) and meta['fingerprint'] == series_fingerprint(dates, values):
+                return model, 'loaded'
+            if n < len(values) and meta['fingerprint'] == series_fingerprint(dates[:n], values[:n]):
+                model.update(dates, values)
+                self.save(name, model, dates, values)
+                return model, 'updated'
+
+        model = RLSForecaster(lags).fit(dates, values)
+        self.save(name, model, dates, values)
+        return model, 'trained'
+
+    def predict(self, name, n_days):
+        """Next n_days from the stored model (no data access, no training)."""
+        model = self.load(name)
+        if model is None:
+            raise FileNotFoundError(f"No model '{name}' in {self.root}; run the pipeline first")
+        return model.predict(n_days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast the next N days from the stored sales model")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--name', default='daily_sales')
+    parser.add_argument('--root', default='models')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    forecast = ModelRegistry(args.root).predict(args.name, args.days)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(forecast.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    print(f"   [ML] Forecast served in {elapsed:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Module: partitions.py
+Description: Multi-file and Hive-partitioned CSV datasets (discovery, partition pruning, parallel parsing, single concat).
+
+Layout example (partition keys are `key=value` directories):
+    data/raw/sales/branch=A/date=2024-01-01/part-0.csv
+"""
+import glob
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from src.profiling import stage
+
+DATE = 'datetime64[ns]'
+MAGIC = '*?['
+
+
+def discover(source):
+    """
+    Data files of a dataset: every *.csv below a directory, or the matches of
+    a glob pattern ('**' recurses).
+
+    Returns:
+        tuple: (root the partition directories are read from, sorted file paths).
+    """
+    if os.path.isdir(source):
+        return source, sorted(glob.glob(os.path.join(source, '**', '*.csv'), recursive=True))
+    parts = source.split(os.sep)
+    static = next((i for i, part in enumerate(parts) if any(c in part for c in MAGIC)), len(parts) - 1)
+    # key=value directories spelled out in the pattern are still partition columns
+    while static and '=' in parts[static - 1]:
+        static -= 1
+    root = os.sep.join(parts[:static]) or os.curdir
+    return root, sorted(glob.glob(source, recursive=True))
+
+
+def partition_values(path, root):
+    """{key: value} of the key=value directories between `root` and the file."""
+    relative = os.path.relpath(os.path.dirname(path), root)
+    return dict(part.split('=', 1) for part in relative.split(os.sep) if '=' in part)
+
+
+def matches(values, wanted):
+    """
+    Boolean mask of a Series against one filter: a value, a list / set of
+    values, or an inclusive (low, high) tuple (None leaves a side open).
+    Bounds are compared as Timestamps on datetime columns.
+    """
+    like = pd.Timestamp if pd.api.types.is_datetime64_any_dtype(values) else (lambda v: v)
+    if isinstance(wanted, tuple):
+        low, high = wanted
+        mask = np.ones(len(values), dtype=bool)
+        if low is not None:
+            mask &= (values >= like(low)).to_numpy()
+        if high is not None:
+            mask &= (values <= like(high)).to_numpy()
+        return mask
+    if isinstance(wanted, (list, set, frozenset, pd.Index)):
+        return values.isin([like(v) for v in wanted]).to_numpy()
+    return (values == like(wanted)).to_numpy()
+
+
+def _as_text(wanted):
+    """A filter with its values as strings, for comparing with partition directory names."""
+    if isinstance(wanted, tuple):
+        return tuple(None if v is None else str(v) for v in wanted)
+    if isinstance(wanted, (list, set, frozenset, pd.Index)):
+        return [str(v) for v in wanted]
+    return str(wanted)
+
+
+def _typed_key(values, declared):
+    """
+    Partition directory values in their declared dtype; undeclared keys whose
+    values are all numbers (month=8) become numeric, so range filters compare
+    numbers rather than strings. Keys declared 'category' stay text.
+    """
+    if declared == DATE:
+        return pd.to_datetime(values)
+    if declared is not None and declared != 'category':
+        return values.astype(declared)
+    if declared is None:
+        try:
+            return pd.to_numeric(values)
+        except (ValueError, TypeError):
+            pass
+    return values
+
+
+def concat_frames(frames):
+    """
+    One copy per column. Categoricals are unioned (codes remapped) instead of
+    decaying to object when the files saw different levels.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    data = {}
+    for col in frames[0].columns:
+        parts = [frame[col] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            data[col] = pd.Series(union_categoricals(parts, sort_categories=True), name=col)
+        else:
+            data[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data, copy=False)
+
+
+def _parse_group(paths, header, header_line, usecols, dtypes, dates):
+    """
+    Parses a group of files with one read_csv call over their concatenated
+    bodies (per-file parser setup dominates for small files).
+
+    Returns:
+        tuple: (pd.DataFrame, rows per file), or None when the line counts do
+        not add up (quoted newlines, blank lines) and files must be parsed one by one.
+    """
+    buffer, lengths = io.BytesIO(), []
+    for path in paths:
+        with open(path, 'rb') as fh:
+            first, _, body = fh.read().partition(b'\n')
+        if not first and not body:
+            lengths.append(0)
+            continue
+        if first.rstrip(b'\r') != header_line:
+            raise ValueError(f"{path}: header differs from the dataset's ({header_line.decode()})")
+        if body and not body.endswith(b'\n'):
+            body += b'\n'
+        buffer.write(body)
+        lengths.append(body.count(b'\n'))
+    buffer.seek(0)
+    df = pd.read_csv(buffer, header=None, names=header, usecols=usecols, dtype=dtypes, parse_dates=dates)
+    return (df, lengths) if len(df) == sum(lengths) else None
+
+
+def _read_files(paths, keys, header, header_line, usecols, dtypes, dates, row_filters, columns, reduce=None):
+    """
+    Worker: parses a group of files with the resolved schema, appends the
+    partition columns and applies the row filters (then `reduce`, if given).
+
+    Args:
+        keys (dict): {column: (per-file codes or datetime64 values, categories or None)}.
+    """
+    parsed = _parse_group(paths, header, header_line, usecols, dtypes, dates)
+    if parsed is None:
+        frames = [pd.read_csv(path, usecols=usecols, dtype=dtypes, parse_dates=dates) for path in paths]
+        parsed = concat_frames(frames).reset_index(drop=True), [len(frame) for frame in frames]
+    df, lengths = parsed
+    for col, (values, categories) in keys.items():
+        repeated = np.repeat(values, lengths)
+        df[col] = repeated if categories is None else pd.Categorical.from_codes(repeated, categories)
+    if row_filters:
+        keep = np.ones(len(df), dtype=bool)
+        for col, wanted in row_filters.items():
+            keep &= matches(df[col], wanted)
+        df = df[keep].reset_index(drop=True)
+    return df[columns] if reduce is None else reduce(df[columns])
+
+
+def read_partitioned(source, filters=None, columns=None, schema=None, workers=None, groups_per_worker=4,
+                     reduce=None):
+    """
+    Loads a multi-file dataset in one call.
+
+    - Partition pruning: filters on partition keys drop whole files before any parsing.
+    - Projection: only the requested (and filtered) columns are parsed.
+    - The header and dtypes are resolved once from the first file; the other
+      files only have their header line compared against it.
+    - Files are parsed in groups, one read_csv call per group, in a process
+      pool; the groups are concatenated once at the end.
+
+    Args:
+        source (str): Directory (Hive `key=value` layout) or glob pattern.
+        filters (dict, optional): {column: value | [values] | (low, high)};
+            partition keys prune files, other columns filter rows.
+        columns (list, optional): Columns to return (file and partition columns).
+        schema (dict, optional): Declared dtypes ('category', DATE, ...); partition
+            keys pick up the declared column whose name matches case-insensitively
+            (branch=A -> Branch).
+        workers (int, optional): Parser processes (default os.cpu_count(); 1 parses inline).
+        reduce (callable, optional): Applied to each group's frame inside the
+            worker (e.g. sketches.sketch_frame); the list of its results is
+            returned instead of the concatenated frame.
+
+    Returns:
+        tuple: (pd.DataFrame or list of reduce() results, files read, files pruned).
+    """
+    filters, schema = dict(filters or {}), dict(schema or {})
+    root, files = discover(source)
+    if not files:
+        raise FileNotFoundError(f"No CSV files match {source}")
+    # Schema resolution, once: header of the first file plus the declared dtypes
+    header = list(pd.read_csv(files[0], nrows=0).columns)
+    with open(files[0], 'rb') as fh:
+        header_line = fh.readline().rstrip(b'\r\n')
+
+    # Partition table: one row per file, key columns named and typed by the schema
+    declared = {c.lower(): c for c in schema}
+    raw_keys = pd.DataFrame([partition_values(path, root) for path in files], index=range(len(files)))
+    raw_keys.columns = [declared.get(key.lower(), key) for key in raw_keys.columns]
+    for col in raw_keys.columns:
+        raw_keys[col] = _typed_key(raw_keys[col], schema.get(col))
+    typed = [c for c in raw_keys.columns if not pd.api.types.is_object_dtype(raw_keys[c])
+             and not pd.api.types.is_string_dtype(raw_keys[c])]
+
+    keep = np.ones(len(files), dtype=bool)
+    for col in [c for c in filters if c in raw_keys.columns]:
+        wanted = filters.pop(col)
+        keep &= matches(raw_keys[col], wanted if col in typed else _as_text(wanted))
+    pruned = int((~keep).sum())
+    files, raw_keys = [f for f, k in zip(files, keep) if k], raw_keys[keep].reset_index(drop=True)
+
+    partition_cols = [c for c in raw_keys.columns if c not in header]
+    columns = list(columns) if columns is not None else header + partition_cols
+    unknown = [c for c in columns + list(filters) if c not in header and c not in partition_cols]
+    if unknown:
+        raise KeyError(f"Columns not found in {source}: {unknown}")
+    usecols = [c for c in header if c in columns or c in filters]
+    dtypes = {c: t for c, t in schema.items() if c in usecols and t != DATE}
+    dates = [c for c, t in schema.items() if c in usecols and t == DATE]
+
+    keys = {}
+    for col in [c for c in partition_cols if c in columns]:
+        if schema.get(col) == DATE:
+            keys[col] = (raw_keys[col].to_numpy(dtype=DATE), None)
+        elif col in typed:
+            keys[col] = (raw_keys[col].to_numpy(), None)
+        else:
+            codes, categories = pd.factorize(raw_keys[col], sort=True)
+            keys[col] = (codes, pd.Index(categories))
+
+    with stage(f"read_partitioned:{os.path.basename(os.path.normpath(root))}") as rec:
+        if not files and reduce is not None:
+            result = []
+        elif not files:
+            result = pd.DataFrame({c: pd.Series(dtype=schema.get(c, object)) for c in columns})
+        else:
+            workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+            bounds = np.array_split(np.arange(len(files)), min(len(files), workers * groups_per_worker))
+            shared = (header, header_line, usecols, dtypes, dates, filters, columns, reduce)
+            args = ([[files[i] for i in b] for b in bounds],
+                    [{c: (v[b], cats) for c, (v, cats) in keys.items()} for b in bounds])
+            args += tuple([value] * len(bounds) for value in shared)
+            if workers == 1:
+                parts = list(map(_read_files, *args))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    parts = list(pool.map(_read_files, *args))
+            result = concat_frames(parts) if reduce is None else parts
+        if reduce is None:
+            rec['rows'] = len(result)
+    return result, len(files), pruned
@@ -0,0 +1,328 @@
+"""
+Module: pipeline.py
+Description: Task-graph runner executing independent projects in a process pool.
+"""
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from src.profiling import PROFILER
+from src.rendering import get_target
+
+
+class Task:
+    """
+    One unit of work in the graph.
+
+    Args:
+        name (str): Unique task name.
+        func (callable): Module-level function (must be picklable for the pool).
+        kwargs (dict): Keyword arguments passed to `func`. A 'workers': None
+            entry is filled with the run's per-task process budget, so tasks
+            that start their own pools do not oversubscribe the machine.
+        inputs (list): Files the task reads.
+        outputs (list): Files the task writes.
+        code (list): Source files whose changes invalidate the outputs.
+        deps (list): Names of tasks that must finish first.
+        run_if_deps_failed (bool): Run even when a dependency failed
+            (e.g. the PDF, which marks missing figures instead of aborting).
+    """
+
+    def __init__(self, name, func, kwargs=None, inputs=(), outputs=(), code=(), deps=(),
+                 run_if_deps_failed=False):
+        self.name = name
+        self.func = func
+        self.kwargs = kwargs or {}
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.code = list(code)
+        self.deps = list(deps)
+        self.run_if_deps_failed = run_if_deps_failed
+
+
+class TaskResult:
+    def __init__(self, name, status, elapsed=0.0, error=None, details=None):
+        self.name = name
+        self.status = status  # 'ok' | 'cached' | 'failed' | 'skipped'
+        self.elapsed = elapsed
+        self.error = error
+        self.details = details
+
+    def __repr__(self):
+        return f"TaskResult({self.name!r}, {self.status}, {self.elapsed:.2f}s)"
+
+
+def _execute(name, func, kwargs, deep_profile=False, profile_dir=None):
+    """
+    Runs inside the worker: never raises, so one failure cannot hide the others.
+    The task's profiling records are returned so the parent can merge them.
+    """
+    PROFILER.configure(deep=deep_profile, out_dir=profile_dir)
+    mark = PROFILER.mark()
+    start = time.perf_counter()
+    try:
+        with PROFILER.stage(f"task:{name}"):
+            func(**kwargs)
+        outcome = ('ok', time.perf_counter() - start, None, None)
+    except Exception as e:
+        outcome = ('failed', time.perf_counter() - start, f"{type(e).__name__}: {e}", traceback.format_exc())
+    return outcome + (PROFILER.drain(mark),)
+
+
+class TaskGraph:
+    def __init__(self):
+        self.tasks = {}
+
+    def add(self, task):
+        if task.name in self.tasks:
+            raise ValueError(f"Duplicate task: {task.name}")
+        missing = [d for d in task.deps if d not in self.tasks]
+        if missing:
+            raise ValueError(f"Task {task.name} depends on unknown tasks: {missing}")
+        self.tasks[task.name] = task
+        return task
+
+    def subset(self, names):
+        """New graph with only `names`; dependencies on tasks left out are dropped."""
+        unknown = [n for n in names if n not in self.tasks]
+        if unknown:
+            raise ValueError(f"Unknown tasks: {unknown}; choose from {list(self.tasks)}")
+        graph = TaskGraph()
+        for name, task in self.tasks.items():
+            if name in names:
+                kept = Task(task.name, task.func, task.kwargs, task.inputs, task.outputs, task.code,
+                            [d for d in task.deps if d in names], task.run_if_deps_failed)
+                graph.add(kept)
+        return graph
+
+    def _ready(self, pending, results):
+        """Splits pending tasks into runnable now and skipped (a hard dependency failed)."""
+        ready, skipped = [], []
+        for name in pending:
+            task = self.tasks[name]
+            if not all(d in results for d in task.deps):
+                continue
+            failed = [d for d in task.deps if results[d].status not in ('ok', 'cached')]
+            if failed and not task.run_if_deps_failed:
+                skipped.append((name, failed))
+            else:
+                ready.append(name)
+        return ready, skipped
+
+    def run(self, workers=None, manifest=None, force=False):
+        """
+        Executes the graph; independent tasks run concurrently.
+
+        Args:
+            workers (int, optional): Pool size (defaults to CPU count).
+                workers=1 runs every task inline in this process. The CPUs are
+                split between the concurrent tasks (see Task kwargs).
+                A worker that dies (OOM kill, native crash) fails the tasks it
+                was running; the pool is rebuilt and the graph carries on.
+            manifest (BuildManifest, optional): Skips tasks whose outputs are
+                up to date and records the ones that ran.
+            force (bool): Run every task even if the manifest says it is fresh.
+
+        Returns:
+            dict: {task name: TaskResult}
+        """
+        workers = workers or os.cpu_count() or 1
+        profile_opts = (PROFILER.deep, PROFILER.out_dir)
+        pending = list(self.tasks)
+        results = {}
+        budget = max(1, (os.cpu_count() or 1) // max(1, min(workers, len(pending))))
+        print(f"   [Pipeline] Running {len(pending)} tasks on {workers} worker(s), "
+              f"{budget} process(es) per task")
+
+        def task_kwargs(task):
+            if task.kwargs.get('workers', 0) is None:
+                return {**task.kwargs, 'workers': budget}
+            return task.kwargs
+
+        def settle(name, outcome):
+            status, elapsed, error, details, records = outcome
+            PROFILER.extend(records)
+            results[name] = TaskResult(name, status, elapsed, error, details)
+            pending.remove(name)
+            if status == 'ok' and manifest is not None:
+                manifest.record(self.tasks[name])
+
+        def fresh(name):
+            """Settles an up-to-date task without running it."""
+            if manifest is not None and not force and manifest.is_fresh(self.tasks[name]):
+                settle(name, ('cached', 0.0, None, None, []))
+                return True
+            return False
+
+        def skip_blocked():
+            while True:
+                _, skipped = self._ready(pending, results)
+                if not skipped:
+                    return
+                for name, failed in skipped:
+                    settle(name, ('skipped', 0.0, f"upstream failed: {', '.join(failed)}", None, []))
+
+        if workers == 1:
+            while pending:
+                skip_blocked()
+                ready, _ = self._ready(pending, results)
+                for name in ready:
+                    if fresh(name):
+                        continue
+                    task = self.tasks[name]
+                    settle(name, _execute(name, task.func, task_kwargs(task), *profile_opts))
+            self._summarize(results)
+            return results
+
+        running, started = {}, {}
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            while pending:
+                skip_blocked()
+                ready, _ = self._ready(pending, results)
+                for name in ready:
+                    if name not in running.values() and not fresh(name):
+                        task = self.tasks[name]
+                        running[pool.submit(_execute, name, task.func, task_kwargs(task), *profile_opts)] = name
+                        started[name] = time.perf_counter()
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except BrokenProcessPool as e:
+                        # _execute never raises, so a worker process died under this task
+                        broken = True
+                        outcome = ('failed', time.perf_counter() - started[name],
+                                   f"worker process died: {e}", None, [])
+                    settle(name, outcome)
+                if broken:
+                    # Every task still in flight went down with the pool
+                    for future, name in running.items():
+                        settle(name, ('failed', time.perf_counter() - started[name],
+                                      "worker pool broken by another task", None, []))
+                    running.clear()
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=workers)
+        finally:
+            pool.shutdown()
+        self._summarize(results)
+        return results
+
+    def _summarize(self, results):
+        for result in results.values():
+            icon = {'ok': '✓', 'cached': '=', 'failed': '❌', 'skipped': '⏭'}[result.status]
+            line = f"   [Pipeline] {icon} {result.name:<20} {result.status:<8} {result.elapsed:6.2f}s"
+            if result.error:
+                line += f"  {result.error}"
+            print(line)
+            if result.details:
+                print(result.details)
+
+
+# --- Portfolio graph ---
+# Task functions import their project modules when they run, so the parent
+# process (and a single-project run) never loads the libraries it does not use.
+PROJECTS = ['retail', 'education', 'healthcare', 'finance', 'weather', 'housing']
+
+
+def _run_retail(**kwargs):
+    from src.retail_project import run_retail_project
+    run_retail_project(**kwargs)
+
+
+def _run_deep_dive(method, raw_dir, output_dir, target='print', plots=True, sketch=False, workers=None):
+    from src.data_loader import DataLoader
+    from src.extended_projects import ExtendedProjectEngine
+    engine = ExtendedProjectEngine(DataLoader(raw_dir), output_dir, target, plots, sketch, workers)
+    getattr(engine, method)()
+
+
+def _run_report(**kwargs):
+    from src.report_generator import generate_pdf_report
+    generate_pdf_report(**kwargs)
+
+
+def _sources(*modules):
+    """Paths of src/ modules, used as the code version of a task."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    return [os.path.join(here, f"{m}.py") for m in modules]
+
+
+def build_portfolio_graph(raw_dir='data/raw', output_dir=None, stream=False, chunksize=100_000,
+                          target='print', projects=None, plots=True, sketch=False):
+    """
+    Declares every project with its inputs/outputs; the PDF runs after all figure tasks.
+
+    Non-print render targets (e.g. 'preview') write to reports/<target>/ and
+    do not rebuild the PDF.
+
+    Args:
+        projects (list, optional): Task names to keep (PROJECTS and/or 'report').
+            The PDF is only built when it is listed, or when no selection is given.
+        plots (bool): False runs the numbers only: no figures, no PDF, and the
+            tasks declare no outputs.
+        sketch (bool): Deep dives approximate their distribution metrics with
+            mergeable sketches over the loaded data (src/sketches.py).
+    """
+    render_target = get_target(target)
+    if output_dir is None:
+        output_dir = 'reports/figures' if render_target.name == 'print' else f"reports/{render_target.name}"
+    graph = TaskGraph()
+    raw = lambda f: os.path.join(raw_dir, f)
+    _figures = lambda *names: [os.path.join(output_dir, render_target.filename(n)) for n in names]
+
+    graph.add(Task(
+        'retail', _run_retail,
+        kwargs={'raw_dir': raw_dir, 'output_dir': output_dir, 'stream': stream, 'chunksize': chunksize,
+                'target': target, 'plots': plots, 'workers': None},
+        inputs=[raw('supermarket_sales.csv')],
+        outputs=_figures('01_retail_heatmap.png', '01_retail_forecast.png', '01_retail_spend_ci.png'),
+        code=_sources('retail_project', 'data_loader', 'cache', 'features', 'statistics', 'stat_report',
+                      'forecasting', 'backtesting', 'hierarchical', 'model_registry',
+                      'resampling', 'visualization', 'streaming', 'rendering', 'retail_cube', 'sketches'),
+    ))
+    deep_dives = [
+        ('education', 'run_education_deep_dive', 'student_performance.csv',
+         ['02_edu_regression.png', '02_edu_gender_dist.png', '02_edu_method_perf.png'], ['education_engine']),
+        ('healthcare', 'run_healthcare_deep_dive', 'healthcare_covid.csv',
+         ['03_health_curve.png', '03_health_cumulative.png', '03_health_mortality.png'], ['epidemiology']),
+        ('finance', 'run_finance_deep_dive', 'finance_stocks.csv',
+         ['04_fin_price_trend.png', '04_fin_risk_dist.png', '04_fin_vol_price.png'], ['finance_engine']),
+        ('weather', 'run_weather_deep_dive', 'weather_data.csv',
+         ['05_weath_temp_cycle.png', '05_weath_rainfall.png', '05_weath_correlation.png'], ['climate_engine']),
+        ('housing', 'run_housing_deep_dive', 'house_prices.csv',
+         ['06_house_price_area.png', '06_house_actual_vs_pred.png', '06_house_location_premium.png'], ['valuation']),
+    ]
+    for name, method, csv, figures, engines in deep_dives:
+        graph.add(Task(
+            name, _run_deep_dive,
+            kwargs={'method': method, 'raw_dir': raw_dir, 'output_dir': output_dir, 'target': target,
+                    'plots': plots, 'sketch': sketch, 'workers': None},
+            inputs=[raw(csv)],
+            outputs=_figures(*figures),
+            code=_sources('extended_projects', 'data_loader', 'cache', 'rendering', 'statistics',
+                          'resampling', 'streaming', 'sketches', *engines),
+        ))
+
+    if render_target.name == 'print' and plots:
+        figure_tasks = [t for t in graph.tasks.values()]
+        graph.add(Task(
+            'report', _run_report,
+            inputs=[path for t in figure_tasks for path in t.outputs],
+            outputs=['Nexus_Portfolio_Report.pdf'],
+            code=_sources('report_generator', 'report_builder', 'cache'),
+            deps=[t.name for t in figure_tasks],
+            run_if_deps_failed=True,
+        ))
+    if not plots:
+        for task in graph.tasks.values():
+            task.outputs = []
+    if projects and 'report' in projects and 'report' not in graph.tasks:
+        raise ValueError("The PDF report is only built with plots on and the 'print' target")
+    return graph.subset(projects) if projects else graph
@@ -0,0 +1,199 @@
+"""
+Module: profiling.py
+Description: Lightweight stage instrumentation (wall/CPU time, peak RSS, rows, I/O bytes).
+"""
+import cProfile
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _io_counters():
+    """(bytes read, bytes written) for this process, if the OS exposes them."""
+    try:
+        with open('/proc/self/io') as fh:
+            fields = dict(line.split(': ') for line in fh.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB; None when the platform gives no way to read it."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    # Windows exposes the peak working set; elsewhere the current RSS is the best available
+    return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+
+
+def format_mb(value, width=8):
+    """A MB figure for the console, or n/a where peak RSS is unavailable."""
+    return f"{value:{width}.1f}" if value is not None else f"{'n/a':>{width}}"
+
+
+class Profiler:
+    """
+    Collects one record per `stage(...)` block.
+
+    Always-on mode costs a few syscalls per stage. With `deep=True` the
+    outermost stages also run under cProfile (one .prof file each, written to
+    `out_dir`) and every stage reports its tracemalloc peak.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.deep = False
+        self.out_dir = 'reports/profile'
+        self._stack = []
+        self._lock = threading.Lock()
+
+    def configure(self, deep=False, out_dir=None):
+        self.deep = deep
+        if out_dir:
+            self.out_dir = out_dir
+        if deep:
+            os.makedirs(self.out_dir, exist_ok=True)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        return self
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Times the enclosed block. The yielded dict can be updated by the caller,
+        e.g. `rec['rows'] = len(df)` once the row count is known.
+        """
+        rec = {'name': name, 'rows': rows, 'pid': os.getpid(), 'depth': len(self._stack)}
+        read0, written0 = _io_counters()
+        profile = None
+        if self.deep:
+            if self._stack:
+                # Keep the parent's peak so far before resetting for this stage
+                parent = self._stack[-1]
+                parent['py_peak_bytes'] = max(parent.get('py_peak_bytes', 0), tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            if not self._stack:
+                profile = cProfile.Profile()
+                profile.enable()
+        self._stack.append(rec)
+        rec['start'] = time.time()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rec['wall_s'] = time.perf_counter() - wall0
+            rec['cpu_s'] = time.process_time() - cpu0
+            peak = _peak_rss_mb()
+            rec['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+            read1, written1 = _io_counters()
+            if read0 is not None:
+                rec['bytes_read'] = read1 - read0
+                rec['bytes_written'] = written1 - written0
+            self._stack.pop()
+            if self.deep:
+                peak = max(tracemalloc.get_traced_memory()[1], rec.get('py_peak_bytes', 0))
+                rec['py_peak_bytes'] = peak
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent['py_peak_bytes'] = max(parent.get('py_peak_bytes', 0), peak)
+            if profile is not None:
+                profile.disable()
+                safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+                rec['cprofile'] = os.path.join(self.out_dir, f"{safe}.{os.getpid()}.prof")
+                profile.dump_stats(rec['cprofile'])
+            with self._lock:
+                self.records.append(rec)
+
+    def mark(self):
+        """Position to pass to `drain` later (forked workers inherit the parent's records)."""
+        return len(self.records)
+
+    def drain(self, mark=0):
+        """Returns and removes the records collected since `mark` (to ship them out of workers)."""
+        with self._lock:
+            records = self.records[mark:]
+            del self.records[mark:]
+        return records
+
+    def extend(self, records):
+        with self._lock:
+            self.records.extend(records)
+
+    def write_json(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        stages = sorted(self.records, key=lambda r: r['start'])
+        with open(path, 'w') as fh:
+            json.dump({'created': time.time(), 'stages': stages}, fh, indent=1)
+
+    def write_chrome_trace(self, path):
+        """Writes the records as complete ('X') events for chrome://tracing / Perfetto."""
+        events = []
+        for rec in self.records:
+            args = {k: v for k, v in rec.items() if k not in ('name', 'start', 'wall_s', 'pid')}
+            events.append({
+                'name': rec['name'], 'ph': 'X', 'pid': rec['pid'], 'tid': rec['pid'],
+                'ts': rec['start'] * 1e6, 'dur': rec['wall_s'] * 1e6, 'args': args,
+            })
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as fh:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fh)
+
+    def summary(self):
+        """All stages as printable lines, indented by nesting depth."""
+        lines = []
+        for rec in sorted(self.records, key=lambda r: r['start']):
+            indent = '  ' * rec['depth']
+            rows = f"{rec['rows']:>12,}" if rec.get('rows') is not None else ' ' * 12
+            lines.append(f"   [Profile] {indent}{rec['name']:<{36 - len(indent)}} "
+                         f"{rec['wall_s']:7.3f}s wall {rec['cpu_s']:7.3f}s cpu "
+                         f"{rows} rows {format_mb(rec['peak_rss_mb'])} MB rss")
+        return '\n'.join(lines)
+
+
+PROFILER = Profiler()
+
+
+def stage(name, rows=None):
+    """Shortcut for PROFILER.stage(...)."""
+    return PROFILER.stage(name, rows)
+
+
+def profiled(name=None, rows=None):
+    """
+    Decorator running the function inside a stage.
+
+    Args:
+        name (str, optional): Stage name (defaults to the function's qualified name).
+        rows (str, optional): 'input' to count rows of the first positional
+            argument, 'output' to count rows of the return value.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with PROFILER.stage(name or func.__qualname__) as rec:
+                if rows == 'input' and args and hasattr(args[0], '__len__'):
+                    rec['rows'] = len(args[0])
+                result = func(*args, **kwargs)
+                if rows == 'output' and hasattr(result, '__len__'):
+                    rec['rows'] = len(result)
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,109 @@
+"""
+Module: rendering.py
+Description: Object-oriented Agg rendering layer shared by all chart producers.
+"""
+import os
+import time
+
+import numpy as np
+
+from src.profiling import stage
+
+
+class RenderTarget:
+    """
+    Output settings for one destination.
+
+    Args:
+        name (str): Target name (also the default sub-folder for non-print targets).
+        dpi (int): Raster resolution.
+        fmt (str): File format / extension ('png', 'jpg', 'svg', ...).
+        fast (bool): Skip expensive statistical overlays (bootstrap CIs) while drawing.
+    """
+
+    def __init__(self, name, dpi, fmt='png', fast=False):
+        self.name = name
+        self.dpi = dpi
+        self.fmt = fmt
+        self.fast = fast
+
+    def filename(self, filename):
+        return f"{os.path.splitext(filename)[0]}.{self.fmt}"
+
+
+TARGETS = {
+    'print': RenderTarget('print', dpi=300),
+    'preview': RenderTarget('preview', dpi=72, fast=True),
+}
+
+
+def get_target(target):
+    return TARGETS[target] if isinstance(target, str) else target
+
+
+class FigureRenderer:
+    """
+    Draws through matplotlib's OO API on a single reused Agg canvas.
+
+    No pyplot state machine is involved, so there is no global current figure
+    and no figure manager bookkeeping per chart. Each saved file is timed.
+    matplotlib itself is imported with the first figure.
+    """
+
+    def __init__(self, output_dir='reports/figures', target='print', figsize=None, binned_threshold=50_000):
+        self.output_dir = output_dir
+        self.target = get_target(target)
+        self.figsize = figsize
+        self.binned_threshold = binned_threshold
+        self.timings = {}
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._figure = None
+        self._started = None
+
+    def new_figure(self, figsize=None):
+        """Returns (fig, ax) on the reused figure, cleared and resized."""
+        import matplotlib as mpl
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        size = figsize or self.figsize or mpl.rcParams['figure.figsize']
+        if self._figure is None:
+            self._figure = Figure(figsize=size)
+            FigureCanvasAgg(self._figure)
+        else:
+            self._figure.clear()
+            self._figure.set_size_inches(size)
+        self._started = time.perf_counter()
+        return self._figure, self._figure.add_subplot()
+
+    def save(self, fig, filename):
+        """Writes the figure for the configured target; returns the elapsed seconds."""
+        filename = self.target.filename(filename)
+        path = os.path.join(self.output_dir, filename)
+        with stage(f"render:{filename}") as rec:
+            # Time spent in seaborn/matplotlib calls between new_figure() and here
+            rec['draw_s'] = time.perf_counter() - (self._started or time.perf_counter())
+            fig.tight_layout()
+            fig.savefig(path, dpi=self.target.dpi, format=self.target.fmt)
+        elapsed = time.perf_counter() - (self._started or time.perf_counter())
+        self.timings[filename] = elapsed
+        self._started = None
+        return elapsed
+
+    def scatter(self, ax, x, y, bins=120, **kwargs):
+        """
+        Scatter plot that switches to a binned 2-D histogram above
+        `binned_threshold` points (rendering millions of markers is the
+        slowest thing Agg can be asked to do).
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        mask = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[mask], y[mask]
+        if len(x) <= self.binned_threshold:
+            return ax.scatter(x, y, **kwargs)
+        counts, xedges, yedges = np.histogram2d(x, y, bins=bins)
+        counts = np.ma.masked_equal(counts.T, 0)
+        mesh = ax.pcolormesh(xedges, yedges, counts, cmap=kwargs.get('cmap', 'viridis'))
+        ax.figure.colorbar(mesh, ax=ax, label='Points per bin')
+        return mesh
@@ -0,0 +1,256 @@
+"""
+Module: report_builder.py
+Description: Manifest-driven PDF builder: cached print-size images, parallel preparation, pages written as they finish.
+"""
+import glob
+import hashlib
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from fpdf import FPDF
+from PIL import Image
+
+from src.cache import file_fingerprint
+from src.profiling import stage
+
+IMAGE_CACHE_VERSION = 1
+PRINT_WIDTH_MM = 190
+
+
+# --- Image preparation ---
+def prepared_path(source, cache_dir, width_px, fmt):
+    """Cache location for one source image at one size/format (content-addressed)."""
+    key = hashlib.blake2b(digest_size=8)
+    key.update(f"{IMAGE_CACHE_VERSION}|{file_fingerprint(source)}|{width_px}|{fmt}".encode())
+    stem = os.path.splitext(os.path.basename(source))[0]
+    ext = 'jpg' if fmt == 'jpeg' else 'png'
+    return os.path.join(cache_dir, f"{stem}-{key.hexdigest()}.{ext}")
+
+
+def prepare_image(source, cache_dir, width_px, fmt='png8'):
+    """
+    Flattens transparency onto white, downsamples to `width_px` and
+    recompresses. fpdf 1.7 decodes RGBA PNGs pixel by pixel in Python,
+    so flattening alone removes most of the build time.
+
+    Args:
+        fmt (str): 'png8' (256-colour palette, smallest for charts), 'png' or 'jpeg'.
+
+    Returns:
+        tuple: (source, prepared path, True if it was already cached)
+    """
+    target = prepared_path(source, cache_dir, width_px, fmt)
+    if os.path.exists(target):
+        return source, target, True
+    with Image.open(source) as im:
+        im = im.convert('RGBA')
+        flat = Image.new('RGB', im.size, 'white')
+        flat.paste(im, mask=im.getchannel('A'))
+    if flat.width > width_px:
+        flat = flat.resize((width_px, round(flat.height * width_px / flat.width)), Image.LANCZOS)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    if fmt == 'png8':
+        flat.quantize(256, dither=Image.Dither.NONE).save(tmp, 'PNG', optimize=True)
+    elif fmt == 'jpeg':
+        flat.save(tmp, 'JPEG', quality=88, optimize=True)
+    else:
+        flat.save(tmp, 'PNG', optimize=True)
+    os.replace(tmp, target)
+    return source, target, False
+
+
+def prepare_images(sources, cache_dir='reports/.image_cache', dpi=200, fmt='png8', workers=None):
+    """
+    Prepares every existing source image (in parallel) for a PRINT_WIDTH_MM
+    wide slot at `dpi`. Returns {source: prepared path}.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    width_px = round(PRINT_WIDTH_MM / 25.4 * dpi)
+    sources = [s for s in dict.fromkeys(sources) if os.path.exists(s)]
+    workers = min(workers or os.cpu_count() or 1, max(len(sources), 1))
+    args = (sources, [cache_dir] * len(sources), [width_px] * len(sources), [fmt] * len(sources))
+    with stage('report:prepare_images', rows=len(sources)):
+        if workers == 1:
+            results = list(map(prepare_image, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(prepare_image, *args))
+    cached = sum(hit for _, _, hit in results)
+    print(f"   [Report] Images: {len(results) - cached} prepared, {cached} from cache ({width_px}px {fmt})")
+    return {source: target for source, target, _ in results}
+
+
+# --- Streaming PDF writer ---
+class _FileBuffer:
+    """
+    Stands in for FPDF.buffer: `+=` writes straight to the file and len()
+    is the byte offset, which is all FPDF uses the buffer for.
+    """
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.offset = 0
+
+    def __iadd__(self, text):
+        data = text.encode('latin1')
+        self.fh.write(data)
+        self.offset += len(data)
+        return self
+
+    def __len__(self):
+        return self.offset
+
+
+class StreamingPDF(FPDF):
+    """
+    FPDF 1.7 keeps every page and image in memory until output(). This
+    subclass writes each page's content stream when the page ends and each
+    image XObject on first use, so memory stays flat as the report grows.
+    Only the small per-page dictionaries are written at the end.
+
+    Limitations (fpdf 1.7 internals): no alias_nb_pages and no links.
+    """
+
+    def __init__(self, path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        self._fh = open(self._tmp_path, 'wb')
+        self.buffer = _FileBuffer(self._fh)
+        self.buffer += f"%PDF-{self.pdf_version}\n"
+        self._content_objects = {}
+
+    def _write_objects(self, func, *args):
+        # _out() appends to the current page while one is open (state 2)
+        state, self.state = self.state, 1
+        try:
+            func(*args)
+        finally:
+            self.state = state
+
+    def _putheader(self):
+        pass  # written when the file was opened
+
+    def _endpage(self):
+        super()._endpage()
+        self._write_objects(self._flush_page, self.page)
+
+    def _flush_page(self, n):
+        content = self.pages[n].encode('latin1')
+        if self.compress:
+            content = zlib.compress(content)
+        self._newobj()
+        self._content_objects[n] = self.n
+        self._out(f"<<{'/Filter /FlateDecode ' if self.compress else ''}/Length {len(content)}>>")
+        self._putstream(content)
+        self._out('endobj')
+        self.pages[n] = ''
+
+    def image(self, name, *args, **kwargs):
+        super().image(name, *args, **kwargs)
+        info = self.images[name]
+        if 'data' in info:
+            self._write_objects(self._putimage, info)
+            info.pop('data')
+            info.pop('smask', None)
+
+    def _putimages(self):
+        pass  # every image was written on first use
+
+    def _putpages(self):
+        w_pt, h_pt = (self.fw_pt, self.fh_pt) if self.def_orientation == 'P' else (self.fh_pt, self.fw_pt)
+        kids = []
+        for n in range(1, self.page + 1):
+            self._newobj()
+            kids.append(self.n)
+            self._out('<</Type /Page')
+            self._out('/Parent 1 0 R')
+            if n in self.orientation_changes:
+                self._out('/MediaBox [0 0 %.2f %.2f]' % (h_pt, w_pt))
+            self._out('/Resources 2 0 R')
+            if self.pdf_version > '1.3':
+                self._out('/Group <</Type /Group /S /Transparency /CS /DeviceRGB>>')
+            self._out(f'/Contents {self._content_objects[n]} 0 R>>')
+            self._out('endobj')
+        self.offsets[1] = len(self.buffer)
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ' '.join(f'{k} 0 R' for k in kids) + ']')
+        self._out(f'/Count {self.page}')
+        self._out('/MediaBox [0 0 %.2f %.2f]' % (w_pt, h_pt))
+        self._out('>>')
+        self._out('endobj')
+
+    def output(self, name='', dest=''):
+        """Finishes the document and moves it into place (the path given at construction)."""
+        if self.state < 3:
+            self.close()
+        self._fh.close()
+        os.replace(self._tmp_path, self.path)
+        return ''
+
+    def discard(self):
+        """Closes and removes the partial .tmp file (no-op once output() has run)."""
+        self._fh.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+# --- Manifest ---
+def load_manifest(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def manifest_figures(manifest, figures_dir):
+    """
+    Expands each section's figures into [(path, caption)]. Entries are
+    {"file", "caption"} or {"glob", "caption"}; a glob caption may use
+    {n} (1-based index) and {name} (file stem).
+    """
+    sections = []
+    for section in manifest['sections']:
+        entries = []
+        for fig in section.get('figures', []):
+            if 'glob' in fig:
+                for n, path in enumerate(sorted(glob.glob(os.path.join(figures_dir, fig['glob']))), 1):
+                    stem = os.path.splitext(os.path.basename(path))[0]
+                    entries.append((path, fig.get('caption', '{name}').format(n=n, name=stem)))
+            else:
+                entries.append((os.path.join(figures_dir, fig['file']), fig['caption']))
+        sections.append(entries)
+    return sections
+
+
+def build_report(pdf, manifest, figures_dir='reports/figures', cache_dir='reports/.image_cache',
+                 dpi=200, fmt='png8', workers=None):
+    """
+    Renders a manifest onto `pdf` (a StreamingPDF with chapter_title /
+    chapter_body / add_image) and writes it. On failure the partial file is
+    removed and no PDF is written.
+
+    Manifest layout: {"cover": {...}, "sections": [{"title", "body",
+    "new_page", "figures": [...]}, ...]}.
+    """
+    try:
+        figures = manifest_figures(manifest, figures_dir)
+        prepared = prepare_images([path for entries in figures for path, _ in entries], cache_dir, dpi, fmt, workers)
+
+        with stage('report:write_pdf', rows=len(prepared)):
+            if 'cover' in manifest:
+                pdf.cover(**manifest['cover'])
+            for section, entries in zip(manifest['sections'], figures):
+                if section.get('new_page', True) or pdf.page == 0:
+                    pdf.add_page()
+                pdf.chapter_title(section['title'])
+                if section.get('body'):
+                    pdf.chapter_body(section['body'])
+                for path, caption in entries:
+                    # Missing figures keep the original red "Image missing" note
+                    pdf.add_image(prepared.get(path, path), caption)
+            pdf.output()
+    finally:
+        pdf.discard()
+    return pdf.path
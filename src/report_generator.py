@@ -3,11 +3,13 @@ Module: report_generator.py
 Description: Generates a COMPLETE documentation PDF.
 Fixes: Handles Unicode errors by stripping unsupported characters.
 """
-from fpdf import FPDF
 import os
 from datetime import datetime
 
-class PDFReport(FPDF):
+from src.profiling import profiled
+from src.report_builder import StreamingPDF, build_report, load_manifest
+
+class PDFReport(StreamingPDF):
     def header(self):
         self.set_font('Arial', 'B', 15)
         # Use simple text, no emojis
@@ -30,6 +32,16 @@ class PDFReport(FPDF):
         sanitized = text.encode('latin-1', 'replace').decode('latin-1')
         self.multi_cell(w, h, sanitized, border, align, fill)
 
+    def cover(self, title, subtitle):
+        self.add_page()
+        self.set_font('Arial', 'B', 24)
+        self.cell(0, 40, '', 0, 1)
+        self.safe_cell(0, 20, title, 0, 1, 'C')
+        self.set_font('Arial', '', 14)
+        self.safe_cell(0, 10, subtitle, 0, 1, 'C')
+        self.safe_cell(0, 10, f'Date: {datetime.now().strftime("%Y-%m-%d")}', 0, 1, 'C')
+        self.ln(20)
+
     def chapter_title(self, title):
         self.set_font('Arial', 'B', 12)
         self.set_fill_color(200, 220, 255)
@@ -53,104 +65,135 @@ class PDFReport(FPDF):
             self.safe_cell(0, 10, f"Image missing: {image_path}", 0, 1)
             self.set_text_color(0, 0, 0)
 
-def generate_pdf_report():
+# Sections and figures of the report; a JSON file with the same layout can
+# be passed to generate_pdf_report(manifest_path=...). "new_page": false
+# continues on the current page.
+DEFAULT_MANIFEST = {
+    'cover': {
+        'title': 'Nexus Analytics Portfolio',
+        'subtitle': 'Full Internship Documentation (Task 2)',
+    },
+    'sections': [
+        {
+            'title': 'Project Overview',
+            'new_page': False,
+            'body': (
+                "The Nexus Retail Analytics System is a production-grade Python application designed to process, analyze, "
+                "and visualize data across 6 distinct domains: Retail, Education, Healthcare, Finance, Weather, and Real Estate.\n\n"
+                "Unlike basic scripts, this project uses a modular architecture to ensure scalability and reproducibility. "
+                "It features automated data pipelines, statistical validation (T-Tests, ANOVA), and Machine Learning forecasting models."
+            ),
+        },
+        {
+            'title': '1. Setup & Installation Instructions',
+            'body': (
+                "Prerequisites: Python 3.8+, pip, git.\n\n"
+                "Step 1: Clone the Repository\n"
+                "   git clone https://github.com/priya-anshu/Nexus-Analytics-Portfolio\n"
+                "   cd Nexus-Analytics-Portfolio\n\n"
+                "Step 2: Install Dependencies\n"
+                "   pip install -r requirements.txt\n\n"
+                "Step 3: Run the Application\n"
+                "   python main.py\n\n"
+                "Note: The system automatically generates synthetic data for Projects 2-6 if CSV files are missing."
+            ),
+        },
+        {
+            'title': '2. Code Structure',
+            'new_page': False,
+            'body': (
+                "The project follows a 'Headless' architecture suitable for production deployment:\n\n"
+                "data/raw/             -> Input CSV files (Immutable)\n"
+                "reports/figures/      -> Generated Visualization Assets\n"
+                "src/                  -> Source Code Modules\n"
+                "   data_loader.py    -> Data Ingestion Engine\n"
+                "   features.py       -> Feature Engineering Logic\n"
+                "   forecasting.py    -> ML Sales Prediction Model\n"
+                "   statistics.py     -> Statistical Testing Suite\n"
+                "   extended_projects.py -> Logic for Projects 2-6\n"
+                "   report_generator.py  -> PDF Documentation Engine\n"
+                "main.py               -> Master Execution Script\n"
+                "README.md             -> GitHub Documentation"
+            ),
+        },
+        {
+            'title': '3. Technical Requirements Met',
+            'new_page': False,
+            'body': (
+                "- [x] 6 Distinct Projects: Retail, Education, Healthcare, Finance, Weather, Housing.\n"
+                "- [x] Data Manipulation: Used Pandas for cleaning, merging, and pivoting.\n"
+                "- [x] Visualizations: Generated 15+ Charts (Heatmaps, Regressions, Area Plots).\n"
+                "- [x] Business Insights: Derived actionable metrics (Volatilty, Recovery Rates, P-Values).\n"
+                "- [x] Professional Packaging: Auto-generated PDF documentation and organized GitHub repo."
+            ),
+        },
+        {
+            'title': '4. Project 1: Retail Analytics (Flagship)',
+            'body': "Objective: Forecast revenue and analyze customer behavior using AI and Statistics.",
+            'figures': [
+                {'file': '01_retail_heatmap.png', 'caption': 'Fig 1.1: Peak Traffic Analysis'},
+                {'file': '01_retail_forecast.png', 'caption': 'Fig 1.2: AI Sales Forecast (Linear Regression)'},
+                {'file': '01_retail_spend_ci.png', 'caption': 'Fig 1.3: Spend by Customer Type (95% CI)'},
+            ],
+        },
+        {
+            'title': '5. Project 2: Education Analytics',
+            'body': "Objective: Identify factors influencing student exam performance.",
+            'figures': [
+                {'file': '02_edu_regression.png', 'caption': 'Fig 2.1: Study Hours vs Score'},
+                {'file': '02_edu_method_perf.png', 'caption': 'Fig 2.2: Performance by Study Method'},
+            ],
+        },
+        {
+            'title': '6. Project 3: Healthcare Epidemiology',
+            'body': "Objective: Visualize epidemic spread, recovery, and mortality rates.",
+            'figures': [
+                {'file': '03_health_curve.png', 'caption': 'Fig 3.1: Infection vs Recovery Curve'},
+                {'file': '03_health_cumulative.png', 'caption': 'Fig 3.2: Cumulative Caseload'},
+            ],
+        },
+        {
+            'title': '7. Project 4: Financial Analysis',
+            'body': "Objective: Assess market risk and asset volatility.",
+            'figures': [
+                {'file': '04_fin_price_trend.png', 'caption': 'Fig 4.1: Asset Price History'},
+                {'file': '04_fin_risk_dist.png', 'caption': 'Fig 4.2: Risk Distribution Profile'},
+            ],
+        },
+        {
+            'title': '8. Project 5: Weather Patterns',
+            'body': "Objective: Track seasonal climatic changes and correlations.",
+            'figures': [
+                {'file': '05_weath_temp_cycle.png', 'caption': 'Fig 5.1: Annual Temperature Cycle'},
+                {'file': '05_weath_correlation.png', 'caption': 'Fig 5.2: Climatic Variable Correlation'},
+            ],
+        },
+        {
+            'title': '9. Project 6: Real Estate Valuation',
+            'body': "Objective: Value listings from size, age, layout and location with a cross-validated log-price model.",
+            'figures': [
+                {'file': '06_house_price_area.png', 'caption': 'Fig 6.1: Price vs Area by Location'},
+                {'file': '06_house_actual_vs_pred.png', 'caption': 'Fig 6.2: Out-of-Fold Predicted vs Actual Price'},
+                {'file': '06_house_location_premium.png', 'caption': 'Fig 6.3: Price Multiple by Location'},
+            ],
+        },
+    ],
+}
+
+@profiled('generate_pdf_report')
+def generate_pdf_report(manifest_path=None, out_path='Nexus_Portfolio_Report.pdf', figures_dir='reports/figures',
+                        dpi=200, workers=None):
+    """
+    Builds the PDF from a manifest. Figures are downsampled to `dpi` at the
+    printed width once and cached under reports/.image_cache/; pages are
+    written to disk as they are finished.
+    """
     print("📄 GENERATING COMPREHENSIVE DOCUMENTATION PDF...")
-    pdf = PDFReport()
+    manifest = load_manifest(manifest_path) if manifest_path else DEFAULT_MANIFEST
+    pdf = PDFReport(out_path)
     pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # --- PAGE 1: TITLE & OVERVIEW ---
-    pdf.add_page()
-    pdf.set_font('Arial', 'B', 24)
-    pdf.cell(0, 40, '', 0, 1)
-    pdf.safe_cell(0, 20, 'Nexus Analytics Portfolio', 0, 1, 'C')
-    pdf.set_font('Arial', '', 14)
-    pdf.safe_cell(0, 10, 'Full Internship Documentation (Task 2)', 0, 1, 'C')
-    pdf.safe_cell(0, 10, f'Date: {datetime.now().strftime("%Y-%m-%d")}', 0, 1, 'C')
-    pdf.ln(20)
-    
-    pdf.chapter_title('Project Overview')
-    pdf.chapter_body(
-        "The Nexus Retail Analytics System is a production-grade Python application designed to process, analyze, "
-        "and visualize data across 5 distinct domains: Retail, Education, Healthcare, Finance, and Weather.\n\n"
-        "Unlike basic scripts, this project uses a modular architecture to ensure scalability and reproducibility. "
-        "It features automated data pipelines, statistical validation (T-Tests, ANOVA), and Machine Learning forecasting models."
-    )
-
-    # --- PAGE 2: TECHNICAL SETUP ---
-    pdf.add_page()
-    pdf.chapter_title('1. Setup & Installation Instructions')
-    pdf.chapter_body(
-        "Prerequisites: Python 3.8+, pip, git.\n\n"
-        "Step 1: Clone the Repository\n"
-        "   git clone https://github.com/priya-anshu/Nexus-Analytics-Portfolio\n"
-        "   cd Nexus-Analytics-Portfolio\n\n"
-        "Step 2: Install Dependencies\n"
-        "   pip install -r requirements.txt\n\n"
-        "Step 3: Run the Application\n"
-        "   python main.py\n\n"
-        "Note: The system automatically generates synthetic data for Projects 2-5 if CSV files are missing."
-    )
-
-    pdf.chapter_title('2. Code Structure')
-    pdf.chapter_body(
-        "The project follows a 'Headless' architecture suitable for production deployment:\n\n"
-        "data/raw/             -> Input CSV files (Immutable)\n"
-        "reports/figures/      -> Generated Visualization Assets\n"
-        "src/                  -> Source Code Modules\n"
-        "   data_loader.py    -> Data Ingestion Engine\n"
-        "   features.py       -> Feature Engineering Logic\n"
-        "   forecasting.py    -> ML Sales Prediction Model\n"
-        "   statistics.py     -> Statistical Testing Suite\n"
-        "   extended_projects.py -> Logic for Projects 2-5\n"
-        "   report_generator.py  -> PDF Documentation Engine\n"
-        "main.py               -> Master Execution Script\n"
-        "README.md             -> GitHub Documentation"
-    )
-
-    pdf.chapter_title('3. Technical Requirements Met')
-    pdf.chapter_body(
-        "- [x] 5 Distinct Projects: Retail, Education, Healthcare, Finance, Weather.\n"
-        "- [x] Data Manipulation: Used Pandas for cleaning, merging, and pivoting.\n"
-        "- [x] Visualizations: Generated 15+ Charts (Heatmaps, Regressions, Area Plots).\n"
-        "- [x] Business Insights: Derived actionable metrics (Volatilty, Recovery Rates, P-Values).\n"
-        "- [x] Professional Packaging: Auto-generated PDF documentation and organized GitHub repo."
-    )
-
-    # --- PAGE 3+: VISUAL EVIDENCE ---
-    pdf.add_page()
-    pdf.chapter_title('4. Project 1: Retail Analytics (Flagship)')
-    pdf.chapter_body("Objective: Forecast revenue and analyze customer behavior using AI and Statistics.")
-    pdf.add_image('reports/figures/01_retail_heatmap.png', 'Fig 1.1: Peak Traffic Analysis')
-    pdf.add_image('reports/figures/01_retail_forecast.png', 'Fig 1.2: AI Sales Forecast (Linear Regression)')
-
-    pdf.add_page()
-    pdf.chapter_title('5. Project 2: Education Analytics')
-    pdf.chapter_body("Objective: Identify factors influencing student exam performance.")
-    pdf.add_image('reports/figures/02_edu_regression.png', 'Fig 2.1: Study Hours vs Score')
-    pdf.add_image('reports/figures/02_edu_method_perf.png', 'Fig 2.2: Performance by Study Method')
-
-    pdf.add_page()
-    pdf.chapter_title('6. Project 3: Healthcare Epidemiology')
-    pdf.chapter_body("Objective: Visualize epidemic spread, recovery, and mortality rates.")
-    pdf.add_image('reports/figures/03_health_curve.png', 'Fig 3.1: Infection vs Recovery Curve')
-    pdf.add_image('reports/figures/03_health_cumulative.png', 'Fig 3.2: Cumulative Caseload')
-
-    pdf.add_page()
-    pdf.chapter_title('7. Project 4: Financial Analysis')
-    pdf.chapter_body("Objective: Assess market risk and asset volatility.")
-    pdf.add_image('reports/figures/04_fin_price_trend.png', 'Fig 4.1: Asset Price History')
-    pdf.add_image('reports/figures/04_fin_risk_dist.png', 'Fig 4.2: Risk Distribution Profile')
-
-    pdf.add_page()
-    pdf.chapter_title('8. Project 5: Weather Patterns')
-    pdf.chapter_body("Objective: Track seasonal climatic changes and correlations.")
-    pdf.add_image('reports/figures/05_weath_temp_cycle.png', 'Fig 5.1: Annual Temperature Cycle')
-    pdf.add_image('reports/figures/05_weath_correlation.png', 'Fig 5.2: Climatic Variable Correlation')
-
-    # Save
-    out_path = 'Nexus_Portfolio_Report.pdf'
-    pdf.output(out_path)
-    print(f"✅ DOCUMENTATION READY: {out_path}")
+    build_report(pdf, manifest, figures_dir, dpi=dpi, workers=workers)
+    print(f"✅ DOCUMENTATION READY: {out_path} ({os.path.getsize(out_path) / 1e6:.2f} MB)")
 
 if __name__ == "__main__":
-    generate_pdf_report()
\ No newline at end of file
+    generate_pdf_report()
@@ -0,0 +1,230 @@
+"""
+Module: resampling.py
+Description: Bootstrap confidence intervals and permutation tests, vectorised in blocks across worker processes.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from src.profiling import stage
+
+# Rows drawn per resample: larger groups are bootstrapped m-out-of-n and
+# permutation-tested on a random subsample, so the cost stops growing with n
+MAX_RESAMPLE_ROWS = 50_000
+RESAMPLE_DRAWS = 50_000_000
+MIN_RESAMPLES = 1_000
+# Below this many drawn values per call, worker start-up costs more than it saves
+INLINE_DRAWS = 20_000_000
+
+STATISTICS = {
+    'mean': lambda samples: samples.mean(axis=1),
+    'median': lambda samples: np.median(samples, axis=1),
+}
+
+
+def _block_rows(n, max_block_elements):
+    """Resamples per block so one block holds at most `max_block_elements` values."""
+    return max(1, min(max_block_elements // max(n, 1), 10_000))
+
+
+def _block_sizes(n_resamples, rows):
+    return [min(rows, n_resamples - start) for start in range(0, n_resamples, rows)]
+
+
+def _spread(n_resamples, rows, seed, workers):
+    """
+    Splits the resamples into fixed blocks, each with its own child of
+    SeedSequence(seed), then deals the blocks out to `workers` jobs.
+    Block seeds do not depend on the worker count, so results are
+    identical whether run inline or on any pool size.
+    """
+    sizes = _block_sizes(n_resamples, rows)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    blocks = list(zip(sizes, seeds))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(blocks)))
+    return [blocks[i::workers] for i in range(workers)], workers
+
+
+def resample_count(rows):
+    """Resamples that fit the RESAMPLE_DRAWS budget when each draws `rows` values."""
+    return int(np.clip(RESAMPLE_DRAWS // max(rows, 1), MIN_RESAMPLES, 10_000))
+
+
+@contextmanager
+def _pool(workers, draws):
+    """
+    One process pool for a whole call (None = run inline): used when more
+    than one worker is allowed and the call draws at least INLINE_DRAWS values.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or draws < INLINE_DRAWS:
+        yield None, 1
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield pool, workers
+
+
+def _run(func, jobs, pool):
+    if pool is None:
+        return [func(*job) for job in jobs]
+    return list(pool.map(func, *zip(*jobs)))
+
+
+def _bootstrap_blocks(values, statistics, m, blocks):
+    """Worker: bootstrap replicates (resamples of m rows) of each statistic for a list of (size, seed) blocks."""
+    out = {name: [] for name in statistics}
+    n = len(values)
+    for size, seed in blocks:
+        rng = np.random.default_rng(seed)
+        samples = values[rng.integers(0, n, (size, m))]
+        for name in statistics:
+            out[name].append(STATISTICS[name](samples))
+    return {name: np.concatenate(parts) for name, parts in out.items()}
+
+
+def _permutation_blocks(values, codes, k, blocks):
+    """Worker: permuted group sums for a list of (size, seed) blocks -> [resamples, k]."""
+    n = len(values)
+    out = []
+    for size, seed in blocks:
+        rng = np.random.default_rng(seed)
+        shuffled = rng.permuted(np.broadcast_to(codes, (size, n)), axis=1)
+        # One bincount for the whole block: row r, group g lands in bin r * k + g
+        flat = (shuffled + k * np.arange(size)[:, None]).ravel()
+        out.append(np.bincount(flat, weights=np.tile(values, size), minlength=size * k).reshape(size, k))
+    return np.vstack(out)
+
+
+def bootstrap_ci(groups, statistics=('mean', 'median'), n_resamples=10_000, confidence=0.95,
+                 seed=0, workers=None, max_block_elements=2_000_000, max_rows=None):
+    """
+    Percentile bootstrap confidence intervals.
+
+    Args:
+        groups (dict): {name: 1-D values}.
+        statistics (tuple): Any of 'mean', 'median'.
+        n_resamples (int): Bootstrap replicates per group.
+        seed (int): Root seed; each block gets its own SeedSequence child.
+        workers (int, optional): Pool size (defaults to CPU count, 1 = inline);
+            small calls run inline regardless (see INLINE_DRAWS).
+        max_block_elements (int): Memory cap per block (values drawn at once).
+        max_rows (int, optional): Groups larger than this are resampled
+            m-out-of-n (m = max_rows) and the interval is rescaled by sqrt(m / n).
+
+    Returns:
+        pd.DataFrame: One row per (group, statistic): n, estimate, ci_low, ci_high.
+    """
+    alpha = (1 - confidence) / 2
+    groups = {name: np.asarray(values, dtype=float) for name, values in groups.items()}
+    groups = {name: values[~np.isnan(values)] for name, values in groups.items()}
+    drawn = {name: min(len(values), max_rows or len(values)) for name, values in groups.items()}
+    rows = []
+    with stage('bootstrap_ci', rows=sum(drawn.values()) * n_resamples), \
+            _pool(workers, sum(drawn.values()) * n_resamples) as (pool, n_workers):
+        for i, (name, values) in enumerate(groups.items()):
+            m = drawn[name]
+            jobs, _ = _spread(n_resamples, _block_rows(m, max_block_elements), [seed, i], n_workers)
+            parts = _run(_bootstrap_blocks, [(values, tuple(statistics), m, blocks) for blocks in jobs], pool)
+            scale = np.sqrt(m / len(values)) if len(values) else 1.0
+            for stat in statistics:
+                estimate = float(STATISTICS[stat](values[None, :])[0])
+                replicates = np.concatenate([p[stat] for p in parts])
+                low, high = estimate + scale * (np.quantile(replicates, [alpha, 1 - alpha]) - estimate)
+                rows.append({'group': name, 'statistic': stat, 'n': len(values),
+                             'estimate': estimate, 'ci_low': low, 'ci_high': high})
+    table = pd.DataFrame(rows)
+    table.attrs.update({'confidence': confidence, 'n_resamples': n_resamples, 'seed': seed})
+    return table
+
+
+def permutation_test(values, labels, n_resamples=10_000, seed=0, workers=None, max_block_elements=2_000_000,
+                     max_rows=None):
+    """
+    Label-permutation test of group mean differences.
+
+    Two groups: two-sided test of mean_a - mean_b (a = first label in sorted
+    order). More groups: test of the between-group sum of squares
+    sum(n_g * (mean_g - grand_mean)^2), the permutation analogue of ANOVA.
+    With more than `max_rows` rows the test runs on a seeded random
+    subsample of max_rows rows (still an exact test, with less power).
+
+    Returns:
+        dict: groups, statistic name, observed value, p_value
+        ((hits + 1) / (n_resamples + 1)), n_resamples and n (rows tested).
+    """
+    values = np.asarray(values, dtype=float)
+    codes, names = pd.factorize(pd.Series(labels), sort=True)
+    keep = (codes >= 0) & ~np.isnan(values)
+    values, codes = values[keep], codes[keep]
+    if max_rows and len(values) > max_rows:
+        # Its own stream, disjoint from the block seeds spawned in _spread
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(2 ** 32 - 1,)))
+        rows = np.sort(rng.choice(len(values), max_rows, replace=False))
+        values, codes = values[rows], codes[rows]
+    k = len(names)
+    counts = np.bincount(codes, minlength=k).astype(float)
+
+    def statistic(sums):
+        means = sums / counts
+        if k == 2:
+            return means[..., 0] - means[..., 1]
+        grand = values.mean()
+        return ((means - grand) ** 2 * counts).sum(axis=-1)
+
+    observed = float(statistic(np.bincount(codes, weights=values, minlength=k)))
+    with stage('permutation_test', rows=len(values) * n_resamples), \
+            _pool(workers, len(values) * n_resamples) as (pool, n_workers):
+        jobs, _ = _spread(n_resamples, _block_rows(len(values), max_block_elements), seed, n_workers)
+        sums = np.vstack(_run(_permutation_blocks, [(values, codes, k, blocks) for blocks in jobs], pool))
+    null = statistic(sums)
+    hits = np.sum(np.abs(null) >= abs(observed) - 1e-12) if k == 2 else np.sum(null >= observed - 1e-12)
+    return {
+        'groups': list(names),
+        'statistic': 'mean_diff' if k == 2 else 'between_ss',
+        'observed': observed,
+        'p_value': float((hits + 1) / (n_resamples + 1)),
+        'n_resamples': n_resamples,
+        'n': len(values),
+    }
+
+
+def normal_ci(moments, confidence=0.95):
+    """
+    Normal-approximation CI table for the mean, in the same layout as
+    bootstrap_ci, from streamed moments ({name: RunningMoments}).
+    """
+    from scipy import stats
+
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    rows = []
+    for name, m in moments.items():
+        half = z * m.std / np.sqrt(m.count)
+        rows.append({'group': name, 'statistic': 'mean', 'n': m.count, 'estimate': m.mean,
+                     'ci_low': m.mean - half, 'ci_high': m.mean + half})
+    table = pd.DataFrame(rows)
+    table.attrs['confidence'] = confidence
+    return table
+
+
+def group_ci(groups, statistics=('mean', 'median'), seed=0, workers=None):
+    """
+    CI table for chart error bars: percentile bootstrap with at most
+    MAX_RESAMPLE_ROWS rows drawn per group and resample (m-out-of-n above
+    that) and the resamples scaled to a fixed draw budget.
+    attrs['method'] records the method, as normal_ci tables do.
+    """
+    drawn = sum(min(len(v), MAX_RESAMPLE_ROWS) for v in groups.values())
+    table = bootstrap_ci(groups, statistics, n_resamples=resample_count(drawn), seed=seed, workers=workers,
+                         max_rows=MAX_RESAMPLE_ROWS)
+    table.attrs['method'] = 'bootstrap'
+    return table
+
+
+def group_permutation_test(values, labels, seed=0, workers=None):
+    """permutation_test on at most MAX_RESAMPLE_ROWS rows, resamples scaled to the draw budget."""
+    rows = min(len(values), MAX_RESAMPLE_ROWS)
+    return permutation_test(values, labels, n_resamples=resample_count(rows), seed=seed, workers=workers,
+                            max_rows=MAX_RESAMPLE_ROWS)
@@ -0,0 +1,239 @@
+"""
+Module: retail_cube.py
+Description: Dense retail aggregate cube (day x hour x branch x product line x customer type x payment) with incremental append.
+"""
+import numpy as np
+import pandas as pd
+
+from src.features import DAYS, parse_dates, parse_hours
+from src.profiling import stage
+from src.streaming import RunningMoments
+
+DIMENSIONS = ['Date', 'Hour', 'Branch', 'Product_Line', 'Customer_Type', 'Payment']
+CATEGORICAL = DIMENSIONS[2:]
+COLUMNS = ['Date', 'Time'] + CATEGORICAL + ['Total']
+STATS = ('count', 'sum', 'sumsq')
+
+
+class RetailCube:
+    """
+    Count, sum and sum of squares of invoice Totals for every
+    (day, hour, Branch, Product_Line, Customer_Type, Payment) cell, held as
+    one dense float64 array. Heatmaps, daily series, group means and
+    t-test moments are slices and sums of the cube, never invoice scans.
+
+    The day axis is over-allocated (doubling), so appending later invoices
+    is O(new rows) plus an occasional copy; new categorical levels are
+    added at the end of their axis.
+
+    Totals are stored shifted by the mean of the first batch, which keeps
+    the sums of squares well conditioned.
+
+    Attributes:
+        start (np.datetime64): First day (day axis origin), None while empty.
+        levels (dict): {dimension: pd.Index} for the CATEGORICAL dimensions.
+        shift (float): Shift applied to Totals before summing.
+    """
+
+    def __init__(self):
+        self.start = None
+        self.n_days = 0
+        self.levels = {dim: pd.Index([]) for dim in CATEGORICAL}
+        self.shift = None
+        self._buffer = np.zeros((0, 24, 0, 0, 0, 0, len(STATS)))
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls().append(df)
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Builds the cube from an iterable of frames (e.g. DataLoader.iter_chunks)."""
+        cube = cls()
+        for chunk in chunks:
+            cube.append(chunk)
+        return cube
+
+    @property
+    def data(self):
+        """float64 [n_days, 24, branches, product lines, customer types, payments, 3 (STATS)]."""
+        return self._buffer[:self.n_days]
+
+    @property
+    def dates(self):
+        return pd.date_range(pd.Timestamp(self.start), periods=self.n_days) if self.n_days else pd.DatetimeIndex([])
+
+    @property
+    def rows(self):
+        return int(self.data[..., 0].sum())
+
+    def axis_levels(self, dim):
+        if dim == 'Date':
+            return self.dates
+        if dim == 'Hour':
+            return pd.RangeIndex(24)
+        return self.levels[dim]
+
+    # --- Building ---
+    def _resize(self, n_days, before=0):
+        """Makes room for `n_days` days (`before` of them ahead of the current start) and any new levels."""
+        shape = (24,) + tuple(len(self.levels[dim]) for dim in CATEGORICAL) + (len(STATS),)
+        capacity = self._buffer.shape[0]
+        if shape == self._buffer.shape[1:] and not before and n_days <= capacity:
+            return
+        if n_days > capacity:
+            capacity = max(n_days, 2 * capacity)
+        buffer = np.zeros((capacity,) + shape)
+        old = self.data
+        buffer[(slice(before, before + len(old)),) + tuple(slice(0, k) for k in old.shape[1:])] = old
+        self._buffer = buffer
+
+    @staticmethod
+    def _factorize(values):
+        """(codes, categories) of a key column; -1 for missing values."""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values.cat.codes.to_numpy(), pd.Index(values.cat.categories)
+        codes, categories = pd.factorize(values, sort=True)
+        return codes, pd.Index(categories)
+
+    def _encode(self, dim, codes, categories, keep):
+        """Codes into levels[dim], adding the levels that kept rows use for the first time."""
+        used = np.bincount(codes[keep], minlength=len(categories)) > 0
+        new = categories[used & ~categories.isin(self.levels[dim])]
+        if len(new):
+            self.levels[dim] = self.levels[dim].append(new)
+        lookup = np.append(self.levels[dim].get_indexer(categories), -1)
+        return lookup[codes]
+
+    def append(self, df):
+        """
+        Adds invoices (raw sales columns; Date may be strings or datetimes).
+        Rows with a missing key or Total are skipped, and their levels are not registered.
+        """
+        with stage('RetailCube.append', rows=len(df)):
+            days = parse_dates(df['Date']).astype('datetime64[D]')
+            hours = parse_hours(df['Time'])
+            values = df['Total'].to_numpy(dtype=float)
+            keep = ~np.isnat(days) & ~np.isnan(hours.astype(float)) & np.isfinite(values)
+            factorized = [self._factorize(df[dim]) for dim in CATEGORICAL]
+            for codes, _ in factorized:
+                keep &= codes >= 0
+            if not keep.any():
+                return self
+            codes = [self._encode(dim, c, categories, keep) for dim, (c, categories) in zip(CATEGORICAL, factorized)]
+
+            first, last = days[keep].min(), days[keep].max()
+            if self.start is None:
+                self.start = first
+                self.shift = float(values[keep].mean())
+            before = max(int((self.start - first) // np.timedelta64(1, 'D')), 0)
+            n_days = max(self.n_days, int((last - self.start) // np.timedelta64(1, 'D')) + 1) + before
+            self._resize(n_days, before)
+            self.start -= np.timedelta64(before, 'D')
+            self.n_days = n_days
+
+            index = [(days[keep] - self.start).astype(np.int64), hours[keep].astype(np.int64)]
+            index += [c[keep] for c in codes]
+            shape = self.data.shape[:-1]
+            flat = np.ravel_multi_index(index, shape)
+            x = values[keep] - self.shift
+            cells = self.data.reshape(-1, len(STATS))
+            size = cells.shape[0]
+            cells[:, 0] += np.bincount(flat, minlength=size)
+            cells[:, 1] += np.bincount(flat, weights=x, minlength=size)
+            cells[:, 2] += np.bincount(flat, weights=x * x, minlength=size)
+        return self
+
+    # --- Queries ---
+    def _codes(self, dim, wanted):
+        """Axis positions of the wanted levels (a level or a list of them); unknown levels are dropped."""
+        wanted = wanted if isinstance(wanted, (list, tuple, set, pd.Index)) else [wanted]
+        codes = self.axis_levels(dim).get_indexer(list(wanted))
+        return codes[codes >= 0]
+
+    def _slice(self, where):
+        """The cube restricted to `where` ({dimension: level or list of levels})."""
+        data = self.data
+        for dim, wanted in (where or {}).items():
+            data = data.take(self._codes(dim, wanted), axis=DIMENSIONS.index(dim))
+        return data
+
+    def rollup(self, by=(), where=None):
+        """
+        Sums the cube down to the `by` dimensions after filtering with `where`.
+
+        Returns:
+            tuple: (pd.MultiIndex / Index of the groups with at least one
+            invoice, float64 [n_groups, 3] of count / shifted sum / shifted sumsq).
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        where = where or {}
+        axes = [DIMENSIONS.index(d) for d in by]
+        totals = self._slice(where).sum(axis=tuple(i for i in range(len(DIMENSIONS)) if i not in axes))
+        # Summing keeps the remaining axes in cube order; put them in `by` order
+        totals = totals.transpose([sorted(axes).index(a) for a in axes] + [len(axes)]).reshape(-1, len(STATS))
+        if not by:
+            return pd.Index(['All']), totals
+        levels = [self.axis_levels(d)[self._codes(d, where[d])] if d in where else self.axis_levels(d) for d in by]
+        index = pd.MultiIndex.from_product(levels, names=by) if len(by) > 1 else levels[0].rename(by[0])
+        seen = totals[:, 0] > 0
+        return index[seen], totals[seen]
+
+    def _unshift(self, totals):
+        """count, sum and M2 (sum of squared deviations) from rolled-up totals."""
+        n, s, q = totals[:, 0], totals[:, 1], totals[:, 2]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            m2 = np.maximum(q - s * s / n, 0)
+        return n, s + self.shift * n, m2
+
+    def group_stats(self, by=(), where=None):
+        """One row per group: n, sum, mean and var (ddof=1) of Total."""
+        index, totals = self.rollup(by, where)
+        n, total, m2 = self._unshift(totals)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({'n': n.astype(np.int64), 'sum': total, 'mean': total / n,
+                                 'var': np.where(n > 1, m2 / (n - 1), np.nan)}, index=index)
+
+    def moments(self, by, where=None):
+        """{level: RunningMoments} of Total per group (for ttest_from_moments / normal_ci)."""
+        index, totals = self.rollup(by, where)
+        n, total, m2 = self._unshift(totals)
+        return {key: RunningMoments(int(n[g]), float(total[g] / n[g]), float(m2[g])) for g, key in enumerate(index)}
+
+    def daily(self, where=None):
+        """Date/Total rows for every day with sales (the daily series the forecaster trains on)."""
+        stats = self.group_stats('Date', where)
+        return pd.DataFrame({'Date': stats.index.to_numpy(), 'Total': stats['sum'].to_numpy()})
+
+    def heatmap_pivot(self, where=None):
+        """Day_Name x Hour sums of Total (NaN where there were no sales), like pivot_table."""
+        where = where or {}
+        by_hour = self._slice(where).sum(axis=(2, 3, 4, 5))
+        dates = self.dates[self._codes('Date', where['Date'])] if 'Date' in where else self.dates
+        grid = np.zeros((7,) + by_hour.shape[1:])
+        np.add.at(grid, dates.dayofweek.to_numpy(), by_hour)
+        count = grid[..., 0]
+        sums = np.where(count > 0, grid[..., 1] + self.shift * count, np.nan)
+        pivot = pd.DataFrame(sums, index=pd.Index(DAYS, name='Day_Name'), columns=pd.Index(range(24), name='Hour'))
+        return pivot.loc[:, (count > 0).any(axis=0)]
+
+
+def stream_retail_cube(loader, filename='supermarket_sales.csv', chunksize=100_000, sketches=None):
+    """
+    Single chunked pass over the sales file into a RetailCube (only COLUMNS are read).
+
+    Args:
+        sketches (dict, optional): {column: sketch} (e.g. {'Invoice_ID': HyperLogLog()})
+            updated from the same chunks; their columns are read as well.
+    """
+    sketches = sketches or {}
+    columns = COLUMNS + [c for c in sketches if c not in COLUMNS]
+    with stage('stream_retail_cube') as rec:
+        cube = RetailCube()
+        for chunk in loader.iter_chunks(filename, chunksize=chunksize, columns=columns):
+            cube.append(chunk)
+            for column, sketch in sketches.items():
+                sketch.update(chunk[column])
+        rec['rows'] = cube.rows
+    print(f"   [Stream] Aggregated {cube.rows:,} rows into a {cube.data[..., 0].size:,}-cell cube")
+    return cube
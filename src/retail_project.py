@@ -0,0 +1,142 @@
+"""
+Module: retail_project.py
+Description: Project 1 (Retail Analytics & AI Forecasting) orchestration.
+"""
+from src.data_loader import DataLoader
+from src.features import engineer_features, SEGMENT_FEATURES
+from src.statistics import StatEngine
+from src.stat_report import format_test_table, format_permutation, format_ci_table
+from src.resampling import group_ci, group_permutation_test, normal_ci
+from src.forecasting import train_sales_forecast_model
+from src.backtesting import Backtester
+from src.hierarchical import SeriesCube, HierarchicalForecaster
+from src.model_registry import ModelRegistry
+from src.visualization import Visualizer
+from src.retail_cube import RetailCube, stream_retail_cube
+from src.sketches import HyperLogLog
+
+
+def report_segment_tests(stats, df):
+    """Member vs Normal within every Branch, City, Product_Line and month (Holm-corrected)."""
+    dimensions = ['Branch', 'City', 'Product_Line', 'Month_Name']
+    ttests = stats.batch_ttest(df, 'Total', 'Customer_Type', 'Member', 'Normal', dimensions)
+    print(format_test_table(ttests, "Segment T-Tests (Member vs Normal)"))
+    anovas = stats.batch_anova(df, 'Total', 'Product_Line', [(), 'Branch', 'City'])
+    print(format_test_table(anovas, "Segment ANOVA (Spend across Product Lines)"))
+    return ttests, anovas
+
+
+def report_resampling(df, workers=None):
+    """
+    Bootstrap CIs and a permutation test for Member vs Normal spend; returns
+    the CI table. Large groups are resampled MAX_RESAMPLE_ROWS rows at a time
+    (see resampling.group_ci), so the cost is bounded at any size.
+    """
+    groups = {name: df.loc[df['Customer_Type'] == name, 'Total'].to_numpy() for name in ('Member', 'Normal')}
+    perm = group_permutation_test(df['Total'], df['Customer_Type'], workers=workers)
+    print(format_permutation(perm, "Customer_Type spend"))
+    ci = group_ci(groups, workers=workers)
+    print(format_ci_table(ci))
+    return ci
+
+
+def report_backtest(daily, models=('linear', 'ols', 'gbr'), workers=None):
+    """Rolling-origin comparison of the candidate forecasters (mean over folds)."""
+    results = Backtester(workers=workers).run(daily, models=models)
+    summary = Backtester.summarize(results)
+    print(f"   [ML] Backtest: {results['fold'].nunique()} expanding folds x {len(summary)} models")
+    for name, row in summary.iterrows():
+        print(f"   [ML]   {name:<7} MAE ${row['MAE']:.2f} | RMSE ${row['RMSE']:.2f} | R2 {row['R2']:.2f}")
+    return results
+
+
+def sync_registry(daily, registry_dir='models'):
+    """Keeps the production forecaster current: load if unchanged, RLS-update on new days, else refit."""
+    model, status = ModelRegistry(registry_dir).sync('daily_sales', daily)
+    print(f"   [ML] Registry: daily_sales {status} ({model.n_obs} days through {model.last_date.date()})")
+    return model
+
+
+def report_hierarchy(df, horizon=14, workers=None):
+    """Per Branch x City x Product_Line forecasts, reconciled bottom-up."""
+    cube = SeriesCube.from_transactions(df)
+    forecaster = HierarchicalForecaster(horizon=horizon, workers=workers)
+    errors = forecaster.evaluate(cube)
+    forecast = forecaster.fit_predict(cube)
+    total = forecast.level().iloc[0]
+    print(f"   [ML] Hierarchy: {len(cube.keys)} series x {len(cube.dates)} days, "
+          f"{horizon}-day holdout MAE ${errors['Bottom']:.2f} (series) / ${errors['Total']:.2f} (total)")
+    print(f"   [ML] Next {horizon} days (reconciled total): ${total.sum():,.2f}")
+    return forecast
+
+
+def run_retail_in_memory(loader, stats, viz, workers=None):
+    """Project 1 on the fully loaded sales frame."""
+    df_raw = loader.load_csv('supermarket_sales.csv')
+    # Aggregate cube built once per load: heatmap, daily series and the headline t-test are served from it
+    cube = RetailCube.from_frame(df_raw)
+    # Only the derived column the segment tests consume
+    df = engineer_features(df_raw, features=SEGMENT_FEATURES)
+
+    # Stats
+    moments = cube.moments('Customer_Type')
+    print(stats.run_ttest_from_moments(moments['Member'], moments['Normal'], "Member", "Normal"))
+    report_segment_tests(stats, df)
+    spend_ci = report_resampling(df, workers)
+
+    # ML
+    daily_sales = cube.daily()
+    model_data, predictions, y_test = train_sales_forecast_model(daily_sales)
+    report_backtest(daily_sales, workers=workers)
+    sync_registry(daily_sales)
+    report_hierarchy(df, workers=workers)
+
+    # Visuals (3 Required)
+    if viz is None:
+        return
+    viz.plot_heatmap_pivot(cube.heatmap_pivot())
+    viz.plot_forecast(model_data, y_test, predictions)
+    viz.plot_group_ci(spend_ci)
+
+
+def run_retail_streaming(loader, stats, viz, chunksize, workers=None):
+    """Project 1 in bounded memory: one chunked pass, then work on the aggregates only."""
+    invoices = HyperLogLog()
+    cube = stream_retail_cube(loader, chunksize=chunksize, sketches={'Invoice_ID': invoices})
+    daily_sales, sales_pivot, moments = cube.daily(), cube.heatmap_pivot(), cube.moments('Customer_Type')
+    print(f"   [Insight] Distinct invoices: ~{invoices.estimate():,.0f} of {cube.rows:,} rows "
+          f"(HyperLogLog, ±{invoices.relative_error:.1%})")
+
+    # Stats (from per-group count/mean/M2)
+    print(stats.run_ttest_from_moments(moments['Member'], moments['Normal'], "Member", "Normal"))
+    # No rows are kept in streaming mode, so CIs come from the streamed moments
+    spend_ci = normal_ci({name: moments[name] for name in ('Member', 'Normal')})
+    print(format_ci_table(spend_ci))
+
+    # ML (the forecaster only needs Date/Total at daily grain)
+    model_data, predictions, y_test = train_sales_forecast_model(daily_sales)
+    report_backtest(daily_sales, workers=workers)
+    sync_registry(daily_sales)
+
+    # Visuals
+    if viz is None:
+        return
+    viz.plot_heatmap_pivot(sales_pivot)
+    viz.plot_forecast(model_data, y_test, predictions)
+    viz.plot_group_ci(spend_ci)
+
+
+def run_retail_project(raw_dir='data/raw', output_dir='reports/figures', stream=False, chunksize=100_000,
+                       target='print', plots=True, workers=None):
+    """
+    Entry point used by the pipeline runner (builds its own loader/engines; plots=False skips the figures).
+    `workers` caps the processes each parallel stage may start (None = CPU count).
+    """
+    print("\n🛒 [PROJECT 1] RETAIL ANALYTICS & AI FORECASTING")
+    loader = DataLoader(raw_dir)
+    viz = Visualizer(output_dir, target) if plots else None
+    stats = StatEngine()
+    if stream:
+        run_retail_streaming(loader, stats, viz, chunksize, workers)
+    else:
+        run_retail_in_memory(loader, stats, viz, workers)
@@ -0,0 +1,439 @@
+"""
+Module: server.py
+Description: Resident analytics service: datasets, cubes and the forecaster stay in memory behind a localhost JSON API.
+
+Usage:
+    python -m src.server --port 8765 --workers 2
+    curl 'http://127.0.0.1:8765/retail/ttest?Branch=A'
+"""
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import DataLoader
+from src.features import engineer_features, SEGMENT_FEATURES
+from src.retail_cube import RetailCube, CATEGORICAL as RETAIL_DIMENSIONS
+from src.statistics import StatEngine
+
+DATASETS = ['supermarket_sales.csv', 'student_performance.csv', 'healthcare_covid.csv',
+            'finance_stocks.csv', 'weather_data.csv', 'house_prices.csv']
+
+
+class AnalyticsState:
+    """
+    Everything the endpoints read, loaded once through DataLoader: the raw
+    frames, the retail cube and segment frame, the student cube and the
+    daily-sales forecaster. Per-project engine results are computed on
+    first use and kept (cached_property).
+    """
+
+    def __init__(self, raw_dir='data/raw', registry_dir='models'):
+        from src.model_registry import ModelRegistry
+
+        self.loader = DataLoader(raw_dir)
+        self.frames = {name: self.loader.load_csv(name) for name in DATASETS
+                       if os.path.exists(os.path.join(raw_dir, name))}
+        sales = self.frames['supermarket_sales.csv']
+        self.retail_cube = RetailCube.from_frame(sales)
+        self.retail = engineer_features(sales, features=SEGMENT_FEATURES)
+        self.forecaster, status = ModelRegistry(registry_dir).sync('daily_sales', self.retail_cube.daily())
+        self.loaded_at = datetime.now()
+        print(f"   [Server] Forecaster {status} ({self.forecaster.n_obs} days)")
+
+    def frame(self, name):
+        if name not in self.frames:
+            raise KeyError(f"{name} is not loaded")
+        return self.frames[name]
+
+    @functools.cached_property
+    def student_cube(self):
+        from src.education_engine import StudentCube
+        return StudentCube.from_frame(self.frame('student_performance.csv'))
+
+    @functools.cached_property
+    def epidemic(self):
+        from src.epidemiology import EpiEngine, EpiPanel
+        return EpiEngine().compute(EpiPanel.from_long(self.frame('healthcare_covid.csv')).total())
+
+    @functools.cached_property
+    def _finance(self):
+        return {}
+
+    def finance(self, window):
+        """
+        (panel, risk metrics) per rolling window, kept for the 8 most recent
+        windows. The cache is per instance (not lru_cache, whose class-level
+        cache would keep reloaded states alive).
+        """
+        from src.finance_engine import FinanceEngine, PricePanel
+        cache = self._finance
+        if window in cache:
+            cache[window] = cache.pop(window)
+        else:
+            panel = PricePanel.from_long(self.frame('finance_stocks.csv'))
+            cache[window] = (panel, FinanceEngine(window=window).compute(panel))
+            if len(cache) > 8:
+                del cache[next(iter(cache))]
+        return cache[window]
+
+    @functools.cached_property
+    def climate(self):
+        from src.climate_engine import ClimateEngine, StationArchive
+        return ClimateEngine().analyze(StationArchive.from_long(self.frame('weather_data.csv')))
+
+
+# --- Endpoints ---
+# Each takes the state plus query parameters (strings) and returns JSON-able data.
+def _list(value):
+    return [v for v in value.split(',') if v] if value else []
+
+
+def _retail_where(params):
+    unknown = set(params) - set(RETAIL_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown filters {sorted(unknown)}; use {RETAIL_DIMENSIONS}")
+    return {dim: _list(value) for dim, value in params.items()}
+
+
+def retail_ttest(state, by='Customer_Type', a='Member', b='Normal', **where):
+    moments = state.retail_cube.moments(by, _retail_where(where))
+    missing = [g for g in (a, b) if g not in moments]
+    if missing:
+        raise ValueError(f"No invoices for {by}={missing} with these filters")
+    result = StatEngine.ttest_from_moments(moments[a], moments[b], a, b)
+    result['groups'] = {g: {'n': moments[g].count, 'mean': moments[g].mean, 'std': moments[g].std} for g in (a, b)}
+    return result
+
+
+def retail_groups(state, by='Product_Line', **where):
+    stats = state.retail_cube.group_stats(_list(by), _retail_where(where))
+    return stats.reset_index()
+
+
+def retail_heatmap(state, **where):
+    pivot = state.retail_cube.heatmap_pivot(_retail_where(where))
+    return {'hours': list(pivot.columns), 'days': list(pivot.index), 'total': pivot.to_numpy()}
+
+
+def retail_anova(state, by='Product_Line', within=''):
+    return StatEngine.batch_anova(state.retail, 'Total', by, [()] + _list(within))
+
+
+def retail_permutation(state, by='Customer_Type', resamples='10000'):
+    df = state.retail
+    return StatEngine.permutation_test(df['Total'], df[by], n_resamples=int(resamples), workers=1)
+
+
+def retail_forecast(state, days='14'):
+    return state.forecaster.predict(int(days))
+
+
+def retail_backtest(state, models='linear,ols'):
+    from src.backtesting import Backtester
+    return Backtester.summarize(Backtester().run(state.retail_cube.daily(), models=_list(models))).reset_index()
+
+
+def education_correlation(state, x='Study_Hours', y='Score', by=''):
+    return state.student_cube.correlation(x, y, _list(by)).rename('r').reset_index()
+
+
+def healthcare_summary(state):
+    cases = state.frame('healthcare_covid.csv')
+    summary = state.epidemic['summary'].iloc[0]
+    return {'recovery_rate_%': cases['Recovered'].sum() / cases['New_Cases'].sum() * 100, **summary.to_dict()}
+
+
+def finance_volatility(state, window='20'):
+    panel, risk = state.finance(int(window))
+    returns = risk['returns'].to_numpy()
+    return {
+        'volatility_%': float(np.nanstd(returns, ddof=1) * 100),
+        'latest_volatility_%': float(np.nanmean(risk['volatility'].iloc[-1]) * 100),
+        'tickers': risk['summary'].rename_axis('Ticker').reset_index(),
+    }
+
+
+def weather_peak(state):
+    weather = state.frame('weather_data.csv')
+    monthly = state.climate['monthly']
+    by_month = pd.Series(np.nanmean(monthly.data['Temp_C'], axis=0), index=monthly.times)
+    warmest = by_month.groupby(by_month.index.month_name()).mean()
+    peak = weather.loc[weather['Temp_C'].idxmax()]
+    return {'peak_temp_c': peak['Temp_C'], 'peak_date': peak['Date'],
+            'warmest_month': warmest.idxmax(), 'warmest_month_mean_c': warmest.max(),
+            'extreme_events': int(len(state.climate['events']))}
+
+
+# path: (handler, runs in the worker pool)
+ENDPOINTS = {
+    '/retail/ttest': (retail_ttest, False),
+    '/retail/groups': (retail_groups, False),
+    '/retail/heatmap': (retail_heatmap, False),
+    '/retail/forecast': (retail_forecast, False),
+    '/retail/anova': (retail_anova, True),
+    '/retail/permutation': (retail_permutation, True),
+    '/retail/backtest': (retail_backtest, True),
+    '/education/correlation': (education_correlation, False),
+    '/healthcare/summary': (healthcare_summary, True),
+    '/finance/volatility': (finance_volatility, True),
+    '/weather/peak': (weather_peak, True),
+}
+
+
+def to_json(obj):
+    """json.dumps default hook for numpy / pandas results."""
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient='records')
+    if isinstance(obj, pd.Series):
+        return obj.to_dict()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date, pd.Timestamp)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _clean(obj):
+    """NaN / inf are not JSON; they are sent as null."""
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {str(k): _clean(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_clean(v) for v in obj]
+    return obj
+
+
+def render(result):
+    return json.dumps(_clean(json.loads(json.dumps(result, default=to_json))), separators=(',', ':')).encode()
+
+
+# --- Worker side ---
+_STATE = None
+_STATE_ARGS = ('data/raw', 'models')
+
+
+def _worker_state():
+    """The worker's state: inherited from the parent when forked, loaded once otherwise."""
+    global _STATE
+    if _STATE is None:
+        _STATE = AnalyticsState(*_STATE_ARGS)
+    return _STATE
+
+
+def _call(path, params):
+    return render(ENDPOINTS[path][0](_worker_state(), **params))
+
+
+class ResultCache:
+    """LRU map of request key -> rendered JSON bytes."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self.entries[key] = body
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+# --- HTTP ---
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error',
+           503: 'Service Unavailable'}
+
+
+class AnalyticsServer:
+    """
+    Minimal HTTP/1.1 JSON server on asyncio streams (keep-alive, GET only).
+
+    Cheap endpoints (cube slices, the stored forecaster) answer inline on
+    the event loop; the rest run in a process pool whose workers fork from
+    the loaded state. Identical concurrent requests share one computation,
+    and finished results go into an LRU cache until POST /reload.
+
+    Args:
+        workers (int): Pool processes; 0 runs pool endpoints in a thread instead.
+        cache_size (int): Cached responses kept.
+    """
+
+    def __init__(self, raw_dir='data/raw', registry_dir='models', workers=2, cache_size=256):
+        self.raw_dir = raw_dir
+        self.registry_dir = registry_dir
+        self.workers = workers
+        self.cache = ResultCache(cache_size)
+        self.state = None
+        self.pool = None
+        self._inflight = {}
+        self.load()
+
+    def load(self):
+        """Loads the datasets and (re)starts the pool; call from the event-loop thread."""
+        self._swap(*self._read_state())
+
+    def _read_state(self):
+        """The slow half of a reload (parsing and fitting); safe to run in a thread."""
+        start = time.perf_counter()
+        return AnalyticsState(self.raw_dir, self.registry_dir), start
+
+    def _swap(self, state, start):
+        """
+        Installs a loaded state. Runs on the loop thread, so the new pool forks
+        from it; the old pool finishes the work it already has (no
+        cancel_futures, which would strand requests waiting on it).
+        """
+        global _STATE, _STATE_ARGS
+        self.state = _STATE = state
+        _STATE_ARGS = (self.raw_dir, self.registry_dir)
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+        if self.workers > 0:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        self.cache.clear()
+        print(f"   [Server] Loaded {len(self.state.frames)} datasets in {time.perf_counter() - start:.2f}s")
+
+    async def respond(self, method, target):
+        """Returns (status, body bytes, cache status)."""
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        params = dict(parse_qsl(url.query))
+        if path == '/reload':
+            if method != 'POST':
+                return 405, render({'error': 'use POST /reload'}), 'none'
+            self._swap(*await asyncio.get_running_loop().run_in_executor(None, self._read_state))
+            return 200, render({'reloaded': self.state.loaded_at}), 'none'
+        if method != 'GET':
+            return 405, render({'error': f'{method} not supported'}), 'none'
+        if path == '/':
+            return 200, render({'endpoints': sorted(ENDPOINTS) + ['/health', '/reload (POST)']}), 'none'
+        if path == '/health':
+            return 200, render({'loaded_at': self.state.loaded_at, 'datasets': list(self.state.frames),
+                                'cache': {'size': len(self.cache.entries), 'hits': self.cache.hits,
+                                          'misses': self.cache.misses}}), 'none'
+        if path not in ENDPOINTS:
+            return 404, render({'error': f'unknown endpoint {path}', 'endpoints': sorted(ENDPOINTS)}), 'none'
+
+        key = (path, tuple(sorted(params.items())))
+        body = self.cache.get(key)
+        if body is not None:
+            return 200, body, 'hit'
+        if key in self._inflight:
+            status, body = await asyncio.shield(self._inflight[key])
+            return status, body, 'shared'
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        # Stays the answer if the computation is cancelled (CancelledError is a BaseException)
+        status, body = 503, render({'error': 'computation cancelled, retry'})
+        try:
+            status, body = 200, await self._compute(path, params)
+            self.cache.put(key, body)
+        except (TypeError, ValueError, KeyError) as e:
+            status, body = 400, render({'error': f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            status, body = 500, render({'error': f"{type(e).__name__}: {e}"})
+        finally:
+            # Always release the requests sharing this computation
+            del self._inflight[key]
+            future.set_result((status, body))
+        return status, body, 'miss' if status == 200 else 'none'
+
+    async def _compute(self, path, params):
+        handler, heavy = ENDPOINTS[path]
+        if not heavy:
+            return render(handler(self.state, **params))
+        loop = asyncio.get_running_loop()
+        if self.pool is None:
+            return await loop.run_in_executor(None, lambda: render(handler(self.state, **params)))
+        return await loop.run_in_executor(self.pool, _call, path, params)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode('latin1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get('content-length') or 0):
+                    await reader.readexactly(int(headers['content-length']))
+
+                start = time.perf_counter()
+                status, body, cache = await self.respond(method.upper(), target)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    f"X-Cache: {cache}\r\nX-Elapsed-Ms: {(time.perf_counter() - start) * 1000:.1f}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"   [Server] Listening on http://{host}:{port} ({self.workers} worker(s))")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the portfolio metrics as JSON on localhost")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2, help="Pool processes for heavy endpoints (0 = thread)")
+    parser.add_argument('--cache-size', type=int, default=256)
+    parser.add_argument('--raw-dir', default='data/raw')
+    parser.add_argument('--registry', default='models')
+    args = parser.parse_args()
+    server = AnalyticsServer(args.raw_dir, args.registry, args.workers, args.cache_size)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server.pool is not None:
+            server.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,408 @@
+"""
+Module: sketches.py
+Description: Mergeable sketch statistics (moments, KLL quantiles, HyperLogLog, fixed-bin histograms) built per chunk or partition.
+
+Every sketch has update(values) -> self and merge(other) -> self, so a
+dataset can be sketched chunk by chunk or partition by partition (in
+parallel) and the partial sketches merged afterwards.
+"""
+import copy
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.profiling import stage
+from src.streaming import RunningMoments
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+class MomentSketch(RunningMoments):
+    """RunningMoments (Welford count / mean / M2) plus min and max. Exact, O(1) memory."""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, low=np.inf, high=-np.inf):
+        super().__init__(count, mean, m2)
+        self.low = low
+        self.high = high
+
+    def update(self, values):
+        values = _finite(values)
+        if values.size:
+            self.low = min(self.low, float(values.min()))
+            self.high = max(self.high, float(values.max()))
+            super().update(values)
+        return self
+
+    def merge(self, other):
+        self.low = min(self.low, getattr(other, 'low', np.inf))
+        self.high = max(self.high, getattr(other, 'high', -np.inf))
+        return super().merge(other)
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty, 2016). Items sit in levels
+    of compactors; an item on level h stands for 2**h values. A full level is
+    sorted and every other item (random offset) is promoted, so memory stays
+    O(k log(n / k)) while the rank error stays around normalized_rank_error.
+
+    Args:
+        k (int): Accuracy / size parameter (200 -> about 1.3% rank error).
+        seed (int): Seed for the compaction coin flips (reproducible sketches).
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def normalized_rank_error(self):
+        """Single-quantile rank error at ~99% confidence (Apache DataSketches' fit for KLL)."""
+        return 2.296 / self.k ** 0.9723
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind; the rest are halved
+                odd = len(items) % 2
+                promoted = items[odd + self.rng.integers(2)::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        values = _finite(values)
+        if values.size:
+            self.count += values.size
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge KLL sketches with k={self.k} and k={other.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Approximate q-quantile(s) (q in [0, 1], scalar or array); NaN while empty."""
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan) if q.ndim else float('nan')
+        items, cumulative = self._weighted()
+        positions = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        out = items[np.minimum(positions, len(items) - 1)]
+        return out if q.ndim else float(out)
+
+    def rank(self, value):
+        """Approximate fraction of values <= value."""
+        if self.count == 0:
+            return float('nan')
+        items, cumulative = self._weighted()
+        position = np.searchsorted(items, value, side='right')
+        return float(cumulative[position - 1] / cumulative[-1]) if position else 0.0
+
+
+def _mix64(z):
+    """splitmix64 finalizer: spreads any 64-bit input over all output bits."""
+    with np.errstate(over='ignore'):
+        z = z + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def hash64(values):
+    """
+    Stable 64-bit hashes (identical across processes and runs). Numbers hash
+    their bit pattern; text is hashed with FNV-1a over the UCS-4 code points,
+    one vector operation per character position; categoricals hash their
+    categories once.
+    """
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        return hash64(values.cat.categories.to_series())[codes]
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        return _mix64(values.to_numpy(dtype=np.float64).view(np.uint64))
+    text = values.to_numpy(dtype=str)
+    chars = text.view(np.uint32).reshape(len(text), -1)
+    # Only each string's own characters: the NUL padding of the fixed-width
+    # array depends on the longest string in the chunk
+    lengths = np.char.str_len(text)
+    hashes = np.full(len(text), 0xCBF29CE484222325, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for position in range(chars.shape[1]):
+            live = lengths > position
+            hashes[live] = (hashes[live] ^ chars[live, position]) * np.uint64(0x100000001B3)
+    return _mix64(hashes)
+
+
+class HyperLogLog:
+    """
+    Distinct-value count in 2**p one-byte registers (HyperLogLog, Flajolet et
+    al. 2007, with the linear-counting correction for small counts).
+
+    Values go through hash64(), so sketches built in different processes or
+    runs merge correctly.
+
+    Args:
+        p (int): Register bits; relative standard error is 1.04 / sqrt(2**p)
+            (p=14: 0.81% with 16 KiB of registers).
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, values):
+        values = pd.Series(values) if not isinstance(values, pd.Series) else values
+        values = values.dropna()
+        if values.empty:
+            return self
+        hashes = hash64(values)
+        tail_bits = 64 - self.p
+        index = (hashes >> np.uint64(tail_bits)).astype(np.intp)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        # Position of the first 1 bit in the tail: bit lengths of both 32-bit halves (exact in float64)
+        high = np.frexp((tail >> np.uint64(32)).astype(float))[1]
+        low = np.frexp((tail & np.uint64(0xFFFFFFFF)).astype(float))[1]
+        bit_length = np.where(high > 0, high + 32, low)
+        np.maximum.at(self.registers, index, (tail_bits - bit_length + 1).astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HyperLogLog sketches with p={self.p} and p={other.p}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return float(m * np.log(m / zeros))
+        return float(raw)
+
+
+class StreamingHistogram:
+    """
+    Counts per fixed bin (edges decided up front) plus the values below / above
+    the range. Exact for its bins; histograms with the same edges merge by adding.
+    """
+
+    def __init__(self, low, high, bins=30):
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.below = 0
+        self.above = 0
+
+    def update(self, values):
+        values = _finite(values)
+        low, high = self.edges[0], self.edges[-1]
+        inside = values[(values >= low) & (values <= high)]
+        self.below += int(np.count_nonzero(values < low))
+        self.above += int(np.count_nonzero(values > high))
+        # Right-closed last bin, like np.histogram
+        bins = np.minimum(np.searchsorted(self.edges, inside, side='right') - 1, len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        return self
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bin edges")
+        self.counts += other.counts
+        self.below += other.below
+        self.above += other.above
+        return self
+
+    def coarsened(self, bins=30):
+        """
+        (counts, edges) over the occupied bins only, merged into about `bins`
+        bars for plotting; both empty when no value fell inside the range.
+        """
+        used = np.flatnonzero(self.counts)
+        if not len(used):
+            return np.zeros(0, dtype=np.int64), self.edges[:0]
+        step = max(1, -(-(used[-1] - used[0] + 1) // bins))
+        first = used[0] - used[0] % step
+        counts = np.add.reduceat(self.counts[first:used[-1] + 1], np.arange(0, used[-1] + 1 - first, step))
+        edges = self.edges[np.minimum(first + step * np.arange(len(counts) + 1), used[-1] + 1)]
+        return counts, edges
+
+
+class ColumnSketch:
+    """
+    Stands in for a numeric Series: count(), mean(), std(), var(), min(),
+    max() (exact, from MomentSketch) and quantile(q) (KLLSketch), plus an
+    optional fixed-bin histogram, from one pass over the values.
+
+    Args:
+        k (int): KLL size parameter.
+        hist_range (tuple, optional): (low, high) of the StreamingHistogram.
+        bins (int): Histogram bins.
+    """
+
+    def __init__(self, k=200, hist_range=None, bins=30, seed=0):
+        self.moments = MomentSketch()
+        self.quantiles = KLLSketch(k, seed)
+        self.histogram = StreamingHistogram(*hist_range, bins) if hist_range else None
+
+    def update(self, values):
+        values = _finite(values)
+        self.moments.update(values)
+        self.quantiles.update(values)
+        if self.histogram is not None:
+            self.histogram.update(values)
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        if self.histogram is not None:
+            self.histogram.merge(other.histogram)
+        return self
+
+    def __len__(self):
+        return self.moments.count
+
+    def count(self):
+        return self.moments.count
+
+    def mean(self):
+        return self.moments.mean if self.moments.count else float('nan')
+
+    def var(self):
+        return self.moments.variance
+
+    def std(self):
+        return self.moments.std
+
+    def min(self):
+        return self.moments.low if self.moments.count else float('nan')
+
+    def max(self):
+        return self.moments.high if self.moments.count else float('nan')
+
+    def quantile(self, q=0.5):
+        return self.quantiles.quantile(q)
+
+
+# --- Building sketches over chunks and partitions ---
+def sketch_frame(df, templates):
+    """
+    Fresh copies of the template sketches, updated with one frame.
+
+    Args:
+        templates (dict): {name: (column, empty sketch)} or {name: (column, empty sketch, by)};
+            with `by` the result is {level of by: sketch}.
+    """
+    out = {}
+    for name, (column, template, *by) in templates.items():
+        if by:
+            out[name] = {level: copy.deepcopy(template).update(group[column])
+                         for level, group in df.groupby(by[0], observed=True)}
+        else:
+            out[name] = copy.deepcopy(template).update(df[column])
+    return out
+
+
+def merge_sketches(parts):
+    """Merges a list of sketch_frame() results name by name (and level by level)."""
+    merged = {}
+    for part in parts:
+        for name, sketch in part.items():
+            if isinstance(sketch, dict):
+                target = merged.setdefault(name, {})
+                for level, s in sketch.items():
+                    target[level] = target[level].merge(s) if level in target else s
+            else:
+                merged[name] = merged[name].merge(sketch) if name in merged else sketch
+    return merged
+
+
+def sketch_chunks(chunks, templates, workers=1):
+    """
+    Sketches an iterable of frames (e.g. DataLoader.iter_chunks) in one pass.
+    With workers > 1 chunks are sketched in a process pool, with at most
+    2 x workers chunks in flight so memory stays bounded.
+
+    Returns:
+        dict: {name: merged sketch} (or {name: {level: sketch}} for grouped templates).
+    """
+    with stage('sketch_chunks') as rec:
+        rows, parts = 0, []
+        if (workers or os.cpu_count() or 1) == 1:
+            for chunk in chunks:
+                rows += len(chunk)
+                parts = [merge_sketches(parts + [sketch_frame(chunk, templates)])]
+        else:
+            workers = workers or os.cpu_count()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    rows += len(chunk)
+                    pending.append(pool.submit(sketch_frame, chunk, templates))
+                    if len(pending) >= 2 * workers:
+                        parts = [merge_sketches(parts + [pending.popleft().result()])]
+                parts = [merge_sketches(parts + [future.result() for future in pending])]
+        rec['rows'] = rows
+    return parts[0] if parts else {}
+
+
+def sketch_values(values, template, chunksize=1_000_000, workers=1):
+    """One sketch of an array / Series, built chunk by chunk (see sketch_chunks)."""
+    frame = pd.DataFrame({'value': np.asarray(values)})
+    chunks = (frame.iloc[start:start + chunksize] for start in range(0, len(frame), chunksize))
+    return sketch_chunks(chunks, {'value': ('value', template)}, workers).get('value', copy.deepcopy(template))
+
+
+def sketch_dataset(loader, source, templates, filters=None, schema=None, workers=None):
+    """
+    Sketches a multi-file / partitioned dataset (see DataLoader.load_dataset):
+    each worker sketches its group of files and only the sketches travel back.
+    """
+    from functools import partial
+    from src.partitions import read_partitioned
+    columns = list(dict.fromkeys(c for column, _, *by in templates.values() for c in [column] + by))
+    if isinstance(schema, str):
+        from src.data_loader import SCHEMAS
+        schema = SCHEMAS[schema]
+    parts, n_files, pruned = read_partitioned(os.path.join(loader.raw_dir, source), filters, columns, schema,
+                                              workers, reduce=partial(sketch_frame, templates=templates))
+    print(f"   [Sketch] {source}: {n_files:,} files sketched ({pruned:,} pruned)")
+    return merge_sketches(parts)
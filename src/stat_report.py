@@ -0,0 +1,69 @@
+"""
+Module: stat_report.py
+Description: Presentation layer for StatEngine results (console text; the engine itself returns numbers).
+"""
+import numpy as np
+
+
+def _verdict(p_val, alpha=0.05):
+    return "SIGNIFICANT" if p_val < alpha else "NOT SIGNIFICANT"
+
+
+def format_ttest(result):
+    """Console block for one t-test result (dict from StatEngine.ttest_ind / ttest_from_moments)."""
+    return (
+        f"T-Test ({result['label_a']} vs {result['label_b']}):\n"
+        f"   -> P-Value: {result['p_value']:.4f}\n"
+        f"   -> Result: {_verdict(result['p_value'])} difference detected."
+    )
+
+
+def format_anova(result):
+    """Console block for one ANOVA result (dict from StatEngine.anova)."""
+    return (
+        f"ANOVA Test:\n"
+        f"   -> F-Stat: {result['f_stat']:.2f}, P-Value: {result['p_value']:.4f}\n"
+        f"   -> Result: {_verdict(result['p_value'])} variance between groups."
+    )
+
+
+def format_permutation(result, title):
+    """Console block for a permutation test (dict from StatEngine.permutation_test)."""
+    return (
+        f"Permutation Test ({title}, {result['n']:,} rows, {result['n_resamples']:,} resamples):\n"
+        f"   -> {' vs '.join(map(str, result['groups']))}: {result['statistic']} = {result['observed']:.2f}\n"
+        f"   -> P-Value: {result['p_value']:.4f} ({_verdict(result['p_value'])})"
+    )
+
+
+def format_ci_table(table):
+    """One line per (group, statistic) of a bootstrap_ci / normal_ci table."""
+    level = table.attrs.get('confidence', 0.95)
+    return "\n".join(
+        f"   -> {row['group']:<12} {row['statistic']:<7} {row['estimate']:8.2f}  "
+        f"[{row['ci_low']:.2f}, {row['ci_high']:.2f}] ({level:.0%} CI)"
+        for _, row in table.iterrows()
+    )
+
+
+def format_test_table(table, title, top=5):
+    """
+    Summary of a batched result table (StatEngine.batch_ttest / batch_anova):
+    how many tests survive correction, then the strongest few.
+    """
+    tested = table['p_value'].notna()
+    lines = [
+        f"{title}:",
+        f"   -> {int(tested.sum())} tests ({int((~tested).sum())} skipped, too few rows), "
+        f"{table.attrs.get('correction') or 'no'} correction at alpha={table.attrs.get('alpha', 0.05)}",
+        f"   -> {int(table['significant'].sum())} significant after correction",
+    ]
+    effect = 'diff' if 'diff' in table else 'f_stat'
+    for _, row in table[tested].nsmallest(top, 'p_adj').iterrows():
+        size = f"diff {row[effect]:+.2f}" if effect == 'diff' else f"F {row[effect]:.2f}"
+        flag = '*' if row['significant'] else ' '
+        lines.append(f"   {flag} {row['dimension']:<14} {str(row['level']):<28} {size:<14} "
+                     f"p={row['p_value']:.4f} adj={row['p_adj']:.4f}")
+    if not np.any(tested):
+        lines.append("   -> nothing to test")
+    return "\n".join(lines)
@@ -1,42 +1,314 @@
-from scipy import stats
-import statsmodels.api as sm
+import numpy as np
 import pandas as pd
 
+from src import resampling
+from src.profiling import profiled, stage
+from src.stat_report import format_ttest, format_anova
+from src.streaming import RunningMoments
+
+
+def _as_moments(data):
+    """RunningMoments behind a sketch (RunningMoments / MomentSketch or sketches.ColumnSketch), else None."""
+    if isinstance(data, RunningMoments):
+        return data
+    return data.moments if isinstance(getattr(data, 'moments', None), RunningMoments) else None
+
 class StatEngine:
     """
     Encapsulates statistical tests and modeling.
+
+    Test methods return numbers (dicts / DataFrames); the run_* methods wrap
+    them with the console text from src.stat_report. scipy.stats and
+    statsmodels are imported by the methods that need them, so importing
+    this module stays cheap.
+
+    ttest_ind and anova also take moment sketches (src.sketches) in place of
+    raw samples, so tests can run on merged per-chunk statistics.
     """
-    
+
     @staticmethod
-    def run_ttest_ind(group_a, group_b, label_a, label_b):
-        """Performs independent T-test between two groups."""
+    def ttest_ind(group_a, group_b, label_a, label_b):
+        """Independent (pooled-variance) T-test between two samples (or two moment sketches)."""
+        moments_a, moments_b = _as_moments(group_a), _as_moments(group_b)
+        if moments_a is not None and moments_b is not None:
+            return StatEngine.ttest_from_moments(moments_a, moments_b, label_a, label_b)
+        from scipy import stats
         t_stat, p_val = stats.ttest_ind(group_a, group_b, nan_policy='omit')
-        
-        significance = "SIGNIFICANT" if p_val < 0.05 else "NOT SIGNIFICANT"
-        result_str = (
-            f"T-Test ({label_a} vs {label_b}):\n"
-            f"   -> P-Value: {p_val:.4f}\n"
-            f"   -> Result: {significance} difference detected."
+        return {'label_a': label_a, 'label_b': label_b, 't_stat': float(t_stat), 'p_value': float(p_val)}
+
+    @staticmethod
+    def ttest_from_moments(moments_a, moments_b, label_a, label_b):
+        """
+        Same pooled-variance T-test, computed from streamed sufficient statistics
+        (anything exposing count / mean / std, e.g. streaming.RunningMoments).
+        """
+        from scipy import stats
+        t_stat, p_val = stats.ttest_ind_from_stats(
+            moments_a.mean, moments_a.std, moments_a.count,
+            moments_b.mean, moments_b.std, moments_b.count,
         )
-        return result_str
+        return {'label_a': label_a, 'label_b': label_b, 't_stat': float(t_stat), 'p_value': float(p_val)}
+
+    @staticmethod
+    def anova(groups_dict):
+        """One-Way ANOVA on a dictionary of groups {name: data} (samples, or moment sketches)."""
+        from scipy import stats
+        moments = [_as_moments(group) for group in groups_dict.values()]
+        if all(m is not None for m in moments):
+            return StatEngine.anova_from_moments(dict(zip(groups_dict, moments)))
+        f_stat, p_val = stats.f_oneway(*groups_dict.values())
+        return {'groups': list(groups_dict), 'f_stat': float(f_stat), 'p_value': float(p_val)}
+
+    @staticmethod
+    def anova_from_moments(moments_dict):
+        """One-Way ANOVA from per-group count / mean / M2 (e.g. {level: RunningMoments})."""
+        from scipy import stats
+        n = np.array([m.count for m in moments_dict.values()], dtype=float)
+        means = np.array([m.mean for m in moments_dict.values()], dtype=float)
+        m2 = np.array([m.m2 for m in moments_dict.values()], dtype=float)
+        total, k = n.sum(), len(n)
+        grand = (n * means).sum() / total
+        ss_between, ss_within = (n * (means - grand) ** 2).sum(), m2.sum()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            f_stat = (ss_between / (k - 1)) / (ss_within / (total - k))
+        return {'groups': list(moments_dict), 'f_stat': float(f_stat),
+                'p_value': float(stats.f.sf(f_stat, k - 1, total - k))}
+
+    @staticmethod
+    @profiled('StatEngine.run_ttest_ind', rows='input')
+    def run_ttest_ind(group_a, group_b, label_a, label_b):
+        """Performs independent T-test between two groups."""
+        return format_ttest(StatEngine.ttest_ind(group_a, group_b, label_a, label_b))
+
+    @staticmethod
+    def run_ttest_from_moments(moments_a, moments_b, label_a, label_b):
+        """String report for ttest_from_moments."""
+        return format_ttest(StatEngine.ttest_from_moments(moments_a, moments_b, label_a, label_b))
 
     @staticmethod
     def run_anova(groups_dict):
         """Performs One-Way ANOVA on dictionary of groups {name: data}."""
-        values = list(groups_dict.values())
-        f_stat, p_val = stats.f_oneway(*values)
-        
-        significance = "SIGNIFICANT" if p_val < 0.05 else "NOT SIGNIFICANT"
-        return (
-            f"ANOVA Test:\n"
-            f"   -> F-Stat: {f_stat:.2f}, P-Value: {p_val:.4f}\n"
-            f"   -> Result: {significance} variance between groups."
-        )
+        return format_anova(StatEngine.anova(groups_dict))
+
+    # --- Batched tests ---
+    @staticmethod
+    @profiled('StatEngine.group_moments', rows='input')
+    def group_moments(df, keys, value):
+        """
+        Sufficient statistics (count, sum, sum of squares) per group in one
+        groupby pass. Coarser groupings are rolled up from this table without
+        touching the rows again.
+
+        Values are shifted by their overall mean before summing (as in
+        RetailCube / StudentCube), which keeps sumsq - sum * mean well
+        conditioned when the mean is large next to the spread.
+
+        Returns:
+            pd.DataFrame: One row per observed key combination; sums are of
+            value - attrs['shift'].
+        """
+        x = df[value].to_numpy(dtype=float)
+        finite = np.isfinite(x)
+        shift = float(x[finite].mean()) if finite.any() else 0.0
+        frame = pd.DataFrame({k: df[k] for k in keys})
+        frame['_x'] = x - shift
+        frame['_x2'] = frame['_x'] ** 2
+        grouped = frame.groupby(list(keys), observed=True, sort=True)
+        out = grouped.agg(count=('_x', 'count'), sum=('_x', 'sum'), sumsq=('_x2', 'sum')).reset_index()
+        out.attrs['shift'] = shift
+        return out
+
+    @staticmethod
+    def adjust_pvalues(p_values, method='holm'):
+        """
+        Multiple-comparison correction over one family of tests. NaN
+        p-values (untestable cells) are ignored and stay NaN.
+
+        Args:
+            method (str): 'holm' (family-wise error), 'bh' (Benjamini-Hochberg
+                false discovery rate) or None.
+        """
+        p = np.asarray(p_values, dtype=float)
+        if method is None:
+            return p.copy()
+        out = np.full(p.shape, np.nan)
+        valid = np.flatnonzero(~np.isnan(p))
+        m = len(valid)
+        if m == 0:
+            return out
+        order = valid[np.argsort(p[valid], kind='stable')]
+        ranked = p[order]
+        if method == 'holm':
+            adj = np.maximum.accumulate((m - np.arange(m)) * ranked)
+        elif method == 'bh':
+            adj = np.minimum.accumulate((m / np.arange(1, m + 1) * ranked)[::-1])[::-1]
+        else:
+            raise ValueError(f"Unknown correction {method!r}; use 'holm', 'bh' or None")
+        out[order] = np.minimum(adj, 1.0)
+        return out
+
+    @staticmethod
+    def _rollup(moments, keys):
+        """Sums sufficient statistics up to a coarser set of keys."""
+        grouped = moments.groupby(list(keys), observed=True, sort=True)
+        return grouped[['count', 'sum', 'sumsq']].sum().reset_index()
+
+    @staticmethod
+    def _describe(count, total, sumsq, shift=0.0):
+        """Mean and variance (ddof=1) from sums of value - shift."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            var = np.maximum(sumsq - total * mean, 0) / (count - 1)
+        return mean + shift, np.where(count > 1, var, np.nan)
+
+    @staticmethod
+    def _levels(frame, by):
+        if not by:
+            return pd.Series('All', index=frame.index)
+        parts = [frame[c].astype(str) for c in by]
+        return parts[0].str.cat(parts[1:], sep=' | ') if len(parts) > 1 else parts[0]
+
+    @staticmethod
+    def _finish(parts, correction, alpha):
+        table = pd.concat(parts, ignore_index=True)
+        table['p_adj'] = StatEngine.adjust_pvalues(table['p_value'], correction)
+        table['significant'] = table['p_adj'] < alpha
+        table.attrs.update({'correction': correction, 'alpha': alpha})
+        return table
+
+    @staticmethod
+    def batch_ttest(df, value, compare, label_a, label_b, dimensions, equal_var=True,
+                    correction='holm', alpha=0.05):
+        """
+        `label_a` vs `label_b` of column `compare`, tested separately within
+        every level of every dimension, all from one groupby pass.
+
+        Args:
+            df (pd.DataFrame): Rows to test.
+            value (str): Numeric column (e.g. 'Total').
+            compare (str): Two-group column (e.g. 'Customer_Type').
+            dimensions (list): Column names or tuples of names to split by;
+                () tests the whole frame.
+            equal_var (bool): Pooled-variance (True) or Welch (False) test.
+            correction (str): 'holm', 'bh' or None, applied across all tests.
+
+        Returns:
+            pd.DataFrame: One row per test: dimension, level, n/mean/sd per
+            group, diff, t_stat, df, p_value, p_adj, significant.
+        """
+        dims = [(d,) if isinstance(d, str) else tuple(d) for d in dimensions]
+        keys = list(dict.fromkeys(k for d in dims for k in d)) + [compare]
+        with stage('StatEngine.batch_ttest', rows=len(df)):
+            moments = StatEngine.group_moments(df, keys, value)
+            parts = []
+            for by in dims:
+                rolled = StatEngine._rollup(moments, list(by) + [compare])
+                rolled['_all'] = 0
+                a = rolled[rolled[compare] == label_a].drop(columns=compare)
+                b = rolled[rolled[compare] == label_b].drop(columns=compare)
+                pair = a.merge(b, on=list(by) + ['_all'], how='outer', suffixes=('_a', '_b'))
+                parts.append(StatEngine._ttest_arrays(pair, by, equal_var, moments.attrs['shift']))
+        return StatEngine._finish(parts, correction, alpha)
+
+    @staticmethod
+    def _ttest_arrays(pair, by, equal_var, shift=0.0):
+        """Vectorised two-sample t statistics over aligned moment columns."""
+        from scipy import stats
+        # A level missing one of the groups comes out of the outer merge as NaN
+        col = lambda name: pair[name].fillna(0).to_numpy(dtype=float)
+        n1, n2 = col('count_a'), col('count_b')
+        m1, v1 = StatEngine._describe(n1, col('sum_a'), col('sumsq_a'), shift)
+        m2, v2 = StatEngine._describe(n2, col('sum_b'), col('sumsq_b'), shift)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if equal_var:
+                dof = n1 + n2 - 2
+                se = np.sqrt(((n1 - 1) * v1 + (n2 - 1) * v2) / dof * (1 / n1 + 1 / n2))
+            else:
+                q1, q2 = v1 / n1, v2 / n2
+                se = np.sqrt(q1 + q2)
+                dof = (q1 + q2) ** 2 / (q1 ** 2 / (n1 - 1) + q2 ** 2 / (n2 - 1))
+            t_stat = (m1 - m2) / se
+        testable = (n1 > 1) & (n2 > 1) & (se > 0)
+        t_stat = np.where(testable, t_stat, np.nan)
+        dof = np.where(testable, dof, np.nan)
+        return pd.DataFrame({
+            'dimension': ' x '.join(by) or 'Overall',
+            'level': StatEngine._levels(pair, by).to_numpy(),
+            **{k: pair[k].to_numpy() for k in by},
+            'n_a': n1.astype(int), 'mean_a': m1, 'sd_a': np.sqrt(v1),
+            'n_b': n2.astype(int), 'mean_b': m2, 'sd_b': np.sqrt(v2),
+            'diff': m1 - m2, 't_stat': t_stat, 'df': dof,
+            'p_value': 2 * stats.t.sf(np.abs(t_stat), dof),
+        })
+
+    @staticmethod
+    def batch_anova(df, value, groups, dimensions, correction='holm', alpha=0.05):
+        """
+        One-way ANOVA of `value` across the levels of `groups`, within every
+        level of every dimension, from one groupby pass.
+
+        Returns:
+            pd.DataFrame: One row per test: dimension, level, k (groups), n,
+            f_stat, df_between, df_within, p_value, p_adj, significant.
+        """
+        dims = [(d,) if isinstance(d, str) else tuple(d) for d in dimensions]
+        keys = list(dict.fromkeys(k for d in dims for k in d)) + [groups]
+        with stage('StatEngine.batch_anova', rows=len(df)):
+            moments = StatEngine.group_moments(df, keys, value)
+            parts = []
+            for by in dims:
+                cells = StatEngine._rollup(moments, list(by) + [groups])
+                cells['_block'] = 0 if not by else cells.groupby(list(by), observed=True, sort=True).ngroup()
+                parts.append(StatEngine._anova_arrays(cells, by))
+        return StatEngine._finish(parts, correction, alpha)
+
+    @staticmethod
+    def _anova_arrays(cells, by):
+        """Vectorised F statistics: between/within sums of squares per block (both shift-invariant)."""
+        from scipy import stats
+        block = cells['_block'].to_numpy()
+        n = cells['count'].to_numpy(float)
+        s = cells['sum'].to_numpy(float)
+        ss = cells['sumsq'].to_numpy(float)
+        n_blocks = block.max() + 1
+        N = np.bincount(block, n, n_blocks)
+        k = np.bincount(block, minlength=n_blocks).astype(float)
+        grand = np.bincount(block, s, n_blocks) / N
+        # SS_within = sum(x^2) - sum_g(S_g^2 / n_g); SS_between = sum_g(S_g^2 / n_g) - N * grand^2
+        explained = np.bincount(block, s * s / n, n_blocks)
+        ss_within = np.maximum(np.bincount(block, ss, n_blocks) - explained, 0)
+        ss_between = np.maximum(explained - N * grand ** 2, 0)
+        df_b, df_w = k - 1, N - k
+        with np.errstate(invalid='ignore', divide='ignore'):
+            f_stat = (ss_between / df_b) / (ss_within / df_w)
+        testable = (df_b > 0) & (df_w > 0) & (ss_within > 0)
+        f_stat = np.where(testable, f_stat, np.nan)
+        first = cells.drop_duplicates('_block').sort_values('_block')
+        return pd.DataFrame({
+            'dimension': ' x '.join(by) or 'Overall',
+            'level': StatEngine._levels(first, by).to_numpy(),
+            **{c: first[c].to_numpy() for c in by},
+            'k': k.astype(int), 'n': N.astype(int),
+            'f_stat': f_stat, 'df_between': df_b, 'df_within': df_w,
+            'p_value': stats.f.sf(f_stat, df_b, df_w),
+        })
+
+    # --- Resampling ---
+    @staticmethod
+    def bootstrap_ci(groups, **kwargs):
+        """Percentile bootstrap CIs per group; see resampling.bootstrap_ci."""
+        return resampling.bootstrap_ci(groups, **kwargs)
+
+    @staticmethod
+    def permutation_test(values, labels, **kwargs):
+        """Label-permutation test of group mean differences; see resampling.permutation_test."""
+        return resampling.permutation_test(values, labels, **kwargs)
 
     @staticmethod
     def train_ols_regression(X, y):
         """Trains an OLS Regression model and returns the summary."""
+        import statsmodels.api as sm
         # Add constant for intercept (y = mx + b)
         X_const = sm.add_constant(X)
         model = sm.OLS(y, X_const).fit()
-        return model
\ No newline at end of file
+        return model
@@ -0,0 +1,279 @@
+"""
+Module: store.py
+Description: Indexed append-only SQLite store per dataset (idempotent upserts, date / entity range queries).
+
+Usage:
+    python -m src.store ingest supermarket_sales.csv                      # raw file (or --file new_batch.csv)
+    python -m src.store query supermarket_sales.csv --days 90 --where Branch=B
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import DATE, SCHEMAS, DataLoader
+from src.features import parse_dates
+from src.profiling import stage
+
+# Natural key per dataset; entity columns (Region, Ticker, Station) only take part when the file has them
+KEYS = {
+    'supermarket_sales.csv': ['Invoice_ID'],
+    'student_performance.csv': ['Student_ID'],
+    'healthcare_covid.csv': ['Region', 'Date'],
+    'finance_stocks.csv': ['Ticker', 'Date'],
+    'weather_data.csv': ['Station', 'Date'],
+    'house_prices.csv': ['Property_ID'],
+}
+# Physical row order: a range on a leading prefix (Branch, then Date) reads contiguous pages
+CLUSTER = {
+    'supermarket_sales.csv': ['Branch', 'Date'],
+}
+# Secondary indexes for the other range queries (skipped when they are a prefix of the row order)
+INDEXES = {
+    'supermarket_sales.csv': [['Date']],
+    'healthcare_covid.csv': [['Date']],
+    'finance_stocks.csv': [['Date']],
+    'weather_data.csv': [['Date']],
+}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(series):
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(series):
+        return 'REAL'
+    return 'TEXT'
+
+
+class DatasetStore:
+    """
+    One SQLite table per dataset, unique on the dataset's natural key,
+    stored in (Branch, Date) order and indexed on Date, so appends and
+    "last N days for one branch" queries cost O(batch) and O(matching rows),
+    not O(history).
+
+    Writes are upserts: re-ingesting a batch is a no-op (unchanged rows are
+    not rewritten) and corrected rows replace the stored ones. Dates are
+    stored as ISO text, so they sort and range-compare as dates.
+
+    Args:
+        path (str): SQLite file (created on first use).
+        dataset (str): Raw file name, selects KEYS / INDEXES / SCHEMAS.
+    """
+
+    def __init__(self, path, dataset):
+        self.path = path
+        self.dataset = dataset
+        self.table = _quote(os.path.splitext(dataset)[0])
+        self.schema = SCHEMAS.get(dataset, {})
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.columns = [row[1] for row in self.conn.execute(f'PRAGMA table_info({self.table})')]
+        self.key = [c for c in KEYS.get(dataset, []) if c in self.columns]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        if not self.columns:
+            return 0
+        return self.conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    # --- Writing ---
+    def _create(self, df):
+        """Creates the table and its indexes from the first batch's columns and dtypes."""
+        key = [c for c in KEYS.get(self.dataset, []) if c in df.columns]
+        if not key:
+            raise ValueError(f"No key columns for {self.dataset}; expected {KEYS.get(self.dataset)}")
+        columns = ', '.join(f'{_quote(c)} {"TEXT" if self.schema.get(c) == DATE else _sql_type(df[c])}'
+                            for c in df.columns)
+        order = [c for c in CLUSTER.get(self.dataset, []) if c in df.columns]
+        order += [c for c in key if c not in order]
+        stem = os.path.splitext(self.dataset)[0]
+        with self.conn:
+            self.conn.execute(f'CREATE TABLE {self.table} ({columns}, '
+                              f'PRIMARY KEY ({", ".join(map(_quote, order))})) WITHOUT ROWID')
+            if order != key:
+                self.conn.execute(f'CREATE UNIQUE INDEX {_quote(stem + "_key")} '
+                                  f'ON {self.table} ({", ".join(map(_quote, key))})')
+            for index in INDEXES.get(self.dataset, []):
+                if all(c in df.columns for c in index) and index != order[:len(index)]:
+                    name = _quote(f"{stem}_{'_'.join(index)}")
+                    self.conn.execute(f'CREATE INDEX {name} ON {self.table} ({", ".join(map(_quote, index))})')
+        self.columns, self.key = list(df.columns), key
+
+    def _values(self, df):
+        """Column lists of SQLite-ready Python values (ISO dates, None for missing)."""
+        out = []
+        for col in df.columns:
+            series = df[col]
+            if self.schema.get(col) == DATE or pd.api.types.is_datetime64_any_dtype(series):
+                days = parse_dates(series).astype('datetime64[s]')
+                unit = 'D' if (days.astype('datetime64[D]') == days)[~np.isnat(days)].all() else 's'
+                text = np.datetime_as_string(days, unit=unit)
+                out.append(np.where(np.isnat(days), None, text).tolist())
+            else:
+                out.append(series.astype(object).where(series.notna(), None).tolist())
+        return out
+
+    def upsert(self, df):
+        """
+        Inserts new rows and updates changed ones (by key) in one transaction.
+
+        Args:
+            df (pd.DataFrame): Rows with the dataset's columns (a subset is allowed
+                as long as it holds the key; Date may be strings or datetimes).
+                Key and row-order (CLUSTER) columns must not be missing.
+
+        Returns:
+            int: Rows written (inserted or changed).
+        """
+        if df.empty:
+            return 0
+        if not self.columns:
+            self._create(df)
+        unknown = [c for c in df.columns if c not in self.columns]
+        missing = [c for c in self.key if c not in df.columns]
+        if unknown or missing:
+            raise ValueError(f"{self.dataset}: unknown columns {unknown}, missing key columns {missing}")
+
+        names = ', '.join(map(_quote, df.columns))
+        sql = f'INSERT INTO {self.table} ({names}) VALUES ({", ".join("?" * len(df.columns))})'
+        values = [c for c in df.columns if c not in self.key]
+        if values:
+            new = ', '.join(f'excluded.{_quote(c)}' for c in values)
+            old = ', '.join(_quote(c) for c in values)
+            sets = ', '.join(f'{_quote(c)} = excluded.{_quote(c)}' for c in values)
+            # Rows that did not change are left alone, so replaying a batch writes nothing
+            sql += (f' ON CONFLICT ({", ".join(map(_quote, self.key))}) DO UPDATE SET {sets}'
+                    f' WHERE ({old}) IS NOT ({new})')
+        else:
+            sql += ' ON CONFLICT DO NOTHING'
+
+        with stage(f"store.upsert:{self.dataset}", rows=len(df)):
+            before = self.conn.total_changes
+            with self.conn:
+                self.conn.executemany(sql, zip(*self._values(df)))
+            return self.conn.total_changes - before
+
+    def ingest(self, chunks):
+        """Upserts an iterable of frames (e.g. DataLoader.iter_chunks); returns rows written."""
+        written = 0
+        for chunk in chunks:
+            written += self.upsert(chunk)
+        print(f"   [Store] {self.dataset}: {written:,} rows written, {len(self):,} stored")
+        return written
+
+    # --- Queries ---
+    def _where(self, start=None, end=None, **filters):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append('"Date" >= ?')
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            # Whole days: everything before the next midnight
+            clauses.append('"Date" < ?')
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+        for col, wanted in filters.items():
+            if col not in self.columns:
+                raise KeyError(f"{self.dataset} has no column {col!r}")
+            wanted = list(wanted) if isinstance(wanted, (list, tuple, set, pd.Index)) else [wanted]
+            clauses.append(f'{_quote(col)} IN ({", ".join("?" * len(wanted))})')
+            params.extend(wanted)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def query(self, start=None, end=None, columns=None, **filters):
+        """
+        Rows with start <= Date <= end (whole days; either bound optional) that
+        match every filter, e.g. query('2023-10-01', Branch='B') or
+        query(Branch=['A', 'C']). Only the index range that matches is read.
+
+        Returns:
+            pd.DataFrame: Typed like DataLoader.load_csv (dates parsed, SCHEMAS categoricals).
+        """
+        if not self.columns:
+            return pd.DataFrame(columns=columns or [])
+        columns = list(columns or self.columns)
+        where, params = self._where(start, end, **filters)
+        order = ' ORDER BY "Date"' if 'Date' in self.columns else ''
+        sql = f'SELECT {", ".join(map(_quote, columns))} FROM {self.table}{where}{order}'
+        with stage(f"store.query:{self.dataset}") as rec:
+            df = pd.DataFrame.from_records(self.conn.execute(sql, params).fetchall(), columns=columns)
+            for col in columns:
+                if self.schema.get(col) == DATE:
+                    df[col] = parse_dates(df[col]).astype(DATE)
+                elif self.schema.get(col) == 'category':
+                    df[col] = df[col].astype('category')
+            rec['rows'] = len(df)
+        return df
+
+    def last_date(self):
+        """Latest stored Date (an index lookup), None while empty."""
+        if 'Date' not in self.columns:
+            return None
+        latest = self.conn.execute(f'SELECT MAX("Date") FROM {self.table}').fetchone()[0]
+        return None if latest is None else pd.Timestamp(latest)
+
+    def last_days(self, days, columns=None, **filters):
+        """The `days` most recent days of data (counted back from last_date()), e.g. last_days(90, Branch='B')."""
+        end = self.last_date()
+        if end is None:
+            return self.query(columns=columns, **filters)
+        return self.query(end.normalize() - pd.Timedelta(days=days - 1), end, columns, **filters)
+
+    def explain(self, start=None, end=None, **filters):
+        """SQLite's plan for query(start, end, **filters), e.g. ['SEARCH ... USING INDEX ...']."""
+        where, params = self._where(start, end, **filters)
+        plan = self.conn.execute(f'EXPLAIN QUERY PLAN SELECT * FROM {self.table}{where}', params).fetchall()
+        return [row[-1] for row in plan]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest into / query the indexed dataset store")
+    parser.add_argument('action', choices=['ingest', 'query'])
+    parser.add_argument('dataset', help='Raw file name, e.g. supermarket_sales.csv')
+    parser.add_argument('--raw-dir', default='data/raw')
+    parser.add_argument('--file', help='ingest: CSV batch to upsert instead of the raw file')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--days', type=int, help='query: most recent N days')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--where', nargs='*', default=[], metavar='COLUMN=VALUE')
+    args = parser.parse_args()
+
+    loader = DataLoader(args.raw_dir)
+    with loader.store(args.dataset) as store:
+        start = time.perf_counter()
+        if args.action == 'ingest':
+            if args.file:
+                store.ingest(pd.read_csv(args.file, chunksize=args.chunksize))
+            else:
+                store.ingest(loader.iter_chunks(args.dataset, chunksize=args.chunksize))
+        else:
+            filters = dict(item.split('=', 1) for item in args.where)
+            if args.days:
+                df = store.last_days(args.days, **filters)
+            else:
+                df = store.query(args.start, args.end, **filters)
+            print(df.to_string(max_rows=20))
+            print(f"   [Store] {len(df):,} of {len(store):,} rows")
+        print(f"   [Store] Done in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Module: streaming.py
+Description: Mergeable running moments for out-of-core analytics (streamed chunks, cubes, sketches).
+"""
+import numpy as np
+
+
+class RunningMoments:
+    """
+    Count / mean / M2 sufficient statistics (Welford), mergeable across chunks.
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, values):
+        """Folds a batch of values in using the parallel (Chan et al.) combination."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        batch_mean = values.mean()
+        batch = RunningMoments(values.size, batch_mean, ((values - batch_mean) ** 2).sum())
+        return self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / n
+        self.count = n
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1), matching pandas/scipy defaults."""
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    def __repr__(self):
+        return f"RunningMoments(count={self.count}, mean={self.mean:.4f}, std={self.std:.4f})"
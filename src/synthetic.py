@@ -0,0 +1,165 @@
+"""
+Module: synthetic.py
+Description: Parameterised synthetic dataset generators (row count, seed, entity count).
+"""
+import numpy as np
+import pandas as pd
+
+CITIES = ['Yangon', 'Mandalay', 'Naypyitaw']
+PRODUCT_LINES = ['Health & Beauty', 'Electronic Accessories', 'Home & Lifestyle',
+                 'Sports & Travel', 'Food & Beverages', 'Fashion Accessories']
+PAYMENTS = ['Ewallet', 'Cash', 'Credit card']
+
+
+def _rng(seed):
+    return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+
+def _entity_names(prefix, n):
+    width = len(str(n - 1))
+    return [f"{prefix}{i:0{width}d}" for i in range(n)]
+
+
+def make_students(n=500, seed=None, n_schools=1):
+    """
+    Education: Study hours, attendance, gender and study method -> Score.
+    With n_schools > 1 rows gain 'School' and 'Grade' (9-12) columns and
+    each school shifts scores by its own offset.
+    """
+    rng = _rng(seed)
+    df = pd.DataFrame({
+        'Student_ID': np.arange(n),
+        'Study_Hours': rng.normal(5, 2, n).clip(1, 10),
+        'Attendance': rng.integers(60, 100, n),
+        'Gender': rng.choice(['Male', 'Female'], n),
+        'Method': rng.choice(['Self-Study', 'Group', 'Online'], n),
+    })
+    # Score depends on hours + noise
+    score = 40 + 4 * df['Study_Hours'] + rng.normal(0, 5, n)
+    if n_schools > 1:
+        school = rng.integers(0, n_schools, n)
+        df.insert(1, 'School', np.array(_entity_names('SCH', n_schools))[school])
+        df.insert(2, 'Grade', rng.integers(9, 13, n))
+        score += rng.normal(0, 4, n_schools)[school]
+    df['Score'] = score.clip(0, 100)
+    return df
+
+
+def make_healthcare(n_days=120, n_regions=1, seed=None):
+    """
+    Healthcare: epidemic curve per region. Recoveries lag cases by 10 days
+    (90%), deaths by 14 days (2%). A 'Region' column is added when n_regions > 1.
+    """
+    rng = _rng(seed)
+    dates = pd.date_range('2024-01-01', periods=n_days)
+    x = np.linspace(0, np.pi, n_days)
+    scale = rng.uniform(0.5, 1.5, (n_regions, 1)) if n_regions > 1 else np.ones((1, 1))
+    cases = (scale * (1000 + 2000 * np.sin(x)) + rng.normal(0, 50, (n_regions, n_days))).astype(int)
+    recovered = np.zeros(cases.shape)
+    deaths = np.zeros(cases.shape)
+    recovered[:, 10:] = cases[:, :-10] * 0.90
+    deaths[:, 14:] = cases[:, :-14] * 0.02
+
+    df = pd.DataFrame({'Date': np.tile(dates, n_regions)})
+    if n_regions > 1:
+        df.insert(1, 'Region', np.repeat(_entity_names('R', n_regions), n_days))
+    df['New_Cases'] = cases.ravel()
+    df['Recovered'] = recovered.ravel()
+    df['Deaths'] = deaths.ravel()
+    return df
+
+
+def make_finance(n_days=100, n_tickers=1, seed=None):
+    """Finance: random-walk close prices and volume; long format with 'Ticker' when n_tickers > 1."""
+    rng = _rng(seed)
+    dates = pd.date_range('2024-01-01', periods=n_days)
+    if n_tickers > 1:
+        # Geometric walk (~1.5% daily vol) keeps long multi-ticker panels positive
+        start = rng.uniform(20, 500, (n_tickers, 1))
+        close = start * np.exp(np.cumsum(rng.normal(0, 0.015, (n_tickers, n_days)), axis=1))
+    else:
+        close = np.cumsum(rng.standard_normal((n_tickers, n_days)), axis=1) + 150.0
+
+    df = pd.DataFrame({'Date': np.tile(dates, n_tickers)})
+    if n_tickers > 1:
+        df.insert(1, 'Ticker', np.repeat(_entity_names('T', n_tickers), n_days))
+    df['Close_Price'] = close.ravel()
+    df['Volume'] = rng.integers(1000, 5000, n_tickers * n_days)
+    return df
+
+
+def make_weather(n_days=365, n_stations=1, seed=None):
+    """Weather: seasonal temperature/humidity and sporadic rainfall; 'Station' column when n_stations > 1."""
+    rng = _rng(seed)
+    dates = pd.date_range('2024-01-01', periods=n_days)
+    phase = 2 * np.pi * np.arange(n_days) / 365
+    offset = rng.normal(0, 3, (n_stations, 1)) if n_stations > 1 else np.zeros((1, 1))
+    shape = (n_stations, n_days)
+
+    df = pd.DataFrame({'Date': np.tile(dates, n_stations)})
+    if n_stations > 1:
+        df.insert(1, 'Station', np.repeat(_entity_names('S', n_stations), n_days))
+    df['Temp_C'] = (20 + offset + 15 * np.sin(phase) + rng.normal(0, 2, shape)).ravel()
+    df['Rainfall_mm'] = np.where(rng.random(shape) > 0.8, rng.exponential(5, shape), 0).ravel()
+    df['Humidity'] = (50 + 20 * np.sin(phase) + rng.normal(0, 5, shape)).ravel()
+    return df
+
+
+LOCATIONS = {'Rural': 6400, 'Suburb': 9600, 'City Center': 12500}   # price per sq ft
+PROPERTY_TYPES = {'Apartment': 0.98, 'House': 1.0, 'Villa': 1.03}
+
+
+def make_houses(n=300, seed=None):
+    """Real estate: listings with the schema of house_prices.csv; price ~ area x location rate, lognormal noise."""
+    rng = _rng(seed)
+    location = rng.choice(list(LOCATIONS), n)
+    ptype = rng.choice(list(PROPERTY_TYPES), n)
+    df = pd.DataFrame({
+        'Property_ID': [f"PROP{i + 1:04d}" for i in range(n)],
+        'Area': rng.integers(500, 5000, n),
+        'Bedrooms': rng.integers(1, 6, n),
+        'Bathrooms': rng.integers(1, 4, n),
+        'Age': rng.integers(0, 50, n),
+        'Location': location,
+        'Property_Type': ptype,
+    })
+    rate = pd.Series(location).map(LOCATIONS).to_numpy() * pd.Series(ptype).map(PROPERTY_TYPES).to_numpy()
+    price = df['Area'] * rate * (1 + 0.03 * df['Bedrooms']) * np.exp(rng.normal(0, 0.06, n))
+    df['Price'] = (price / 2500).round() * 2500
+    return df
+
+
+def make_retail_sales(n=2000, n_branches=3, seed=None, start='2023-01-01', days=365):
+    """
+    Retail: invoices with the schema of supermarket_sales.csv. Branches are
+    lettered A, B, C, ... (AA, AB, ... beyond 26); each has a home city.
+    Total = Unit_Price * Quantity + 5% tax.
+    """
+    rng = _rng(seed)
+    letters = [chr(ord('A') + i) for i in range(26)]
+    branches = np.array([letters[i] if i < 26 else letters[i // 26 - 1] + letters[i % 26]
+                         for i in range(n_branches)])
+    branch_idx = rng.integers(0, n_branches, n)
+    unit_price = rng.uniform(10, 100, n).round(2)
+    quantity = rng.integers(1, 10, n)
+    tax = (unit_price * quantity * 0.05).round(2)
+    dates = pd.date_range(start, periods=days).strftime('%Y-%m-%d').to_numpy()
+    # Opening hours 08:00-19:59, written like the source feed ('9:05', '14:30')
+    times = np.array([f"{h}:{m:02d}" for h in range(8, 20) for m in range(60)])
+
+    return pd.DataFrame({
+        'Invoice_ID': np.char.add('INV', np.char.zfill(np.arange(1, n + 1).astype(str), 7)),
+        'Branch': branches[branch_idx],
+        'City': np.array(CITIES)[branch_idx % len(CITIES)],
+        'Customer_Type': rng.choice(['Member', 'Normal'], n),
+        'Gender': rng.choice(['Male', 'Female'], n),
+        'Product_Line': rng.choice(PRODUCT_LINES, n),
+        'Unit_Price': unit_price,
+        'Quantity': quantity,
+        'Tax': tax,
+        'Total': (unit_price * quantity + tax).round(2),
+        'Date': dates[rng.integers(0, days, n)],
+        'Time': times[rng.integers(0, len(times), n)],
+        'Payment': rng.choice(PAYMENTS, n),
+        'Rating': rng.uniform(4, 10, n).round(1),
+    })
@@ -0,0 +1,200 @@
+"""
+Module: valuation.py
+Description: House-price valuation: fitted listing encodings, OLS / ridge log-price models compiled for batch scoring.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import RidgeCV
+
+from src.profiling import stage
+from src.statistics import StatEngine
+
+NUMERIC = ['Area', 'Bedrooms', 'Bathrooms', 'Age']
+CATEGORICAL = ['Location', 'Property_Type']
+LOG_FEATURES = ['Area']
+TARGET = 'Price'
+METHODS = ('ols', 'ridge')
+
+
+class ListingEncoder:
+    """
+    Feature encoding fitted once on training listings and reused for scoring.
+
+    - Numeric columns pass through (log-transformed for LOG_FEATURES).
+    - Categoricals with at most `max_onehot` levels are one-hot encoded
+      (first level is the baseline); larger ones get a smoothed target
+      encoding (level mean of the target, shrunk towards the global mean).
+    - Levels unseen at fit time encode as the training-frequency-weighted
+      average level (one-hot) or the global mean (target encoding).
+    """
+
+    def __init__(self, numeric=NUMERIC, categorical=CATEGORICAL, log_features=LOG_FEATURES,
+                 max_onehot=20, smoothing=20):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.log_features = [c for c in log_features if c in self.numeric]
+        self.max_onehot = max_onehot
+        self.smoothing = smoothing
+
+    def fit(self, df, y):
+        self.levels = {}
+        self.frequencies = {}
+        self.target_means = {}
+        for col in self.categorical:
+            codes, levels = pd.factorize(df[col], sort=True)
+            self.levels[col] = pd.Index(levels)
+            self.frequencies[col] = np.bincount(codes[codes >= 0], minlength=len(levels)) / max((codes >= 0).sum(), 1)
+            if len(levels) > self.max_onehot:
+                counts = np.bincount(codes[codes >= 0], minlength=len(levels))
+                sums = np.bincount(codes[codes >= 0], weights=y[codes >= 0], minlength=len(levels))
+                # Deviation from the global mean, shrunk for rare levels
+                self.target_means[col] = (sums - counts * y.mean()) / (counts + self.smoothing)
+        self.onehot = [c for c in self.categorical if c not in self.target_means]
+        self.columns = (
+            [f'log_{c}' if c in self.log_features else c for c in self.numeric]
+            + [f'{c}={lv}' for c in self.onehot for lv in self.levels[c][1:]]
+            + [f'{c}_te' for c in self.target_means]
+        )
+        return self
+
+    def codes(self, df, col):
+        """Integer codes into the fitted levels (-1 = unseen); categoricals map their categories only."""
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            lookup = np.append(self.levels[col].get_indexer(values.cat.categories), -1)
+            return lookup[values.cat.codes.to_numpy()]
+        return self.levels[col].get_indexer(values)
+
+    def numeric_block(self, df):
+        x = df[self.numeric].to_numpy(dtype=np.float64, copy=True)
+        for col in self.log_features:
+            i = self.numeric.index(col)
+            np.log(x[:, i], out=x[:, i])
+        return x
+
+    def transform(self, df):
+        """Dense design matrix (no intercept column), in `columns` order."""
+        blocks = [self.numeric_block(df)]
+        for col in self.onehot:
+            codes = self.codes(df, col)
+            block = np.zeros((len(df), len(self.levels[col]) - 1))
+            rows = np.flatnonzero(codes > 0)
+            block[rows, codes[rows] - 1] = 1.0
+            block[codes < 0] = self.frequencies[col][1:]
+            blocks.append(block)
+        for col, means in self.target_means.items():
+            blocks.append(np.append(means, 0.0)[self.codes(df, col)][:, None])
+        return np.hstack(blocks)
+
+
+class ValuationModel:
+    """
+    Linear model of log(Price), compiled for scoring: the numeric block is
+    one matrix-vector product, and each categorical block (one-hot or
+    target-encoded columns times their coefficients) collapses into a
+    per-level lookup table, so score() never builds the one-hot matrix.
+
+    Attributes:
+        method (str): 'ols' (StatEngine.train_ols_regression) or 'ridge'.
+        coef (pd.Series): Intercept plus one coefficient per encoder column.
+        smearing (float): Duan smearing factor for the log -> price back-transform.
+        ols (RegressionResults): statsmodels fit (OLS only).
+    """
+
+    def __init__(self, encoder, method, coef, smearing, ols=None):
+        self.encoder = encoder
+        self.method = method
+        self.coef = coef
+        self.smearing = smearing
+        self.ols = ols
+        self._compile()
+
+    @classmethod
+    def fit(cls, df, method='ols', alphas=np.logspace(-3, 3, 13)):
+        y = np.log(df[TARGET].to_numpy(dtype=float))
+        encoder = ListingEncoder().fit(df, y)
+        X = encoder.transform(df)
+        ols = None
+        if method == 'ols':
+            ols = StatEngine.train_ols_regression(X, y)
+            params = np.asarray(ols.params)
+        elif method == 'ridge':
+            # Penalty on standardised features, folded back to raw-scale coefficients
+            mu, sd = X.mean(axis=0), X.std(axis=0)
+            sd[sd == 0] = 1.0
+            ridge = RidgeCV(alphas=alphas).fit((X - mu) / sd, y)
+            beta = ridge.coef_ / sd
+            params = np.r_[ridge.intercept_ - beta @ mu, beta]
+        else:
+            raise ValueError(f"Unknown method {method!r}; use one of {METHODS}")
+        resid = y - (params[0] + X @ params[1:])
+        coef = pd.Series(params, index=['Intercept'] + encoder.columns)
+        return cls(encoder, method, coef, float(np.mean(np.exp(resid))), ols)
+
+    def _compile(self):
+        enc, beta = self.encoder, self.coef.to_numpy()
+        n_num = len(enc.numeric)
+        self._intercept = beta[0]
+        self._numeric = beta[1:1 + n_num]
+        self._tables = {}
+        pos = 1 + n_num
+        for col in enc.onehot:
+            k = len(enc.levels[col]) - 1
+            # Baseline level first; the trailing slot (code -1, unseen) is the average level
+            table = np.r_[0.0, beta[pos:pos + k]]
+            self._tables[col] = np.append(table, enc.frequencies[col] @ table)
+            pos += k
+        for col, means in enc.target_means.items():
+            self._tables[col] = np.append(means * beta[pos], 0.0)
+            pos += 1
+
+    def log_score(self, df, chunk_size=1_000_000):
+        out = np.empty(len(df))
+        codes = {col: self.encoder.codes(df, col) for col in self._tables}
+        for start in range(0, len(df), chunk_size):
+            part = slice(start, start + chunk_size)
+            z = self.encoder.numeric_block(df.iloc[part]) @ self._numeric + self._intercept
+            for col, table in self._tables.items():
+                z += table[codes[col][part]]
+            out[part] = z
+        return out
+
+    def score(self, df, chunk_size=1_000_000):
+        """Estimated prices for every row of `df` (same columns as house_prices.csv, Price not needed)."""
+        with stage('ValuationModel.score', rows=len(df)):
+            z = self.log_score(df, chunk_size)
+            np.exp(z, out=z)
+            z *= self.smearing
+        return z
+
+    def premiums(self, col):
+        """Price multiple of each level of a one-hot categorical relative to its baseline level."""
+        levels = self.encoder.levels[col]
+        return pd.Series(np.exp(self._tables[col][:len(levels)]), index=levels, name=f'{col} premium')
+
+
+def compare_models(df, methods=METHODS, folds=5, seed=0):
+    """
+    K-fold cross-validation of each method.
+
+    Returns:
+        tuple: (pd.DataFrame of MAPE_% / R2_log per method,
+        {method: out-of-fold predicted prices}).
+    """
+    fold = np.random.default_rng(seed).permutation(len(df)) % folds
+    actual = df[TARGET].to_numpy(dtype=float)
+    rows, predictions = [], {}
+    for method in methods:
+        pred = np.empty(len(df))
+        for k in range(folds):
+            test = fold == k
+            model = ValuationModel.fit(df[~test], method)
+            pred[test] = model.score(df[test])
+        log_err = np.log(actual) - np.log(pred)
+        rows.append({
+            'method': method,
+            'MAPE_%': np.mean(np.abs(pred - actual) / actual) * 100,
+            'R2_log': 1 - np.sum(log_err ** 2) / np.sum((np.log(actual) - np.log(actual).mean()) ** 2),
+        })
+        predictions[method] = pred
+    return pd.DataFrame(rows).set_index('method'), predictions
@@ -2,27 +2,32 @@
 Module: visualization.py
 Description: Production-quality plotting for Retail Analytics.
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
 import os
 
-# Global Styling
-sns.set_theme(style="whitegrid", palette="viridis")
-plt.rcParams['figure.figsize'] = (12, 7)
-plt.rcParams['font.size'] = 11
+from src.rendering import FigureRenderer
+
+
+def apply_theme():
+    """Global Styling; seaborn and matplotlib are only imported once a Visualizer is created."""
+    import matplotlib as mpl
+    import seaborn as sns
+
+    sns.set_theme(style="whitegrid", palette="viridis")
+    mpl.rcParams['figure.figsize'] = (12, 7)
+    mpl.rcParams['font.size'] = 11
+    return sns
+
 
 class Visualizer:
-    def __init__(self, output_dir='reports/figures'):
+    def __init__(self, output_dir='reports/figures', target='print'):
         self.output_dir = output_dir
-        os.makedirs(self.output_dir, exist_ok=True)
+        self.renderer = FigureRenderer(output_dir, target, figsize=(12, 7))
+        self.sns = apply_theme()
 
-    def _save(self, filename):
-        path = os.path.join(self.output_dir, filename)
-        plt.tight_layout()
-        plt.savefig(path, dpi=300)
-        plt.close()
-        print(f"   [Viz] Saved: {filename}")
+    def _save(self, fig, filename):
+        elapsed = self.renderer.save(fig, filename)
+        print(f"   [Viz] Saved: {self.renderer.target.filename(filename)} ({elapsed:.2f}s)")
 
     def plot_heatmap(self, df):
         """Generates heatmap for retail analysis."""
@@ -33,30 +38,47 @@ class Visualizer:
 
         # Pivot the data
         sales_pivot = df.pivot_table(index='Day_Name', columns='Hour', values='Total', aggfunc='sum')
-        
+        self.plot_heatmap_pivot(sales_pivot)
+
+    def plot_heatmap_pivot(self, sales_pivot):
+        """Draws the retail heatmap from an already aggregated Day_Name x Hour pivot."""
         # Sort days correctly
         days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         sales_pivot = sales_pivot.reindex(days)
         
-        plt.figure(figsize=(12, 6))
-        sns.heatmap(sales_pivot, cmap='YlGnBu', annot=False)
-        plt.title('Retail Heatmap: Peak Business Hours', fontweight='bold')
-        plt.ylabel('Day of Week')
-        plt.xlabel('Hour of Day')
-        self._save("01_retail_heatmap.png")
+        fig, ax = self.renderer.new_figure(figsize=(12, 6))
+        self.sns.heatmap(sales_pivot, cmap='YlGnBu', annot=False, ax=ax)
+        ax.set_title('Retail Heatmap: Peak Business Hours', fontweight='bold')
+        ax.set_ylabel('Day of Week')
+        ax.set_xlabel('Hour of Day')
+        self._save(fig, "01_retail_heatmap.png")
 
     def plot_forecast(self, historical_data, y_test, predictions):
         """Line chart comparing Actual vs Predicted sales."""
-        plt.figure()
+        fig, ax = self.renderer.new_figure()
         
         # Plot Actual Test Data
         # We need to ensure indices align for plotting
         test_dates = historical_data.iloc[-len(y_test):]['Date']
         
-        plt.plot(test_dates, y_test, label='Actual Sales', color='blue', linewidth=2)
-        plt.plot(test_dates, predictions, label='AI Forecast', color='red', linestyle='--', linewidth=2)
+        ax.plot(test_dates, y_test, label='Actual Sales', color='blue', linewidth=2)
+        ax.plot(test_dates, predictions, label='AI Forecast', color='red', linestyle='--', linewidth=2)
         
-        plt.title('Sales Forecast Model: AI vs Reality (Last 15 Days)', fontweight='bold')
-        plt.legend()
-        plt.xticks(rotation=45)
-        self._save('01_retail_forecast.png')
\ No newline at end of file
+        ax.set_title('Sales Forecast Model: AI vs Reality (Last 15 Days)', fontweight='bold')
+        ax.legend()
+        ax.tick_params(axis='x', labelrotation=45)
+        self._save(fig, '01_retail_forecast.png')
+    def plot_group_ci(self, ci_table, title='Average Spend by Customer Type (95% CI)',
+                      filename='01_retail_spend_ci.png'):
+        """Bar chart of group means with precomputed CI rows (bootstrap or normal) as error bars."""
+        means = ci_table[ci_table['statistic'] == 'mean']
+        fig, ax = self.renderer.new_figure(figsize=(8, 6))
+        positions = range(len(means))
+        ax.bar(positions, means['estimate'], color=self.sns.color_palette('viridis', len(means)))
+        ax.errorbar(positions, means['estimate'],
+                    yerr=[means['estimate'] - means['ci_low'], means['ci_high'] - means['estimate']],
+                    fmt='none', ecolor='black', capsize=8)
+        ax.set_xticks(list(positions), means['group'])
+        ax.set_ylabel('Mean Total ($)')
+        ax.set_title(title, fontweight='bold')
+        self._save(fig, filename)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from src.sketches import HyperLogLog, StreamingHistogram, hash64
+
+
+def test_hash64_ignores_chunk_width():
+    ids = pd.Series([f'INV-{i:05d}' for i in range(1000)])
+    wider = pd.concat([ids, pd.Series(['INV-LONGER-THAN-THE-REST'])], ignore_index=True)
+    np.testing.assert_array_equal(hash64(ids), hash64(wider)[:len(ids)])
+
+
+def test_hyperloglog_merges_chunks_of_different_widths():
+    ids = pd.Series([f'INV-{i:05d}' for i in range(1000)])
+    wider = pd.concat([ids, pd.Series(['INV-LONGER-THAN-THE-REST'])], ignore_index=True)
+    merged = HyperLogLog().update(ids).merge(HyperLogLog().update(wider))
+    assert abs(merged.estimate() / 1001 - 1) < 5 * merged.relative_error
+
+
+def test_histogram_coarsened_is_empty_when_nothing_falls_in_range():
+    hist = StreamingHistogram(-10.0, 10.0, bins=400).update([np.nan, 25.0, -40.0])
+    counts, edges = hist.coarsened(30)
+    assert len(counts) == 0 and len(edges) == 0
+    assert (hist.below, hist.above) == (1, 1)
+
+
+def test_histogram_coarsened_keeps_every_count():
+    values = np.random.default_rng(0).normal(0, 2, 10_000)
+    hist = StreamingHistogram(-10.0, 10.0, bins=400).update(values)
+    counts, edges = hist.coarsened(30)
+    assert counts.sum() == hist.counts.sum() and len(edges) == len(counts) + 1
+    assert len(counts) <= 30